@@ -1,12 +1,31 @@
 from taskon.common import TaskonError, TaskonFatalError, TaskResult, TaskStatus
+from taskon.common import LazyTaskResult, TaskFuture, WorkerContext
+from taskon.common import StreamTaskResult, TaskStream
 
 from taskon.abstract_task import AbstractTask
 from taskon.simple_task import SimpleTask
 from taskon.abortable_task import AbortableTask
 from taskon.bash_command_task import BashCommandTask
+from taskon.sub_graph_task import SubGraphTask
+from taskon.shell_pool import ShellPool
 
 from taskon.abstract_task_processor import AbstractTaskProcessor
 from taskon.naive_task_processor import NaiveTaskProcessor
 from taskon.finite_thread_task_processor import FiniteThreadTaskProcessor
 from taskon.infinite_thread_task_processor import InfiniteThreadTaskProcessor
+from taskon.adaptive_thread_task_processor import AdaptiveThreadTaskProcessor
+from taskon.routing_task_processor import RoutingTaskProcessor
+from taskon.fair_share_task_processor import FairShareTaskProcessor
 from taskon.task_runner import TaskRunner
+from taskon.execution_plan import ExecutionPlan
+from taskon.graph_file import GraphFile, LoadedGraph
+from taskon.runtime_store import RuntimeStore
+from taskon.task_fusion import TaskFusion
+from taskon.task_speculation import TaskSpeculation
+from taskon.task_deduplication import TaskDeduplication
+from taskon.simulator import Simulator
+from taskon.rate_limiting import RateLimiting
+from taskon.task_profiler import TaskProfiler
+from taskon.up_to_date_check import UpToDateCheck
+from taskon.memory_budget import MemoryBudget
+from taskon.deadline_scheduling import DeadlineScheduling
@@ -1,4 +1,5 @@
 from taskon.common import TaskResult, TaskStatus
+from taskon.common import collectTaskResultPlaceholders
 
 class AbstractTask:
     def __init__(self, name, args=None, kwargs=None, default_result=None):
@@ -7,6 +8,40 @@ class AbstractTask:
         self.args = args or ()
         self.kwargs = kwargs or {}
         self.default_result = default_result
+        # Estimated cost of this task, populated by TaskRunner from the
+        # historical runtime of this task. See taskon/runtime_store.py
+        self.cost_estimate = None
+        # Whether executing this task more than once is harmless and
+        # produces equivalent results. See taskon/task_speculation.py
+        self.idempotent = False
+        # Whether the result of this task depends only on its action and
+        # inputs, without side effects. See taskon/task_deduplication.py
+        self.pure = False
+        # Id of the original task, if this task is an attempt executed in its
+        # place. See taskon/task_speculation.py
+        self.attempt_of = None
+        # List of (dependency task id, weight), populated by TaskRunner for
+        # the task processors which place tasks by data locality. See
+        # AbstractTaskProcessor.uses_affinity_hint
+        self.affinity_hint = None
+        # Set of labels of this task, eg: for routing the task to a task
+        # processor. See taskon/routing_task_processor.py
+        self.tags = set()
+        # Map from the name of a rate limited resource (eg: an external API)
+        # used by this task, to the number of tokens one execution uses. See
+        # taskon/rate_limiting.py
+        self.rate_limited_resources = dict()
+        # Paths of the files read and written by this task, for skipping it
+        # when its outputs are up to date. See taskon/up_to_date_check.py
+        self.input_files = []
+        self.output_files = []
+        # Seconds after the start of a run, by which this task should
+        # complete. See taskon/deadline_scheduling.py
+        self.deadline = None
+        # If set, the worker context (see taskon.WorkerContext) of the task
+        # processor's worker executing this task, is passed to 'run' as the
+        # keyword argument of this name.
+        self.worker_context_arg = None
         self.reset()
 
     def visitTaskResultPlaceholders(self, callback):
@@ -25,6 +60,14 @@ class AbstractTask:
                 return obj
         return visit((self.args, self.kwargs))
 
+    def getTaskResultPlaceholders(self):
+        """
+        Return the list of TaskResult placeholders used in the input of this
+        task. Unlike visitTaskResultPlaceholders, it doesn't rebuild the input,
+        hence it's much faster.
+        """
+        return collectTaskResultPlaceholders((self.args, self.kwargs))
+
     def setResult(self, result):
         self.result = result
 
@@ -40,9 +83,48 @@ class AbstractTask:
     def getStatus(self):
         return self.status
 
+    def getActionIdentity(self):
+        """
+        Return a string identifying the action performed by this task,
+        irrespective of the task name. Tasks with same action identity are
+        expected to have similar runtime characteristics.
+        """
+        return type(self).__name__
+
+    def getActionKey(self):
+        """
+        Return a hashable key identifying exactly the action performed by
+        this task, such that the tasks having same action key compute the
+        same result from the same inputs. Return None if it's unknown.
+        """
+        return None
+
+    def getExecutedTaskIds(self):
+        """
+        Return the ids of the tasks of the run, executed by executing this
+        task. Eg: used by task processors for data locality, since the
+        affinity hints of dependent tasks refer to these ids.
+        """
+        return [self.id if self.attempt_of is None else self.attempt_of]
+
+    def getDuration(self):
+        """
+        Return the wall clock duration (in seconds) of the last execution of
+        this task, or None if it was not measured.
+        """
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
     def reset(self):
         self.result = self.default_result
         self.status = TaskStatus.SKIPPED
         self.error = None
-
-
+        self.start_time = None
+        self.end_time = None
+        self.peak_memory = None
+        # Map from consumer task id to TaskStream, if the output of this task
+        # is streamed. See taskon.StreamTaskResult
+        self.output_streams = None
+        # The taskon.TaskProfiler, if this task is selected for profiling.
+        self.profiler = None
@@ -8,8 +8,125 @@ Take a look at these implementation of TaskProcessor for better understanding.
 4. taskon.RemoteExecutionTaskProcessor
 """
 
+import threading
+import time
+import traceback
+import tracemalloc
+
 from taskon.abstract_task import AbstractTask
+from taskon.common import TaskStatus
+from taskon.common import WorkerContext
 from taskon.common import taskonAssert
+from taskon.common import pumpTaskStreams
+from taskon.common import Object
+
+# Tasks executing in this process while tracemalloc is tracing, to find the
+# tasks which executed alone. See 'runTask'.
+tracing_lock = threading.Lock()
+tracing_state = Object(num_running=0, num_started=0)
+# The worker context of the task executing in the calling thread.
+worker_local = threading.local()
+
+def currentWorkerContext():
+    """
+    Return the worker context passed to 'runTask' in the calling thread, eg:
+    to execute a pulled task in the worker of the task pulling it.
+    """
+    return getattr(worker_local, "context", None)
+
+def runTask(task, args, kwargs, worker_context=None):
+    """
+    Execute the @task in the calling thread with the real inputs @args and
+    @kwargs. Set the result/error of the @task and return its status, either
+    TaskStatus.SUCCESS or TaskStatus.FAILURE.
+    If the @task asks for the worker context (task.worker_context_arg), the
+    @worker_context of the calling worker is passed to it.
+    If the output of @task is streamed (task.output_streams), the chunks
+    returned by the @task are put in the streams as they are produced.
+    If the @task is selected for profiling (task.profiler), it's profiled in
+    the calling thread, see taskon.TaskProfiler.
+
+    Besides the result/error, it records the wall clock time of the execution
+    in @task.start_time and @task.end_time. If tracemalloc is tracing, the peak
+    memory allocated during the execution is recorded in @task.peak_memory.
+    Since the peak of tracemalloc is process wide, it's recorded only if no
+    other task executed in this process during the execution of @task,
+    otherwise @task.peak_memory remains None. Hence with several workers, the
+    peaks are learned from the executions which happened to be alone.
+    """
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        with tracing_lock:
+            alone = tracing_state.num_running == 0
+            tracing_state.num_running += 1
+            tracing_state.num_started += 1
+            num_started = tracing_state.num_started
+            if alone:
+                tracemalloc.reset_peak()
+                base_memory = tracemalloc.get_traced_memory()[0]
+    worker_local.context = worker_context
+    if task.worker_context_arg is not None:
+        kwargs = dict(kwargs)
+        kwargs[task.worker_context_arg] = worker_context
+    profile = None
+    if task.profiler is not None:
+        profile = task.profiler.start(task)
+    task.start_time = time.time()
+    try:
+        result = task.run(*args, **kwargs)
+        if task.output_streams is not None:
+            pumpTaskStreams(result, list(task.output_streams.values()))
+            result = None
+        task.setResult(result)
+        status = TaskStatus.SUCCESS
+    except Exception:
+        task.setError(traceback.format_exc())
+        status = TaskStatus.FAILURE
+        if task.output_streams is not None:
+            for stream in task.output_streams.values():
+                stream.finish(error="Streaming task '%s' failed." % task.name)
+    task.end_time = time.time()
+    if tracing:
+        with tracing_lock:
+            tracing_state.num_running -= 1
+            if alone and tracing_state.num_started == num_started:
+                task.peak_memory = max(0, tracemalloc.get_traced_memory()[1] -
+                                          base_memory)
+    if profile is not None:
+        task.profiler.finish(task, profile)
+    return status
+
+def executeTask(task, on_complete_callback, args, kwargs,
+                worker_context=None):
+    """
+    Execute the @task in the calling thread and report its completion to
+    @on_complete_callback, as mandated by the AbstractTaskProcessor.process
+    contract. Task processors are free to execute tasks in their own way, this
+    is just the common way used by the processors shipped with taskon.
+    """
+    on_complete_callback(task, runTask(task, args, kwargs, worker_context))
+
+def createWorkerContext(worker_id, worker_initializer):
+    """
+    Create the WorkerContext of the worker @worker_id and initialize it with
+    @worker_initializer (if not None). Return (worker_context, error), where
+    error is the stack trace if the initializer raised, otherwise None.
+    Workers should fail the tasks they receive, if their initialization
+    failed.
+    """
+    worker_context = WorkerContext(worker_id)
+    try:
+        if worker_initializer is not None:
+            worker_initializer(worker_context)
+    except Exception:
+        return worker_context, ("Worker initialization failed.\n" +
+                                traceback.format_exc())
+    return worker_context, None
+
+def failTask(task, on_complete_callback, error):
+    """Fail the @task, without executing it, with the given @error."""
+    task.setError(error)
+    on_complete_callback(task, TaskStatus.FAILURE)
 
 class AbstractTaskProcessor:
     """
@@ -21,6 +138,15 @@ class AbstractTaskProcessor:
     threaded task scheduler. The implementation of these APIs can choose
     to be thread unsafe.
     """
+    # Whether this processor uses @task.affinity_hint for the placement of
+    # tasks. TaskRunner populates the affinity hints only if it's True.
+    uses_affinity_hint = False
+    # Whether all the APIs of this processor can be called concurrently from
+    # several threads. Only then TaskRunner can use it with a sharded
+    # scheduler (see taskon/sharded_scheduling_algorithm.py), which relaxes
+    # the single threaded guarantees mentioned below.
+    thread_safe = False
+
     def process(self, task, on_complete_callback, *args, **kwargs):
         """
         This API should handle the request for the execution of the given @task
@@ -47,7 +173,20 @@ class AbstractTaskProcessor:
         The exceptions coming from the execution of @task should be catched
         internally and the error details should be set via @task.setError API.
         Usually stack trace (along with other details) are reported
-        using @task.setError API. Look at 'taskon/naive_task_processor.py'
+        using @task.setError API. Look at 'executeTask' above.
+
+        If 'uses_affinity_hint' is True, @task.affinity_hint is the list of
+        (dependency task id, weight) of the dependency tasks whose results are
+        the inputs of @task. Weight is the estimated size of the result in
+        bytes (1 if unknown). Processors which hold results in worker local
+        memory (or worker local caches) should prefer to place @task on the
+        worker which executed the dependencies with largest total weight,
+        while still balancing the load.
+
+        If @task asks for a worker context (@task.worker_context_arg is set),
+        task processor should pass the taskon.WorkerContext of the worker
+        executing it, as the keyword argument of that name. Processors which
+        don't have worker scoped state pass None.
 
         When execution is complete and result/error is set using
         setResult/setError API, 'on_complete_callback' must be called exactly
@@ -106,6 +245,55 @@ class AbstractTaskProcessor:
         """
         assert isinstance(task, AbstractTask)
 
+    def getRouteKey(self, task):
+        """
+        Return a hashable key identifying the workers which would execute
+        @task, eg: the child processor of a taskon.RoutingTaskProcessor, or
+        None if all the tasks are executed alike. Task scheduler fuses only
+        the tasks having the same route key (see TaskFusion).
+        """
+        return None
+
+    def getNumWorkers(self):
+        """
+        Return the max number of tasks this processor executes at once, or
+        None if it's unknown or unbounded. TaskRunner uses it to reject the
+        pipelines of streamed tasks (see taskon.StreamTaskResult) which can't
+        run at once.
+        """
+        return None
+
+    def getNumIdleWorkers(self):
+        """
+        Return the number of tasks this processor can start executing
+        immediately, without waiting for other tasks to complete. Return None
+        if the number is unknown or unbounded.
+
+        Task scheduler might use it to decide whether additional work (eg:
+        speculative copies of stragglers) can be processed without delaying
+        the other tasks. Like other APIs, it's called from task scheduler's
+        thread.
+        """
+        return None
+
+    def cancel(self):
+        """
+        Task scheduler calls cancel API when it stops scheduling early (eg: a
+        task failed and 'continue_on_failure' is not chosen), to drop the
+        tasks which are not yet started. Scheduler calls it just before the
+        'close' API.
+
+        It should return the list of dropped tasks, for which execution will
+        never start, and for which 'on_complete_callback' must not be called.
+        The tasks already started are not affected, task scheduler aborts them
+        separately if they are AbortableTask.
+        Task scheduler reports the dropped tasks as TaskStatus.ABORTED.
+
+        Like other APIs, it's called from task scheduler's thread. The default
+        implementation can't drop anything.
+        """
+        return []
+
     def close(self):
         """
         Task scheduler calls close API to guarantee that task scheduler
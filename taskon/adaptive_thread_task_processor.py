@@ -0,0 +1,232 @@
+import queue
+import threading
+import time
+
+from taskon.common import Object
+from taskon.common import taskonAssert
+from taskon.abstract_task_processor import AbstractTaskProcessor
+from taskon.abstract_task_processor import runTask
+
+class AdaptiveThreadTaskProcessor(AbstractTaskProcessor):
+    """
+    A thread pool based task processor, which grows and shrinks its number of
+    threads between @min_threads and @max_threads, as per the observed load.
+
+    Every @adjust_interval seconds a controller thread looks at the last
+    interval and decides the new number of threads, like a hill climbing
+    controller:
+    1. No queued task: Idle threads are retired (down to @min_threads).
+    2. Throughput (tasks completed per second) dropped after the last
+       resizing, or didn't improve by 10% after the last growth: The last
+       resizing is reverted, and the number of threads which didn't help
+       becomes a ceiling, until the pool shrinks for being idle.
+    3. Tasks are queued, they are blocking (eg: doing I/O) for at least
+       @blocking_threshold fraction of their wall time, and the process is
+       using less than 90% of a CPU core: The pool grows by 25%. Blocking
+       ratio is (1 - cpu time / wall time) of the executed tasks. If it's not
+       yet known, tasks are assumed to be blocking. Waiting for the GIL looks
+       like blocking too, hence the check on process CPU usage: python
+       threads can't use more than one core for executing python code.
+    4. Otherwise tasks are CPU bound, more threads would not help.
+
+    Each scaling decision is recorded in @self.scaling_log as
+    Object(time, from_threads, to_threads, reason) and is given to
+    @log_func (if not None), as a readable line.
+
+    @cpu_time_func returns the CPU time used by the process in seconds,
+    time.process_time by default. Tests can inject it to simulate the load.
+    """
+    def __init__(self, min_threads=1, max_threads=32, adjust_interval=1.0,
+                 blocking_threshold=0.5, daemon_thread=True, log_func=None,
+                 cpu_time_func=time.process_time):
+        taskonAssert(0 < min_threads <= max_threads,
+                     "Expected 0 < min_threads <= max_threads")
+        self.min_threads = min_threads
+        self.max_threads = max_threads
+        self.adjust_interval = adjust_interval
+        self.blocking_threshold = blocking_threshold
+        self.daemon_thread = daemon_thread
+        self.log_func = log_func
+        self.cpu_time_func = cpu_time_func
+        self.num_threads = min_threads
+        self.scaling_log = []
+        self.threads = None
+        self.lock = threading.Lock()
+
+    def process(self, task, on_complete_callback, *args, **kwargs):
+        if self.threads is None:
+            self.__start()
+        self.queue.put((task, on_complete_callback, args, kwargs))
+
+    def onComplete(self, task):
+        pass
+
+    def getNumWorkers(self):
+        return self.max_threads
+
+    def getNumIdleWorkers(self):
+        if self.threads is None:
+            return self.num_threads
+        with self.lock:
+            return max(0, self.num_threads - self.num_busy)
+
+    def cancel(self):
+        """Drop the tasks waiting in the queue."""
+        if self.threads is None:
+            return []
+        dropped_tasks = []
+        num_sentinels = 0
+        while True:
+            try:
+                task_info = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if task_info is None:
+                num_sentinels += 1
+            else:
+                dropped_tasks.append(task_info[0])
+        for i in range(num_sentinels):
+            self.queue.put(None)
+        return dropped_tasks
+
+    def close(self):
+        """
+        Terminate all the threads. Wait if these threads are still executing
+        any task.
+        """
+        if self.threads is None:
+            return
+        with self.lock:
+            self.stop_controller.set()
+            threads = self.threads
+            self.threads = None
+        for thread in threads:
+            self.queue.put(None)
+        if not self.daemon_thread:
+            for thread in threads:
+                thread.join()
+
+    def __start(self):
+        self.queue = queue.Queue()
+        self.threads = []
+        self.num_busy = 0
+        self.num_retiring = 0
+        self.ceiling = None
+        self.blocking_ratio = None
+        self.__resetStats()
+        self.last_throughput = None
+        self.last_delta = 0
+        for i in range(self.num_threads):
+            self.__startThread()
+        self.stop_controller = threading.Event()
+        threading.Thread(target = self.__controller,
+                         args = (self.stop_controller,),
+                         daemon=True).start()
+
+    def __startThread(self):
+        self.threads = list(t for t in self.threads if t.is_alive())
+        new_thread = threading.Thread(target = self.__worker,
+                                      daemon=self.daemon_thread)
+        new_thread.start()
+        self.threads.append(new_thread)
+
+    def __resetStats(self):
+        self.num_completed = 0
+        self.wall_time = 0
+        self.cpu_time = 0
+        self.interval_start_time = time.time()
+        self.interval_start_process_time = self.cpu_time_func()
+
+    def __worker(self):
+        """
+        Consume and execute tasks from the queue until a 'None' entry is
+        received, or this thread is chosen to retire.
+        """
+        while True:
+            task_info = self.queue.get()
+            if task_info is None:
+                break
+            (task, on_complete_callback, args, kwargs) = task_info
+            with self.lock:
+                self.num_busy += 1
+            start_wall, start_cpu = time.time(), time.thread_time()
+            status = runTask(task, args, kwargs)
+            with self.lock:
+                self.num_busy -= 1
+                self.num_completed += 1
+                self.wall_time += time.time() - start_wall
+                self.cpu_time += time.thread_time() - start_cpu
+                retire = self.num_retiring > 0
+                if retire:
+                    self.num_retiring -= 1
+            on_complete_callback(task, status)
+            if retire:
+                break
+
+    def __controller(self, stop_controller):
+        while not stop_controller.wait(self.adjust_interval):
+            with self.lock:
+                if not stop_controller.is_set():
+                    self.__adjust()
+
+    def __adjust(self):
+        """Decide and apply the new number of threads. Assumes(self.lock)"""
+        elapsed = time.time() - self.interval_start_time
+        throughput = self.num_completed / elapsed
+        cpu_usage = (self.cpu_time_func() -
+                     self.interval_start_process_time) / elapsed
+        if self.wall_time > 0:
+            blocking_ratio = max(0, 1 - self.cpu_time / self.wall_time)
+            self.blocking_ratio = (
+                blocking_ratio if self.blocking_ratio is None
+                else (self.blocking_ratio + blocking_ratio) / 2)
+        self.__resetStats()
+        queue_depth = self.queue.qsize()
+        num_idle = self.num_threads - self.num_busy
+        delta, reason = 0, None
+        if queue_depth == 0:
+            if num_idle > 0:
+                delta = -max(1, num_idle // 2)
+                reason = "no queued task, %d idle threads" % num_idle
+                self.ceiling = None
+        elif (self.last_delta != 0 and self.last_throughput is not None and
+                throughput < (1.1 if self.last_delta > 0 else 0.9) *
+                             self.last_throughput):
+            delta = -self.last_delta
+            reason = ("throughput went from %.1f to %.1f tasks/s after "
+                      "last resizing" % (self.last_throughput, throughput))
+            if self.last_delta > 0:
+                self.ceiling = self.num_threads
+        elif cpu_usage < 0.9 and (
+                self.blocking_ratio is None or
+                self.blocking_ratio >= self.blocking_threshold):
+            delta = max(1, self.num_threads // 4)
+            reason = "%d queued tasks, blocking ratio %s, cpu usage %.2f" % (
+                queue_depth, "unknown" if self.blocking_ratio is None
+                             else "%.2f" % self.blocking_ratio, cpu_usage)
+        max_threads = self.max_threads
+        if self.ceiling is not None and delta > 0:
+            max_threads = min(max_threads, self.ceiling - 1)
+        new_num_threads = max(self.min_threads,
+                              min(max_threads, self.num_threads + delta))
+        delta = new_num_threads - self.num_threads
+        self.last_delta = delta
+        self.last_throughput = throughput
+        if delta == 0:
+            return
+        self.scaling_log.append(Object(time=time.time(),
+                                       from_threads=self.num_threads,
+                                       to_threads=new_num_threads,
+                                       reason=reason))
+        if self.log_func is not None:
+            self.log_func("AdaptiveThreadTaskProcessor: %d -> %d threads, %s"
+                          % (self.num_threads, new_num_threads, reason))
+        self.num_threads = new_num_threads
+        if delta > 0:
+            for i in range(delta):
+                self.__startThread()
+        elif queue_depth == 0:
+            for i in range(-delta):
+                self.queue.put(None)
+        else:
+            self.num_retiring += -delta
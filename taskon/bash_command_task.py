@@ -1,19 +1,111 @@
+import concurrent.futures
 import os
+import signal
+import subprocess
+
 from taskon.common import TaskonError
 from taskon.abortable_task import AbortableTask
-from taskon.utils import runCommand
+from taskon.utils import callableIdentity
 
 class BashCommandTask(AbortableTask):
-    def __init__(self, name, command, args=None, kwargs=None, result=None):
+    """
+    A task to run a bash @command, or the command returned by @command
+    function called with the inputs of this task.
+    If @shell_pool (a taskon.ShellPool) is given, the command is run by one
+    of its long-lived shell workers, instead of launching a new shell. The
+    captured output of the command is then kept in @self.output.
+    @input_files and @output_files are the paths of files read and written
+    by the command, see taskon.UpToDateCheck.
+
+    'abort' kills the command (along with its child processes), or prevents
+    it from starting. The aborted task fails.
+    """
+    def __init__(self, name, command, args=None, kwargs=None, result=None,
+                 shell_pool=None, input_files=None, output_files=None):
         AbortableTask.__init__(self, name, args, kwargs, result)
         self.command = command
+        self.shell_pool = shell_pool
+        self.output = None
+        self.input_files = list(input_files or [])
+        self.output_files = list(output_files or [])
+        self.aborted = False
+        self.process = None
+        # Future of the command submitted to @shell_pool, while running.
+        self.future = None
 
     def run(self, *args, **kwargs):
         if callable(self.command):
             cmd = self.command(*args, **kwargs)
         else:
             cmd = self.command
-        runCommand(cmd)
+        if self.shell_pool is None:
+            self.__runCommand(cmd)
+            return
+        error_code, self.output = self.__runPooledCommand(cmd)
+        if error_code != 0:
+            raise TaskonError(
+                "Command '%s' failed with error_code %s\n%s" % (
+                    cmd, error_code, self.output))
+
+    def getActionIdentity(self):
+        if callable(self.command):
+            return callableIdentity(self.command)
+        return self.command
+
+    def getActionKey(self):
+        return self.command
+
+    def reset(self):
+        AbortableTask.reset(self)
+        self.aborted = False
 
     def abort(self):
-        print("Warning: 'abort' API is not yet implemented for BashCommandTask")
+        self.aborted = True
+        process = self.process
+        if process is not None:
+            self.__kill(process)
+        future = self.future
+        if future is not None:
+            self.shell_pool.abort(future)
+
+    def __runPooledCommand(self, cmd):
+        """Run the command in @shell_pool, return (exit_code, output)."""
+        if self.aborted:
+            raise TaskonError("Command '%s' aborted" % cmd)
+        self.future = self.shell_pool.submit(cmd)
+        # 'abort' might have missed the future, if called just now.
+        if self.aborted:
+            self.shell_pool.abort(self.future)
+        try:
+            return self.future.result()
+        except concurrent.futures.CancelledError:
+            raise TaskonError("Command '%s' aborted" % cmd)
+        finally:
+            self.future = None
+
+    def __runCommand(self, cmd):
+        """
+        Same as taskon.utils.runCommand, but the command runs in its own
+        process group, to be killed by 'abort'.
+        """
+        print("Running command: %s" % cmd)
+        if self.aborted:
+            raise TaskonError("Command '%s' aborted" % cmd)
+        self.process = subprocess.Popen(cmd, shell=True,
+                                        start_new_session=True)
+        # 'abort' might have missed the process, if called just now.
+        if self.aborted:
+            self.__kill(self.process)
+        error_code = self.process.wait()
+        self.process = None
+        if self.aborted:
+            raise TaskonError("Command '%s' aborted" % cmd)
+        if error_code != 0:
+            raise TaskonError(
+                "Command '%s' failed with error_code %s" % (cmd, error_code))
+
+    def __kill(self, process):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass # Already complete.
@@ -1,4 +1,7 @@
+import collections
 import enum
+import queue
+import threading
 
 class TaskonError(Exception):
     """General TaskonError"""
@@ -19,6 +22,192 @@ class TaskResult:
     def __init__(self, name):
         self.name = name
 
+class LazyTaskResult(TaskResult):
+    """
+    Placeholder for the result of a task, which is pulled on demand. Unlike
+    TaskResult, the referenced task is not a dependency of the task using it.
+    The task using it receives a TaskFuture in its place, and the referenced
+    task (along with its dependencies) is scheduled only when the result is
+    requested by TaskFuture.get(). Tasks which are never requested are never
+    executed.
+    """
+    pass
+
+class TaskFuture:
+    """
+    Future of the result of a task, passed to a task in place of a
+    LazyTaskResult placeholder.
+    @request_func is called with this future on the first call of 'get', to
+    request the task scheduler to execute the task named @name.
+
+    The task waiting in 'get' lends its worker to the pulled tasks: task
+    scheduler hands them to this future (see 'execute') and they are
+    executed in the waiting thread, hence a pull never needs a spare worker
+    of task processor.
+    """
+    def __init__(self, name, request_func):
+        self.name = name
+        self.request_func = request_func
+        self.requested = False
+        self.done = threading.Event()
+        # Functions to be executed in the waiting thread, and a None entry
+        # on resolution.
+        self.work_queue = queue.SimpleQueue()
+
+    def get(self):
+        """
+        Block until the referenced task is executed and return its result.
+        Raise TaskonError if the referenced task couldn't execute successfully.
+        """
+        if not self.requested:
+            self.requested = True
+            self.request_func(self)
+            while True:
+                func = self.work_queue.get()
+                if func is None:
+                    break
+                func()
+        self.done.wait()
+        if not self.succeeded:
+            raise TaskonError("Lazy dependency task '%s' didn't execute "
+                              "successfully." % self.name)
+        return self.result
+
+    def execute(self, func):
+        """
+        Called by task scheduler to execute @func (the execution of a pulled
+        task) in the thread waiting on this future, before its resolution.
+        """
+        self.work_queue.put(func)
+
+    def resolve(self, succeeded, result=None):
+        """Called by task scheduler when the referenced task is complete."""
+        self.succeeded = succeeded
+        self.result = result
+        self.done.set()
+        self.work_queue.put(None)
+
+class StreamTaskResult(TaskResult):
+    """
+    Placeholder for the output of a task, which is streamed chunk by chunk.
+    The referenced task (producer) must return an iterable (eg: a generator)
+    of chunks. The task using this placeholder (consumer) receives a
+    TaskStream in its place and starts as soon as the producer starts, so
+    that both run concurrently as a pipeline.
+    At most @max_size chunks are buffered in the stream, the producer blocks
+    when the buffer is full, until the consumer catches up.
+
+    Note that the producer and its consumers occupy a worker each, hence the
+    task processor must have enough workers to run the whole pipeline at
+    once; TaskRunner rejects the pipelines larger than the workers of task
+    processor (see AbstractTaskProcessor.getNumWorkers). The result of a
+    streaming producer is None, hence all of its dependents must use
+    StreamTaskResult.
+    """
+    def __init__(self, name, max_size=16):
+        TaskResult.__init__(self, name)
+        self.max_size = max_size
+
+class TaskStream:
+    """
+    A bounded stream of the chunks produced by a task, passed to a consumer
+    task in place of a StreamTaskResult placeholder. Iterating over it
+    yields the chunks as they are produced. Iteration raises TaskonError if
+    the producer failed, or the stream is aborted.
+    """
+    def __init__(self, name, max_size):
+        self.name = name
+        self.max_size = max_size
+        self.chunks = collections.deque()
+        self.condition = threading.Condition()
+        self.finished = False
+        self.error = None
+        self.detached = False
+
+    def put(self, chunk):
+        """
+        Called by the producer. Block while the buffer is full. Return False
+        if the consumer is gone, hence the chunk is dropped.
+        """
+        with self.condition:
+            while len(self.chunks) >= self.max_size and not self.detached:
+                self.condition.wait()
+            if self.detached:
+                return False
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+            return True
+
+    def finish(self, error=None):
+        """
+        Called when the producer is done. @error (if not None) is the error
+        message to be raised in the consumer after the buffered chunks.
+        """
+        with self.condition:
+            self.finished = True
+            self.error = error
+            self.condition.notify_all()
+
+    def detach(self):
+        """
+        Called by task scheduler when the consumer is done, or the scheduling
+        is finished. Unblock the producer and drop the buffered chunks.
+        """
+        with self.condition:
+            self.detached = True
+            self.chunks.clear()
+            self.condition.notify_all()
+
+    def __iter__(self):
+        while True:
+            with self.condition:
+                while (len(self.chunks) == 0 and not self.finished and
+                        not self.detached):
+                    self.condition.wait()
+                if len(self.chunks) > 0:
+                    chunk = self.chunks.popleft()
+                    self.condition.notify_all()
+                elif self.detached:
+                    raise TaskonError("Stream of task '%s' is aborted." %
+                                      self.name)
+                elif self.error is not None:
+                    raise TaskonError(self.error)
+                else:
+                    return
+            yield chunk
+
+def pumpTaskStreams(chunks, streams):
+    """
+    Put the @chunks produced by a task in each of its output @streams, and
+    finish the streams. Producing stops early if all the consumers are gone.
+    Exceptions raised while producing are propagated, without finishing the
+    streams.
+    """
+    for chunk in chunks:
+        if not any([stream.put(chunk) for stream in streams]):
+            if hasattr(chunks, "close"):
+                chunks.close()
+            break
+    for stream in streams:
+        stream.finish()
+
+def collectTaskResultPlaceholders(obj):
+    """
+    Return the list of TaskResult placeholders used in @obj, by looking into
+    the nested lists, tuples and dictionaries.
+    """
+    placeholders = []
+    stack = [obj]
+    while len(stack) > 0:
+        obj = stack.pop()
+        if isinstance(obj, TaskResult):
+            placeholders.append(obj)
+        elif isinstance(obj, list) or isinstance(obj, tuple):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+    return placeholders
+
 class TaskStatus(enum.IntEnum):
     SUCCESS = 1
     FAILURE = 2
@@ -34,4 +223,16 @@ class Object(dict):
     """
     def __init__(self, *initial_value, **kwargs):
         self.__dict__ = self
-        dict.__init__(self, *initial_value, **kwargs)
\ No newline at end of file
+        dict.__init__(self, *initial_value, **kwargs)
+
+class WorkerContext(Object):
+    """
+    Worker scoped state, created once per worker of a task processor and
+    passed to every task executed by that worker which asks for it (see
+    AbstractTask.worker_context_arg). Worker initializer of the task
+    processor populates it with long lived resources (eg: database
+    connections, http sessions), which are reused across tasks.
+    @worker_id - Index of the worker in the task processor.
+    """
+    def __init__(self, worker_id, **kwargs):
+        Object.__init__(self, worker_id=worker_id, **kwargs)
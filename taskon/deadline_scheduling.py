@@ -0,0 +1,158 @@
+import heapq
+import math
+import time
+
+from taskon.common import TaskStatus
+
+
+class DeadlineScheduling:
+    """
+    Earliest deadline first dispatch of the ready tasks, for the runs where
+    some target tasks have delivery deadlines and others are best effort.
+    Tasks carry deadlines in `task.deadline`, seconds after the start of a
+    run by which the task should complete.
+
+    Deadlines propagate back through the dependency cover: the latest finish
+    time of a task is the earliest of its own deadline and the latest start
+    times of its dependent tasks, where the latest start time is the latest
+    finish time minus the estimated duration (from task.cost_estimate, see
+    RuntimeStore, @default_duration seconds if unknown). Tasks which no
+    deadline depends on are best effort.
+
+    Ready tasks are held in the task scheduler and dispatched in the order
+    of their latest start time, i.e. least slack first, only as many as the
+    idle workers of task processor (see AbstractTaskProcessor.
+    getNumIdleWorkers), so that the tasks becoming ready later can still
+    overtake them. Processors which don't know their idle workers get all
+    the ready tasks at once, in the same order. Streaming tasks are
+    dispatched without holding.
+
+    After a run, @predicted_misses are the names of the tasks whose
+    deadline is earlier than their earliest possible finish time as per the
+    estimates (with unlimited workers), and @actual_misses are the names of
+    the tasks which didn't complete successfully by their deadline.
+    """
+    def __init__(self, default_duration=0.0):
+        self.default_duration = default_duration
+
+    def prepare(self, tasks_map, execution_plan, num_idle_func):
+        """
+        Called by task scheduler before the start of scheduling.
+        @num_idle_func - Returns the number of idle workers of task processor.
+        """
+        self.start_time = time.time()
+        self.tasks_map = tasks_map
+        self.num_idle_func = num_idle_func
+        self.excluded_tasks = set()
+        self.held_tasks = [] # Heap of (latest start time, sequence, task).
+        self.num_held_tasks = 0
+        self.sequence = 0
+        self.running_tasks = set()
+        self.completion_times = dict()
+        self.actual_misses = None
+        # Tasks pulled on demand (not in the plan) are best effort.
+        self.latest_start = [math.inf] * len(tasks_map)
+        duration = dict()
+        for task_id in execution_plan.order:
+            estimate = tasks_map[task_id].cost_estimate
+            duration[task_id] = (self.default_duration if estimate is None
+                                 else estimate.duration)
+        for task_id in reversed(execution_plan.order):
+            deadline = tasks_map[task_id].deadline
+            latest_finish = math.inf if deadline is None else deadline
+            for d_task_id in execution_plan.successors[task_id]:
+                latest_finish = min(latest_finish,
+                                    self.latest_start[d_task_id])
+            self.latest_start[task_id] = latest_finish - duration[task_id]
+        earliest_start = dict()
+        self.deadline_tasks = []
+        self.predicted_misses = []
+        for task_id in execution_plan.order:
+            earliest_finish = (earliest_start.get(task_id, 0) +
+                               duration[task_id])
+            for d_task_id in execution_plan.successors[task_id]:
+                earliest_start[d_task_id] = max(
+                    earliest_start.get(d_task_id, 0), earliest_finish)
+            task = tasks_map[task_id]
+            if task.deadline is not None:
+                self.deadline_tasks.append(task_id)
+                if earliest_finish > task.deadline:
+                    self.predicted_misses.append(task.name)
+
+    def exclude(self, task_ids):
+        """Dispatch the tasks @task_ids without holding."""
+        self.excluded_tasks.update(task_ids)
+
+    def admit(self, tasks):
+        """
+        Hold the ready @tasks, and return the list of held tasks which can be
+        dispatched now, in the order of their latest start time.
+        """
+        excluded = []
+        for task in tasks:
+            if task.id in self.excluded_tasks:
+                excluded.append(task)
+            else:
+                self.hold([task])
+        return excluded + self.release()
+
+    def hold(self, tasks):
+        """Hold the ready @tasks, to be returned by 'release' later."""
+        for task in tasks:
+            heapq.heappush(self.held_tasks,
+                           (self.latest_start[task.id], self.sequence, task))
+            self.sequence += 1
+        self.num_held_tasks += len(tasks)
+
+    def release(self):
+        """
+        Return the list of held tasks which can be dispatched now. At least
+        one task is released if none of the released tasks is in progress.
+        """
+        num_idle = self.num_idle_func()
+        if num_idle is None:
+            num_idle = self.num_held_tasks
+        if len(self.running_tasks) == 0:
+            num_idle = max(1, num_idle)
+        released = []
+        while len(released) < num_idle and len(self.held_tasks) > 0:
+            released.append(heapq.heappop(self.held_tasks)[2])
+        self.num_held_tasks -= len(released)
+        self.running_tasks.update(task.id for task in released)
+        return released
+
+    def drain(self):
+        """Return and forget all the held tasks."""
+        drained = list(task for _, _, task in self.held_tasks)
+        self.held_tasks = []
+        self.num_held_tasks = 0
+        return drained
+
+    def nextReleaseDelay(self):
+        """Held tasks are released on completions only."""
+        return None
+
+    def onComplete(self, task):
+        """Called by task scheduler when @task is complete."""
+        self.running_tasks.discard(task.id)
+        if task.deadline is not None:
+            self.completion_times[task.id] = time.time() - self.start_time
+
+    def finish(self):
+        """Called by TaskRunner after the run, to find @actual_misses."""
+        self.actual_misses = []
+        for task_id in self.deadline_tasks:
+            task = self.tasks_map[task_id]
+            if (task.status != TaskStatus.SUCCESS or
+                    self.completion_times.get(task_id, math.inf) >
+                    task.deadline):
+                self.actual_misses.append(task.name)
+
+    def getSummaryString(self):
+        """Return the predicted vs actual deadline misses of the last run."""
+        line = "Deadlines: %s/%s missed, %s predicted." % (
+            len(self.actual_misses), len(self.deadline_tasks),
+            len(self.predicted_misses))
+        if len(self.actual_misses) > 0:
+            line += " Missed: %s." % ", ".join(self.actual_misses)
+        return line
@@ -0,0 +1,47 @@
+class ExecutionPlan:
+    """
+    Compiled dependency graph of the effective tasks, built once by TaskRunner
+    and reused by all of its runs. The plan is immutable, the per run state of
+    task scheduler is just a copy of @self.in_degree.
+
+    Task ids are indices in [0, num_tasks), hence the plan is kept in lists
+    indexed by task id:
+        order - Tuple of effective task ids in a topological order, i.e.
+                dependencies first. Tasks in a dependency cycle are excluded
+                (possible only if cycles are validated in background).
+        roots - Tuple of effective task ids without any dependency.
+        in_degree - List of the number of dependencies of each task, 0 for
+                    the tasks which are not effective.
+        successors - List of the tuple of effective dependent tasks of each
+                     task.
+    """
+    def __init__(self, effective_tasks, num_tasks, deps_func):
+        """
+        @effective_tasks - Set of effective task ids.
+        @num_tasks - Total number of tasks, including the non effective ones.
+        @deps_func - A function that takes a task id and return a set of
+                     dependency task ids.
+        """
+        self.effective_tasks = frozenset(effective_tasks)
+        in_degree = [0] * num_tasks
+        successors = [[] for i in range(num_tasks)]
+        for task_id in self.effective_tasks:
+            deps = deps_func(task_id)
+            in_degree[task_id] = len(deps)
+            for d in deps:
+                successors[d].append(task_id)
+        self.roots = tuple(task_id for task_id in self.effective_tasks
+                           if in_degree[task_id] == 0)
+        # Kahn's algorithm.
+        pending = list(in_degree)
+        order = list(self.roots)
+        index = 0
+        while index < len(order):
+            for d_task_id in successors[order[index]]:
+                pending[d_task_id] -= 1
+                if pending[d_task_id] == 0:
+                    order.append(d_task_id)
+            index += 1
+        self.order = tuple(order)
+        self.in_degree = in_degree
+        self.successors = list(tuple(s) for s in successors)
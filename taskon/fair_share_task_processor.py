@@ -0,0 +1,213 @@
+import collections
+import threading
+import time
+
+from taskon.common import taskonAssert
+from taskon.abstract_task_processor import AbstractTaskProcessor
+from taskon.abstract_task_processor import runTask
+
+class FairShareTaskProcessor:
+    """
+    A pool of @num_threads threads shared by several concurrent runs (eg:
+    TaskRunners running in different threads), with weighted fair sharing of
+    the threads among them.
+
+    Each run uses its own tenant of the pool, created by 'tenant' method,
+    which is a task processor. Each tenant has its own queue of tasks. When a
+    thread becomes free, it picks the next task of the backlogged tenant
+    having the least virtual time, i.e. the execution time consumed by the
+    tenant, divided by its weight. Execution time of a task is charged when
+    it's dispatched, as per its task.cost_estimate (@default_cost seconds if
+    unknown), and corrected with the actual time when it completes. A tenant
+    becoming backlogged starts from the current virtual time of the pool,
+    hence it neither gets credit for being idle nor waits behind the backlog
+    of other tenants: a large backfill run can't starve a latency sensitive
+    run sharing the pool.
+
+    Tenants can also have a quota, the max number of their tasks running at
+    once.
+
+    @clock returns the current time in seconds, for measuring the execution
+    time of tasks. Tests can inject it to simulate the durations.
+    """
+    def __init__(self, num_threads, daemon_thread=True, default_cost=1.0,
+                 clock=time.time):
+        taskonAssert(num_threads > 0, "num_threads should be positive number")
+        self.num_threads = num_threads
+        self.daemon_thread = daemon_thread
+        self.default_cost = default_cost
+        self.clock = clock
+        self.condition = threading.Condition()
+        self.tenants = []
+        self.threads = None
+        self.num_busy = 0
+        self.virtual_time = 0
+
+    def tenant(self, name, weight=1, max_running=None):
+        """
+        Create a tenant of this pool, to be used as the task processor of a
+        run. A tenant can be reused by the subsequent runs, but not by
+        concurrent runs. The pool forgets a tenant when it's closed, after
+        its queued tasks, and remembers it again when it processes tasks.
+        @weight - Share of the threads, relative to other tenants.
+        @max_running - If given, the max number of tasks of this tenant
+                       running at once.
+        """
+        taskonAssert(weight > 0, "weight should be positive number")
+        taskonAssert(max_running is None or max_running > 0,
+                     "max_running should be positive number")
+        tenant = FairShareTenant(self, name, weight, max_running)
+        with self.condition:
+            self.tenants.append(tenant)
+        return tenant
+
+    def close(self):
+        """
+        Terminate all the threads, after the tasks already queued. The pool
+        restarts if a tenant processes tasks again.
+        """
+        with self.condition:
+            if self.threads is None:
+                return
+            threads = self.threads
+            self.threads = None
+            self.condition.notify_all()
+        if not self.daemon_thread:
+            for thread in threads:
+                thread.join()
+
+    def submit(self, tenant, task_info):
+        with self.condition:
+            if self.threads is None:
+                self.threads = list(
+                    threading.Thread(target=self.__worker,
+                                     daemon=self.daemon_thread)
+                    for i in range(self.num_threads))
+                for thread in self.threads:
+                    thread.start()
+            if tenant.closed:
+                tenant.closed = False
+                if all(tenant is not t for t in self.tenants):
+                    self.tenants.append(tenant)
+            if len(tenant.queue) == 0 and tenant.num_running == 0:
+                tenant.virtual_time = max(tenant.virtual_time,
+                                          self.virtual_time)
+            tenant.queue.append(task_info)
+            self.condition.notify()
+
+    def detach(self, tenant):
+        """Forget the closed @tenant, once it has no queued task."""
+        with self.condition:
+            tenant.closed = True
+            self.__removeIfClosed(tenant)
+
+    def __removeIfClosed(self, tenant):
+        """Assumes(self.condition)"""
+        if tenant.closed and len(tenant.queue) == 0:
+            self.tenants = list(t for t in self.tenants if t is not tenant)
+
+    def drop(self, tenant):
+        """Drop and return the queued tasks of @tenant."""
+        with self.condition:
+            dropped_tasks = list(task for task, _, _, _ in tenant.queue)
+            tenant.queue.clear()
+        return dropped_tasks
+
+    def getNumIdleWorkers(self, tenant):
+        with self.condition:
+            num_idle = self.num_threads - self.num_busy
+            if tenant.max_running is not None:
+                num_idle = min(num_idle,
+                               tenant.max_running - tenant.num_running)
+            return max(0, num_idle)
+
+    def __pick(self):
+        """
+        Return the next (tenant, task_info, cost) to execute, or None.
+        Assumes(self.condition)
+        """
+        chosen = None
+        for tenant in self.tenants:
+            if len(tenant.queue) == 0 or (
+                    tenant.max_running is not None and
+                    tenant.num_running >= tenant.max_running):
+                continue
+            if chosen is None or tenant.virtual_time < chosen.virtual_time:
+                chosen = tenant
+        if chosen is None:
+            return None
+        task_info = chosen.queue.popleft()
+        self.__removeIfClosed(chosen)
+        estimate = task_info[0].cost_estimate
+        cost = self.default_cost if estimate is None else estimate.duration
+        self.virtual_time = max(self.virtual_time, chosen.virtual_time)
+        chosen.virtual_time += cost / chosen.weight
+        chosen.num_running += 1
+        self.num_busy += 1
+        return chosen, task_info, cost
+
+    def __worker(self):
+        """
+        Execute the tasks of tenants in fair share order, until the pool is
+        closed and the queues are empty.
+        """
+        threads = self.threads
+        while True:
+            with self.condition:
+                picked = self.__pick()
+                while picked is None:
+                    if self.threads is not threads:
+                        return
+                    self.condition.wait()
+                    picked = self.__pick()
+            tenant, (task, on_complete_callback, args, kwargs), cost = picked
+            start_time = self.clock()
+            status = runTask(task, args, kwargs)
+            with self.condition:
+                tenant.virtual_time += ((self.clock() - start_time - cost) /
+                                        tenant.weight)
+                tenant.num_running -= 1
+                tenant.num_processed += 1
+                self.num_busy -= 1
+                # A tenant might be eligible again, after its quota is freed.
+                self.condition.notify_all()
+            on_complete_callback(task, status)
+
+
+class FairShareTenant(AbstractTaskProcessor):
+    """
+    A tenant of a taskon.FairShareTaskProcessor. Its tasks are executed by
+    the threads of the shared pool. Closing a tenant doesn't close the pool.
+    """
+    thread_safe = True
+
+    def __init__(self, pool, name, weight, max_running):
+        self.pool = pool
+        self.name = name
+        self.weight = weight
+        self.max_running = max_running
+        self.queue = collections.deque()
+        self.num_running = 0
+        self.num_processed = 0
+        self.virtual_time = 0
+        self.closed = False
+
+    def process(self, task, on_complete_callback, *args, **kwargs):
+        self.pool.submit(self, (task, on_complete_callback, args, kwargs))
+
+    def onComplete(self, task):
+        pass
+
+    def getNumWorkers(self):
+        if self.max_running is None:
+            return self.pool.num_threads
+        return min(self.pool.num_threads, self.max_running)
+
+    def getNumIdleWorkers(self):
+        return self.pool.getNumIdleWorkers(self)
+
+    def cancel(self):
+        return self.pool.drop(self)
+
+    def close(self):
+        self.pool.detach(self)
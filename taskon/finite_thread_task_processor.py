@@ -1,23 +1,49 @@
-import traceback
 import collections
 import queue
 import threading
 
-from taskon.common import TaskStatus
 from taskon.common import taskonAssert
 from taskon.abstract_task_processor import AbstractTaskProcessor
+from taskon.abstract_task_processor import executeTask
+from taskon.abstract_task_processor import createWorkerContext
+from taskon.abstract_task_processor import failTask
 
 class FiniteThreadTaskProcessor(AbstractTaskProcessor):
     """
-    Note: As per the AbstractTaskProcessor contract, all the public APIs
-          can choose to be thread unsafe because task schedular guarantees to
-          call them in a single thread.
+    Each of the @num_threads threads is a worker, having its own
+    taskon.WorkerContext, which is passed to the tasks asking for it.
+    @worker_initializer - A function called with the WorkerContext in the
+                          worker thread when it starts, to set up worker
+                          scoped resources (eg: connection pools).
+    @worker_finalizer - A function called with the WorkerContext in the
+                        worker thread when the processor is closed, to tear
+                        down those resources. If given, 'close' waits for
+                        the worker threads to finish.
+    @prefer_locality - If True, a task is preferably placed on the available
+                       thread which executed its dependencies with the
+                       largest total weight, as per task.affinity_hint. When
+                       a thread becomes available, the task preferring it
+                       most among the first @locality_window waiting tasks,
+                       is placed on it. Useful when tasks share thread local
+                       state or caches (see WorkerContext).
+
+    All the public APIs are thread safe, hence it can be used with a
+    sharded scheduler as well (see AbstractTaskProcessor.thread_safe).
     """
-    def __init__(self, num_threads, daemon_thread=True):
+    thread_safe = True
+
+    def __init__(self, num_threads, daemon_thread=True,
+                 worker_initializer=None, worker_finalizer=None,
+                 prefer_locality=False, locality_window=8):
         taskonAssert(num_threads > 0, "num_threads should be positive number")
         self.num_threads = num_threads
         self.threads = None
         self.daemon_thread = daemon_thread
+        self.worker_initializer = worker_initializer
+        self.worker_finalizer = worker_finalizer
+        self.uses_affinity_hint = prefer_locality
+        self.locality_window = locality_window
+        self.lock = threading.Lock()
 
     def process(self, task, on_complete_callback, *args, **kwargs):
         """
@@ -25,72 +51,166 @@ class FiniteThreadTaskProcessor(AbstractTaskProcessor):
         Allocate the task to one of the available queue. If no queue is
         available, push the task in self.waiting_queue.
         """
-        if self.threads is None:
-            self.__startQueueConsumers()
-        task_info = (task, on_complete_callback, args, kwargs)
-        if len(self.available_queues) > 0:
-            self.__allocate(task_info)
-        else:
-            self.waiting_queue.append(task_info)
+        with self.lock:
+            if self.threads is None:
+                self.__startQueueConsumers()
+            task_info = (task, on_complete_callback, args, kwargs)
+            if len(self.available_queues) > 0:
+                self.__allocate(task_info, self.__preferredQueue(task))
+            else:
+                self.waiting_queue.append(task_info)
 
     def onComplete(self, task):
         """
         On the aknowledgement that @task has completed, we check @waiting_queue
         to see if there are tasks waiting to be assigned.
         """
-        allocated_on = self.allocated_on_map.pop(task.id)
-        self.available_queues.add(allocated_on)
-        if len(self.waiting_queue) > 0:
-            self.__allocate(self.waiting_queue.popleft())
+        with self.lock:
+            allocated_on = self.allocated_on_map.pop(task.id)
+            self.available_queues.add(allocated_on)
+            if self.uses_affinity_hint:
+                # Eg: A FusedTask executes more tasks than known at start.
+                self.__recordExecutedOn(task, allocated_on)
+            if len(self.waiting_queue) > 0:
+                self.__allocate(self.__popWaitingTask(allocated_on),
+                                allocated_on)
+
+    def getNumWorkers(self):
+        return self.num_threads
+
+    def getNumIdleWorkers(self):
+        with self.lock:
+            if self.threads is None:
+                return self.num_threads
+            return len(self.available_queues)
+
+    def cancel(self):
+        """
+        Drop the tasks waiting in @waiting_queue, and the tasks allocated to a
+        queue but not yet picked up by its thread.
+        """
+        with self.lock:
+            if self.threads is None:
+                return []
+            dropped_tasks = list(task_info[0]
+                                 for task_info in self.waiting_queue)
+            self.waiting_queue.clear()
+            for qid in range(self.num_threads):
+                try:
+                    task_info = self.queues[qid].get_nowait()
+                except queue.Empty:
+                    continue
+                dropped_tasks.append(task_info[0])
+                del self.allocated_on_map[task_info[0].id]
+                self.available_queues.add(qid)
+            return dropped_tasks
 
     def close(self):
         """
         Terminate all the threads. Wait if these threads are still executing
         any task.
         """
-        if self.threads is None:
-            return
-        for i in range(self.num_threads):
-            self.queues[i].put(None)
-        if not self.daemon_thread:
+        with self.lock:
+            if self.threads is None:
+                return
             for i in range(self.num_threads):
-                self.threads[i].join()
-        self.threads = None
+                self.queues[i].put(None)
+            if not self.daemon_thread or self.worker_finalizer is not None:
+                for i in range(self.num_threads):
+                    self.threads[i].join()
+            self.threads = None
 
-    def __allocate(self, task_info):
-        """Assumes(len(self.available_queues) > 0)"""
-        available_queue = self.available_queues.pop()
+    def __allocate(self, task_info, qid=None):
+        """
+        Allocate the task on the available queue @qid, or on any available
+        queue if @qid is None. Assumes(len(self.available_queues) > 0)
+        """
+        if qid is None:
+            qid = self.available_queues.pop()
+        else:
+            self.available_queues.remove(qid)
         task = task_info[0]
-        self.allocated_on_map[task.id] = available_queue
-        self.queues[available_queue].put(task_info)
+        self.allocated_on_map[task.id] = qid
+        if self.uses_affinity_hint:
+            self.__recordExecutedOn(task, qid)
+        self.queues[qid].put(task_info)
+
+    def __recordExecutedOn(self, task, qid):
+        for task_id in task.getExecutedTaskIds():
+            self.executed_on_map[task_id] = qid
+
+    def __affinity(self, task, qid):
+        """Total weight of the dependencies of @task executed on @qid."""
+        return sum(weight for d, weight in task.affinity_hint or ()
+                   if self.executed_on_map.get(d) == qid)
+
+    def __preferredQueue(self, task):
+        """
+        Return the available queue preferred by @task, or None if @task has
+        no preference.
+        """
+        if not self.uses_affinity_hint or not task.affinity_hint:
+            return None
+        weights = dict()
+        for d, weight in task.affinity_hint:
+            qid = self.executed_on_map.get(d)
+            if qid in self.available_queues:
+                weights[qid] = weights.get(qid, 0) + weight
+        if len(weights) == 0:
+            return None
+        return max(weights, key = lambda qid: weights[qid])
+
+    def __popWaitingTask(self, qid):
+        """
+        Pop a task from @waiting_queue to be allocated on the queue @qid. It's
+        the task preferring @qid most among first @locality_window tasks, or
+        the first task.
+        """
+        if not self.uses_affinity_hint:
+            return self.waiting_queue.popleft()
+        best_index, best_affinity = 0, 0
+        for index in range(min(self.locality_window, len(self.waiting_queue))):
+            affinity = self.__affinity(self.waiting_queue[index][0], qid)
+            if affinity > best_affinity:
+                best_index, best_affinity = index, affinity
+        task_info = self.waiting_queue[best_index]
+        del self.waiting_queue[best_index]
+        return task_info
 
     def __startQueueConsumers(self):
         self.available_queues = set(range(self.num_threads))
         self.threads = []
         self.waiting_queue = collections.deque()
         self.allocated_on_map = dict()
+        # Map from the id of an executed task (see
+        # AbstractTask.getExecutedTaskIds) to the queue it was allocated on,
+        # in this run.
+        self.executed_on_map = dict()
         self.queues = list(queue.Queue() for i in range(self.num_threads))
         for qid in range(self.num_threads):
             new_thread = threading.Thread(
                 target = self.__queueConsumer,
-                args = (self.queues[qid],),
+                args = (qid, self.queues[qid]),
                 daemon=self.daemon_thread)
             new_thread.start()
             self.threads.append(new_thread)
 
-    def __queueConsumer(self, queue_object):
+    def __queueConsumer(self, worker_id, queue_object):
         """
         Continue to consume and execute tasks from @queue_object forever until
         a 'None' entry is received.
         """
+        worker_context, init_error = createWorkerContext(
+            worker_id, self.worker_initializer)
         while True:
             task_info = queue_object.get()
             if task_info is None:
               break
             (task, on_complete_callback, args, kwargs) = task_info
-            try:
-                task.setResult(task.run(*args, **kwargs))
-                on_complete_callback(task, TaskStatus.SUCCESS)
-            except Exception as e:
-                task.setError(traceback.format_exc())
-                on_complete_callback(task, TaskStatus.FAILURE)
+            if init_error is not None:
+                failTask(task, on_complete_callback, init_error)
+                continue
+            executeTask(task, on_complete_callback, args, kwargs,
+                        worker_context)
+        if self.worker_finalizer is not None and init_error is None:
+            self.worker_finalizer(worker_context)
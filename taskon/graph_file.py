@@ -0,0 +1,289 @@
+import copy
+import mmap
+import os
+import pickle
+import struct
+import zlib
+
+from taskon.common import TaskonError
+from taskon.common import TaskonFatalError
+from taskon.common import Object
+from taskon.utils import cycleDetection
+from taskon.utils import topologicalOrder
+
+MAGIC = b"TASKONGF"
+FORMAT_VERSION = 1
+
+# magic, version, num_tasks, num_targets, records_offset, names_offset,
+# file_size, crc32 of the preceding fields and the target ids.
+HEADER = struct.Struct("<8sIIIQQQI")
+# data_offset, name_size, num_deps, num_lazy_deps, num_stream_deps,
+# spec_size, crc32 of the spec, crc32 of the preceding fields and the data
+# before the spec.
+RECORD = struct.Struct("<QIIIIIII")
+TASK_ID = struct.Struct("<I")
+# (dependency task id, max_size) of a stream dependency.
+STREAM_DEP = struct.Struct("<II")
+
+
+class LoadedGraph:
+    """
+    Tasks loaded from a GraphFile, along with their preprocessed dependency
+    graph. Task ids are indices in @tasks, which is in a topological order.
+    TaskRunner takes it in place of the list of tasks and skips the
+    preprocessing and validation of the graph.
+    """
+    def __init__(self, tasks, target_tasks, dependency_graph,
+                 lazy_dependency_graph, stream_dependency_graph):
+        self.tasks = tasks
+        self.target_tasks = target_tasks
+        self.dependency_graph = dependency_graph
+        self.lazy_dependency_graph = lazy_dependency_graph
+        self.stream_dependency_graph = stream_dependency_graph
+
+
+class GraphFile:
+    """
+    A compact binary file of a preprocessed task graph (task names,
+    dependency edges, topological order and pickled tasks), for the graphs
+    which take longer to construct and validate than to execute.
+
+    'save' writes the graph of a TaskRunner. 'load' maps the file in memory
+    and reads only the records of the tasks reachable from the requested
+    target tasks, hence the load time depends on the tasks to be scheduled,
+    not on the size of the saved graph. Task ids in the file are assigned in
+    a topological order, and the names are indexed for binary search.
+
+    The header (with format version) and each task record are protected by
+    a crc32 checksum, verified when they are read. Corrupt, truncated or
+    incompatible files raise TaskonError, the caller can rebuild the graph
+    from scratch then.
+    Tasks are unpickled at loading, hence load only the trusted files.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def save(self, task_runner):
+        """
+        Write the graph of all the tasks of @task_runner, with its target
+        tasks as the default targets. Tasks must be picklable, they are saved
+        in the reset state, without the results of previous runs.
+        """
+        task_runner.validate()
+        tasks_map = task_runner.tasks_map
+        edge_func = lambda task_id: (
+            task_runner.dependency_graph[task_id] |
+            task_runner.lazy_dependency_graph.get(task_id, set()))
+        order = topologicalOrder(list(tasks_map.keys()), edge_func)
+        if len(order) < len(tasks_map):
+            cycle_path = cycleDetection(tasks_map.keys(),
+                                        edge_func).cycle_path
+            raise TaskonFatalError(
+                "Cyclic dependency in tasks: %s, graph can't be saved." %
+                " -> ".join(str(tasks_map[i].name) for i in cycle_path))
+        new_ids = dict((task_id, i) for i, task_id in enumerate(order))
+        # Names are indexed as strings, eg: for the integer names.
+        names = dict((task_id, str(task.name).encode("utf-8"))
+                     for task_id, task in tasks_map.items())
+        if len(set(names.values())) < len(names):
+            raise TaskonFatalError(
+                "Task names are not unique as strings, graph can't be "
+                "saved.")
+        targets = b"".join(TASK_ID.pack(new_ids[i])
+                           for i in sorted(task_runner.target_tasks))
+        names_index = b"".join(TASK_ID.pack(i) for i in sorted(
+            range(len(order)), key=lambda i: names[order[i]]))
+        records_offset = HEADER.size + len(targets)
+        names_offset = records_offset + RECORD.size * len(order)
+        offset = names_offset + len(names_index)
+        records, blocks = [], []
+        for task_id in order:
+            task = tasks_map[task_id]
+            name = names[task_id]
+            deps = sorted(new_ids[d]
+                          for d in task_runner.dependency_graph[task_id])
+            lazy_deps = sorted(
+                new_ids[d]
+                for d in task_runner.lazy_dependency_graph.get(task_id, ()))
+            streams = task_runner.stream_dependency_graph.get(task_id, {})
+            stream_deps = sorted((new_ids[d], max_size)
+                                 for d, max_size in streams.items())
+            data = b"".join(
+                [name] + list(TASK_ID.pack(d) for d in deps + lazy_deps) +
+                list(STREAM_DEP.pack(*s) for s in stream_deps))
+            spec = self.__serializeTask(task)
+            fields = (offset, len(name), len(deps), len(lazy_deps),
+                      len(stream_deps), len(spec), zlib.crc32(spec))
+            records.append(RECORD.pack(*fields, recordCrc(fields, data)))
+            blocks.append(data)
+            blocks.append(spec)
+            offset += len(data) + len(spec)
+        fields = (MAGIC, FORMAT_VERSION, len(order),
+                  len(task_runner.target_tasks), records_offset, names_offset,
+                  offset)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(*fields, headerCrc(fields, targets)))
+            f.write(targets)
+            f.write(b"".join(records))
+            f.write(names_index)
+            f.write(b"".join(blocks))
+        os.replace(temp_path, self.path)
+
+    def __serializeTask(self, task):
+        task_copy = copy.copy(task)
+        task_copy.reset()
+        task_copy.id = None
+        task_copy.cost_estimate = None
+        task_copy.affinity_hint = None
+        try:
+            return pickle.dumps(task_copy)
+        except Exception as error:
+            raise TaskonFatalError("Task '%s' can't be saved in a graph file: "
+                                   "%s" % (task.name, error))
+
+    def load(self, target_names=None):
+        """
+        Return the LoadedGraph of the tasks named @target_names (default:
+        the target tasks of the saved TaskRunner) and the tasks they depend
+        on, directly or via LazyTaskResult placeholders. Tasks are found by
+        the string of their names.
+        """
+        with open(self.path, "rb") as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise TaskonError("Graph file '%s' is empty." % self.path)
+        try:
+            return self.__load(buffer, target_names)
+        finally:
+            buffer.close()
+
+    def __load(self, buffer, target_names):
+        header = self.__readHeader(buffer)
+        if target_names is None:
+            targets = list(self.__readTaskId(buffer, HEADER.size, i)
+                           for i in range(header.num_targets))
+        else:
+            targets = list(self.__findTask(buffer, header, name)
+                           for name in target_names)
+        records = dict()
+        stack = list(targets)
+        while len(stack) > 0:
+            task_id = stack.pop()
+            if task_id in records:
+                continue
+            records[task_id] = self.__readRecord(buffer, header, task_id)
+            stack.extend(records[task_id].deps)
+            stack.extend(records[task_id].lazy_deps)
+        # Ids in the file are in a topological order, so are the new ids.
+        new_ids = dict((task_id, i)
+                       for i, task_id in enumerate(sorted(records)))
+        tasks = []
+        dependency_graph = dict()
+        lazy_dependency_graph = dict()
+        stream_dependency_graph = dict()
+        for task_id, new_id in new_ids.items():
+            record = records[task_id]
+            tasks.append(self.__readTask(buffer, record))
+            dependency_graph[new_id] = set(new_ids[d] for d in record.deps)
+            if len(record.lazy_deps) > 0:
+                lazy_dependency_graph[new_id] = set(
+                    new_ids[d] for d in record.lazy_deps)
+            if len(record.stream_deps) > 0:
+                stream_dependency_graph[new_id] = dict(
+                    (new_ids[d], max_size)
+                    for d, max_size in record.stream_deps)
+        return LoadedGraph(tasks, list(tasks[new_ids[i]] for i in targets),
+                           dependency_graph, lazy_dependency_graph,
+                           stream_dependency_graph)
+
+    def __corrupt(self, reason):
+        return TaskonError("Graph file '%s' is corrupt or stale: %s." %
+                           (self.path, reason))
+
+    def __readHeader(self, buffer):
+        if len(buffer) < HEADER.size:
+            raise self.__corrupt("truncated header")
+        fields = HEADER.unpack_from(buffer, 0)
+        if fields[0] != MAGIC:
+            raise self.__corrupt("not a taskon graph file")
+        if fields[1] != FORMAT_VERSION:
+            raise self.__corrupt("format version %s, expected %s" %
+                                 (fields[1], FORMAT_VERSION))
+        header = Object(num_tasks=fields[2], num_targets=fields[3],
+                        records_offset=fields[4], names_offset=fields[5],
+                        file_size=fields[6])
+        if header.file_size != len(buffer):
+            raise self.__corrupt("file size %s, expected %s" %
+                                 (len(buffer), header.file_size))
+        targets = buffer[HEADER.size:header.records_offset]
+        if (header.records_offset > header.names_offset or
+                fields[-1] != headerCrc(fields[:-1], targets)):
+            raise self.__corrupt("header checksum mismatch")
+        return header
+
+    def __readTaskId(self, buffer, offset, index):
+        return TASK_ID.unpack_from(buffer, offset + index * TASK_ID.size)[0]
+
+    def __readRecord(self, buffer, header, task_id):
+        if task_id >= header.num_tasks:
+            raise self.__corrupt("invalid task id %s" % task_id)
+        fields = RECORD.unpack_from(
+            buffer, header.records_offset + task_id * RECORD.size)
+        (offset, name_size, num_deps, num_lazy_deps, num_stream_deps,
+         spec_size, spec_crc, crc) = fields
+        data_size = (name_size + TASK_ID.size * (num_deps + num_lazy_deps) +
+                     STREAM_DEP.size * num_stream_deps)
+        data = buffer[offset:offset + data_size]
+        if (offset + data_size + spec_size > header.file_size or
+                crc != recordCrc(fields[:-1], data)):
+            raise self.__corrupt("checksum mismatch of task %s" % task_id)
+        deps = list(TASK_ID.unpack_from(data, name_size + i * TASK_ID.size)[0]
+                    for i in range(num_deps + num_lazy_deps))
+        stream_offset = name_size + TASK_ID.size * len(deps)
+        return Object(
+            name=data[:name_size].decode("utf-8"),
+            deps=deps[:num_deps], lazy_deps=deps[num_deps:],
+            stream_deps=list(STREAM_DEP.unpack_from(
+                data, stream_offset + i * STREAM_DEP.size)
+                             for i in range(num_stream_deps)),
+            spec_offset=offset + data_size, spec_size=spec_size,
+            spec_crc=spec_crc)
+
+    def __readTask(self, buffer, record):
+        spec = buffer[record.spec_offset:
+                           record.spec_offset + record.spec_size]
+        if zlib.crc32(spec) != record.spec_crc:
+            raise self.__corrupt("checksum mismatch of task '%s'" %
+                                 record.name)
+        try:
+            return pickle.loads(spec)
+        except Exception as error:
+            raise self.__corrupt("task '%s' can't be unpickled (%s)" %
+                                 (record.name, error))
+
+    def __findTask(self, buffer, header, name):
+        """Binary search of the task named @name in the names index."""
+        key = str(name).encode("utf-8")
+        low, high = 0, header.num_tasks
+        while low < high:
+            middle = (low + high) // 2
+            task_id = self.__readTaskId(buffer, header.names_offset, middle)
+            task_name = self.__readRecord(buffer, header,
+                                          task_id).name.encode("utf-8")
+            if task_name == key:
+                return task_id
+            if task_name < key:
+                low = middle + 1
+            else:
+                high = middle
+        raise TaskonError("Invalid task '%s', not found in graph file '%s'." %
+                          (name, self.path))
+
+
+def headerCrc(fields, targets):
+    return zlib.crc32(targets, zlib.crc32(HEADER.pack(*fields, 0)[:-4]))
+
+def recordCrc(fields, data):
+    return zlib.crc32(data, zlib.crc32(RECORD.pack(*fields, 0)[:-4]))
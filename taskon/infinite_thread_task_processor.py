@@ -1,11 +1,7 @@
-import traceback
-import collections
-import queue
 import threading
 
-from taskon.common import TaskStatus
-from taskon.common import taskonAssert
 from taskon.abstract_task_processor import AbstractTaskProcessor
+from taskon.abstract_task_processor import executeTask
 
 class InfiniteThreadTaskProcessor(AbstractTaskProcessor):
     """
@@ -14,8 +10,12 @@ class InfiniteThreadTaskProcessor(AbstractTaskProcessor):
     """
     def __init__(self):
         self.threads_map = dict()
+        # Tasks whose thread is created, but not yet started the execution.
+        self.pending_tasks = dict()
+        self.lock = threading.Lock()
 
     def process(self, task, on_complete_callback, *args, **kwargs):
+        self.pending_tasks[task.id] = task
         new_thread = threading.Thread(
             target = self.__runTask,
             args = (task, on_complete_callback, args, kwargs),
@@ -27,10 +27,17 @@ class InfiniteThreadTaskProcessor(AbstractTaskProcessor):
         thread = self.threads_map.pop(task.id)
         thread.join()
 
+    def cancel(self):
+        """Drop the tasks whose thread has not yet started the execution."""
+        with self.lock:
+            dropped_tasks = list(self.pending_tasks.values())
+            self.pending_tasks.clear()
+        for task in dropped_tasks:
+            del self.threads_map[task.id]
+        return dropped_tasks
+
     def __runTask(self, task, on_complete_callback, args, kwargs):
-        try:
-            task.setResult(task.run(*args, **kwargs))
-            on_complete_callback(task, TaskStatus.SUCCESS)
-        except Exception as e:
-            task.setError(traceback.format_exc())
-            on_complete_callback(task, TaskStatus.FAILURE)
+        with self.lock:
+            if self.pending_tasks.pop(task.id, None) is None:
+                return # Cancelled.
+        executeTask(task, on_complete_callback, args, kwargs)
@@ -0,0 +1,193 @@
+import collections
+import os
+import time
+
+from taskon.common import taskonAssert
+
+def processMemory(include_children=True):
+    """
+    Return the resident memory (RSS, in bytes) of this process, plus the
+    resident memory of all its descendant processes (eg: the commands of
+    BashCommandTask) if @include_children. Return None if it can't be
+    measured, i.e. /proc is not available.
+    """
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    def rss(pid):
+        try:
+            with open("/proc/%s/statm" % pid) as f:
+                return int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            return 0
+    if not os.path.exists("/proc/self/statm"):
+        return None
+    total = rss("self")
+    if not include_children:
+        return total
+    children = dict()
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/%s/stat" % entry) as f:
+                # The command name (2nd field) may have spaces.
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    stack = list(children.get(os.getpid(), []))
+    while len(stack) > 0:
+        pid = stack.pop()
+        total += rss(pid)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class MemoryBudget:
+    """
+    Memory aware admission of the ready tasks, to keep the memory usage of a
+    run within @budget bytes. A ready task is dispatched to task processor
+    only if its estimated peak memory fits in the @budget, along with the
+    larger of the current usage and the usage at the start plus the
+    estimates of the tasks in progress. Otherwise it's held in the task
+    scheduler (not occupying any worker), and dispatched when the tasks
+    complete or the usage drops.
+    Held tasks are dispatched in FIFO order, and a task is always dispatched
+    if nothing else is in progress, even if it doesn't fit.
+
+    Current usage is the RSS of the process and of its child processes (see
+    processMemory), measured at most once per @poll_interval seconds.
+    @usage_func - A function returning the current usage in bytes, in place
+                  of processMemory. Eg: to watch a cgroup.
+
+    The peak memory estimate of a task is, in the order of preference:
+        1. The largest task.peak_memory of the earlier completions of the
+           same task, or of the tasks with the same action identity (see
+           AbstractTask.getActionIdentity), learned by this object across
+           runs.
+        2. The peak memory recorded in task.cost_estimate (see RuntimeStore).
+        3. @default_estimate bytes.
+    task.peak_memory is measured only while tracemalloc is tracing, which
+    TaskRunner does if @track_memory is True. Memory of child processes is
+    not measured per task, but counts in the current usage.
+    The tasks having a non-zero estimate are never fused (see TaskFusion),
+    since the chain successors of a FusedTask don't go through admission.
+    """
+    def __init__(self, budget, default_estimate=0, poll_interval=0.05,
+                 include_children=True, track_memory=False, usage_func=None):
+        taskonAssert(budget > 0, "budget should be positive number")
+        self.budget = budget
+        self.default_estimate = default_estimate
+        self.poll_interval = poll_interval
+        self.track_memory = track_memory
+        self.usage_func = usage_func or (
+            lambda: processMemory(include_children))
+        # Learned peak memory of tasks, by task name and by action identity.
+        self.task_peaks = dict()
+        self.action_peaks = dict()
+
+    def prepare(self, tasks):
+        """Called by task scheduler before the start of scheduling."""
+        self.held_tasks = collections.deque()
+        self.num_held_tasks = 0
+        self.num_delayed_tasks = 0
+        # Map from the id of tasks in progress to their estimates.
+        self.reserved = dict()
+        self.total_reserved = 0
+        self.last_sample_time = None
+        self.usage = None
+        self.peak_usage = 0
+        self.base_usage = self.__currentUsage() or 0
+
+    def estimate(self, task):
+        """Return the estimated peak memory of @task, in bytes."""
+        if task.name in self.task_peaks:
+            return self.task_peaks[task.name]
+        action = task.getActionIdentity()
+        if action in self.action_peaks:
+            return self.action_peaks[action]
+        if (task.cost_estimate is not None and
+                task.cost_estimate.peak_memory is not None):
+            return task.cost_estimate.peak_memory
+        return self.default_estimate
+
+    def admit(self, tasks):
+        """
+        Return the list of ready @tasks which can be dispatched now. Others
+        are held, to be returned by 'release' later.
+        """
+        admitted = []
+        for task in tasks:
+            if len(self.held_tasks) == 0 and self.__reserve(task):
+                admitted.append(task)
+                continue
+            self.held_tasks.append(task)
+            self.num_held_tasks += 1
+            self.num_delayed_tasks += 1
+        return admitted
+
+    def release(self):
+        """Return the list of held tasks which can be dispatched now."""
+        released = []
+        while len(self.held_tasks) > 0 and self.__reserve(self.held_tasks[0]):
+            released.append(self.held_tasks.popleft())
+        self.num_held_tasks -= len(released)
+        return released
+
+    def drain(self):
+        """Return and forget all the held tasks."""
+        drained = list(self.held_tasks)
+        self.held_tasks.clear()
+        self.num_held_tasks = 0
+        return drained
+
+    def nextReleaseDelay(self):
+        """
+        Return the seconds after which the usage should be checked again for
+        the held tasks, or None if there is no held task.
+        """
+        if self.num_held_tasks == 0:
+            return None
+        return self.poll_interval
+
+    def onComplete(self, task):
+        """
+        Called by task scheduler when @task is complete. Free its
+        reservation and learn its peak memory.
+        """
+        self.total_reserved -= self.reserved.pop(task.id, 0)
+        if task.peak_memory is not None:
+            action = task.getActionIdentity()
+            self.task_peaks[task.name] = max(
+                self.task_peaks.get(task.name, 0), task.peak_memory)
+            self.action_peaks[action] = max(self.action_peaks.get(action, 0),
+                                            task.peak_memory)
+
+    def __reserve(self, task):
+        """
+        Reserve the estimated memory of @task, if it fits.
+        The estimates are heap peaks (tracemalloc) while the usage is RSS.
+        A task allocating N bytes of heap grows the RSS by about N bytes
+        (more with the allocator overhead, and the RSS is slow to shrink
+        after frees), so the usage at the start plus the reservations is a
+        lower bound of the usage. Taking the larger of that and the
+        measured usage covers what the estimates miss.
+        """
+        estimate = self.estimate(task)
+        if len(self.reserved) > 0:
+            usage = max(self.__currentUsage() or 0,
+                        self.base_usage + self.total_reserved)
+            if usage + estimate > self.budget:
+                return False
+        self.reserved[task.id] = estimate
+        self.total_reserved += estimate
+        return True
+
+    def __currentUsage(self):
+        now = time.monotonic()
+        if (self.last_sample_time is None or
+                now - self.last_sample_time >= self.poll_interval):
+            self.usage = self.usage_func()
+            self.last_sample_time = now
+            if self.usage is not None:
+                self.peak_usage = max(self.peak_usage, self.usage)
+        return self.usage
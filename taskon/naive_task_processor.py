@@ -1,13 +1,34 @@
-import traceback
-
-from taskon.common import TaskStatus
 from taskon.abstract_task_processor import AbstractTaskProcessor
+from taskon.abstract_task_processor import executeTask
+from taskon.abstract_task_processor import createWorkerContext
+from taskon.abstract_task_processor import failTask
 
 class NaiveTaskProcessor(AbstractTaskProcessor):
+    """
+    Executes tasks in the calling thread, which is its only worker.
+    @worker_initializer and @worker_finalizer are the same as in
+    FiniteThreadTaskProcessor.
+    """
+    def __init__(self, worker_initializer=None, worker_finalizer=None):
+        self.worker_initializer = worker_initializer
+        self.worker_finalizer = worker_finalizer
+        self.worker_context = None
+
     def process(self, task, on_complete_callback, *args, **kwargs):
-        try:
-            task.setResult(task.run(*args, **kwargs))
-            on_complete_callback(task, TaskStatus.SUCCESS)
-        except Exception:
-            task.setError(traceback.format_exc())
-            on_complete_callback(task, TaskStatus.FAILURE)
+        if self.worker_context is None:
+            self.worker_context, self.init_error = createWorkerContext(
+                0, self.worker_initializer)
+        if self.init_error is not None:
+            failTask(task, on_complete_callback, self.init_error)
+            return
+        executeTask(task, on_complete_callback, args, kwargs,
+                    self.worker_context)
+
+    def getNumWorkers(self):
+        return 1
+
+    def close(self):
+        if self.worker_context is not None:
+            if self.worker_finalizer is not None and self.init_error is None:
+                self.worker_finalizer(self.worker_context)
+            self.worker_context = None
@@ -0,0 +1,148 @@
+import collections
+import time
+
+from taskon.common import TaskonFatalError
+from taskon.common import taskonAssert
+
+
+class TokenBucket:
+    """
+    Token bucket of a rate limited resource. The bucket holds at most @burst
+    tokens and is refilled at @rate tokens per second.
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_time = None
+
+    def refill(self, now):
+        if self.last_time is not None:
+            self.tokens = min(self.burst,
+                              self.tokens + (now - self.last_time) * self.rate)
+        self.last_time = now
+
+    def delay(self, tokens):
+        """Seconds to wait until the bucket has @tokens, since last refill."""
+        return max(0, (tokens - self.tokens) / self.rate)
+
+
+class RateLimiting:
+    """
+    Rate limiting of named external resources (eg: a third party API), to
+    pace the dispatch of tasks using them. Tasks declare the resources they
+    use in `task.rate_limited_resources`, a map from resource name to the
+    number of tokens one execution uses.
+
+    @limits - A map from resource name to (rate, burst): at most @burst
+              tokens can be used at once, refilled at @rate tokens per
+              second.
+
+    A ready task is dispatched to task processor only when the token buckets
+    of all of its resources have enough tokens. Otherwise it's held in the
+    task scheduler (not occupying any worker), and dispatched as soon as the
+    tokens are refilled. Held tasks using the same set of resources are
+    dispatched in FIFO order. The tasks using rate limited resources are
+    never fused (see TaskFusion), since the chain successors of a FusedTask
+    don't go through admission.
+    """
+    def __init__(self, limits):
+        for name, (rate, burst) in limits.items():
+            taskonAssert(rate > 0 and burst > 0,
+                         "Invalid rate limit of resource '%s'" % name)
+        self.limits = dict(limits)
+
+    def prepare(self, tasks):
+        """
+        Called by task scheduler before the start of scheduling, with the
+        effective @tasks. Raise TaskonFatalError if a task uses an unknown
+        resource, or more tokens than the burst of a resource.
+        """
+        for task in tasks:
+            for name, tokens in task.rate_limited_resources.items():
+                if name not in self.limits:
+                    raise TaskonFatalError(
+                        "Task '%s' uses unknown rate limited resource '%s'."
+                        % (task.name, name))
+                if tokens > self.limits[name][1]:
+                    raise TaskonFatalError(
+                        "Task '%s' uses %s tokens of resource '%s', more than "
+                        "its burst." % (task.name, tokens, name))
+        self.buckets = dict((name, TokenBucket(rate, burst))
+                            for name, (rate, burst) in self.limits.items())
+        # Map from the sorted tuple of resource names to the deque of tasks
+        # held for them.
+        self.held_tasks = collections.OrderedDict()
+        self.num_held_tasks = 0
+        self.num_delayed_tasks = 0
+
+    def admit(self, tasks):
+        """
+        Return the list of ready @tasks which can be dispatched now. Others
+        are held, to be returned by 'release' later.
+        """
+        now = time.monotonic()
+        admitted = []
+        for task in tasks:
+            resources = task.rate_limited_resources
+            if len(resources) == 0:
+                admitted.append(task)
+                continue
+            key = tuple(sorted(resources))
+            if key not in self.held_tasks and self.__acquire(resources, now):
+                admitted.append(task)
+                continue
+            self.held_tasks.setdefault(key, collections.deque()).append(task)
+            self.num_held_tasks += 1
+            self.num_delayed_tasks += 1
+        return admitted
+
+    def release(self):
+        """Return the list of held tasks which can be dispatched now."""
+        now = time.monotonic()
+        released = []
+        for key, tasks in list(self.held_tasks.items()):
+            while (len(tasks) > 0 and
+                    self.__acquire(tasks[0].rate_limited_resources, now)):
+                released.append(tasks.popleft())
+            if len(tasks) == 0:
+                del self.held_tasks[key]
+        self.num_held_tasks -= len(released)
+        return released
+
+    def drain(self):
+        """Return and forget all the held tasks."""
+        drained = list(task for tasks in self.held_tasks.values()
+                       for task in tasks)
+        self.held_tasks = collections.OrderedDict()
+        self.num_held_tasks = 0
+        return drained
+
+    def nextReleaseDelay(self):
+        """
+        Return the seconds after which some held task can be dispatched, or
+        None if there is no held task.
+        """
+        if self.num_held_tasks == 0:
+            return None
+        now = time.monotonic()
+        delays = []
+        for tasks in self.held_tasks.values():
+            delay = 0
+            for name, tokens in tasks[0].rate_limited_resources.items():
+                self.buckets[name].refill(now)
+                delay = max(delay, self.buckets[name].delay(tokens))
+            delays.append(delay)
+        return min(delays)
+
+    def __acquire(self, resources, now):
+        """Take the tokens of @resources if all are available."""
+        for name, tokens in resources.items():
+            bucket = self.buckets[name]
+            bucket.refill(now)
+            # Tolerate the rounding errors of refill.
+            if bucket.tokens + 1e-9 < tokens:
+                return False
+        for name, tokens in resources.items():
+            self.buckets[name].tokens -= tokens
+        return True
@@ -0,0 +1,89 @@
+from taskon.common import taskonAssert
+from taskon.abstract_task_processor import AbstractTaskProcessor
+from taskon.task_fusion import FusedTask
+
+class RoutingTaskProcessor(AbstractTaskProcessor):
+    """
+    A composite task processor, which dispatches each task to one of several
+    child task processors, so that each class of tasks runs on the processor
+    suited for it. Eg: CPU heavy tasks on a small FiniteThreadTaskProcessor
+    and I/O bound tasks on a large one.
+
+    @routes - List of (selector, task_processor). A task is dispatched to the
+              processor of the first matching selector. A selector can be:
+                1. A class: matches the tasks which are instances of it.
+                2. A string: matches the tasks having it in task.tags.
+                3. A function: matches the tasks for which it returns True.
+    @default_processor - Processor for the tasks not matching any selector.
+
+    All the APIs of task processor contract are fanned out to the child
+    processors correctly. A child processor shared by multiple routes is
+    closed once. A FusedTask is routed as its member tasks, which have the
+    same route (see getRouteKey).
+    """
+    def __init__(self, routes, default_processor):
+        self.routes = list(routes)
+        self.default_processor = default_processor
+        self.processors = []
+        for processor in ([p for _, p in self.routes] + [default_processor]):
+            taskonAssert(isinstance(processor, AbstractTaskProcessor),
+                         "Expected AbstractTaskProcessor in routes")
+            if all(processor is not p for p in self.processors):
+                self.processors.append(processor)
+        self.uses_affinity_hint = any(p.uses_affinity_hint
+                                      for p in self.processors)
+        # Map from the id of a task in progress to its processor.
+        self.routed = dict()
+
+    def route(self, task):
+        """Return the child processor for @task."""
+        if isinstance(task, FusedTask):
+            return self.route(task.members[0])
+        for selector, processor in self.routes:
+            if isinstance(selector, type):
+                matched = isinstance(task, selector)
+            elif isinstance(selector, str):
+                matched = selector in task.tags
+            else:
+                matched = selector(task)
+            if matched:
+                return processor
+        return self.default_processor
+
+    def getRouteKey(self, task):
+        processor = self.route(task)
+        return (id(processor), processor.getRouteKey(task))
+
+    def process(self, task, on_complete_callback, *args, **kwargs):
+        processor = self.route(task)
+        self.routed[task.id] = processor
+        processor.process(task, on_complete_callback, *args, **kwargs)
+
+    def onComplete(self, task):
+        self.routed.pop(task.id).onComplete(task)
+
+    def getNumWorkers(self):
+        # Like getNumIdleWorkers.
+        if len(self.processors) > 1:
+            return None
+        return self.processors[0].getNumWorkers()
+
+    def getNumIdleWorkers(self):
+        # Idle workers of a child processor can't execute the tasks routed
+        # to others, hence the total is meaningful only for a single child.
+        if len(self.processors) > 1:
+            return None
+        return self.processors[0].getNumIdleWorkers()
+
+    def cancel(self):
+        dropped_tasks = []
+        for processor in self.processors:
+            for task in processor.cancel():
+                del self.routed[task.id]
+                dropped_tasks.append(task)
+        return dropped_tasks
+
+    def close(self):
+        for processor in self.processors:
+            processor.close()
+        self.routed = dict()
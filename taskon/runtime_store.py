@@ -0,0 +1,102 @@
+import json
+import os
+import pickle
+import sys
+
+from taskon.common import Object
+
+def resultSize(result):
+    """
+    Return the approximate size (in bytes) of a task result. Pickled size is
+    used when the result is picklable, otherwise the shallow in-memory size.
+    """
+    try:
+        return len(pickle.dumps(result))
+    except Exception:
+        return sys.getsizeof(result)
+
+
+class RuntimeStore:
+    """
+    A local, append-only store of the historical runtime of tasks. Each time a
+    task completes successfully, TaskRunner records its duration, peak memory
+    and result size here. The store aggregates the records of all the
+    previous runs into per-task cost estimates, which TaskRunner exposes back
+    as @task.cost_estimate, to be used by schedulers and task processors.
+
+    Records are appended to the file @path as one json object per line, so the
+    same file can be shared by successive runs of the same graph. Lines which
+    can't be parsed (eg: partially written line of a crashed run) are ignored.
+
+    @key_func - A function that takes a task and returns the key under which
+                the runtime of the task is recorded. Default is the task name.
+                Use `lambda task: task.getActionIdentity()` to share the
+                estimates among the tasks performing the same action.
+    @track_memory - Whether TaskRunner should trace the memory allocations
+                    using tracemalloc, to record the peak memory of tasks.
+                    Tracing slows down the execution of tasks noticeably.
+    """
+    def __init__(self, path, key_func=None, track_memory=False):
+        self.path = path
+        self.key_func = key_func or (lambda task: str(task.name))
+        self.track_memory = track_memory
+        self.stats = dict()
+        if os.path.exists(path):
+            with open(path) as fd:
+                for line in fd:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.__aggregate(record)
+
+    def __aggregate(self, record):
+        if record["key"] not in self.stats:
+            self.stats[record["key"]] = Object(
+                num_samples=0, total_duration=0, peak_memory=None,
+                total_result_size=0)
+        stats = self.stats[record["key"]]
+        stats.num_samples += 1
+        stats.total_duration += record["duration"]
+        stats.total_result_size += record["result_size"]
+        if record["peak_memory"] is not None:
+            stats.peak_memory = max(stats.peak_memory or 0,
+                                    record["peak_memory"])
+
+    def getEstimate(self, task):
+        """
+        Return the cost estimate of @task, aggregated over all its previous
+        runs. Return None if there is no record of @task.
+        The estimate is an Object with fields:
+            num_samples - number of previous runs recorded.
+            duration - mean duration in seconds.
+            peak_memory - max peak memory in bytes, None if never measured.
+            result_size - mean result size in bytes.
+        """
+        stats = self.stats.get(self.key_func(task))
+        if stats is None:
+            return None
+        return Object(num_samples=stats.num_samples,
+                      duration=stats.total_duration / stats.num_samples,
+                      peak_memory=stats.peak_memory,
+                      result_size=stats.total_result_size/stats.num_samples)
+
+    def record(self, tasks):
+        """
+        Record the runtime of the completed @tasks. Tasks whose duration was
+        not measured by the task processor are ignored.
+        """
+        lines = []
+        for task in tasks:
+            duration = task.getDuration()
+            if duration is None:
+                continue
+            record = dict(key=self.key_func(task),
+                          duration=duration,
+                          peak_memory=task.peak_memory,
+                          result_size=resultSize(task.getResult()))
+            self.__aggregate(record)
+            lines.append(json.dumps(record) + "\n")
+        if len(lines) > 0:
+            with open(self.path, "a") as fd:
+                fd.write("".join(lines))
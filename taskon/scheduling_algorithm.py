@@ -1,7 +1,14 @@
 import queue
+import threading
+import time
 
 from taskon.common import TaskStatus
+from taskon.common import TaskonError
+from taskon.common import TaskStream
 from taskon.abortable_task import AbortableTask
+from taskon.abstract_task_processor import executeTask
+from taskon.abstract_task_processor import currentWorkerContext
+from taskon.task_fusion import FusedTask
 
 class SchedulingAlgorithm:
     """
@@ -20,10 +27,12 @@ class SchedulingAlgorithm:
                         else: schedule the task P for execution.
     Step-3: We reached at step 3 either because execution of all scheduled
            tasks completed or the execution of a task failed. If there are
-           still pending tasks then abort them.
+           still pending tasks then abort them: drop the ones not yet started
+           by task processor and abort the running ones.
     Step-4: Calculate the skipped tasks and return.
     """
-    def __init__(self, task_processor, task_inputs_func, tasks_map, deps_func):
+    def __init__(self, task_processor, task_inputs_func, tasks_map, deps_func,
+                 stream_deps_func=None):
         """
         @task_processor - An implementation of task processor. Refer to
                           taskon/abstract_task_processor.py to know more.
@@ -44,53 +53,565 @@ class SchedulingAlgorithm:
                      For eg: a set of tasks (task id is hashable by default).
         @deps_func - A function that takes a task id and return a set of
                      dependency task ids.
+        @stream_deps_func - An optional function that takes a task id and
+                            return the map from the ids of dependency tasks
+                            whose output is streamed to the task, to the
+                            max_size of stream (see taskon.StreamTaskResult).
+                            These are included in @deps_func as well. A task
+                            becomes ready when its streamed dependencies are
+                            started, instead of completed.
         """
         self.task_processor = task_processor
         self.task_inputs_func = task_inputs_func
         self.tasks_map = tasks_map
         self.deps_func = deps_func
-
-    def run(self, effective_tasks, continue_on_failure=False):
-        """The main scheduling algorithm."""
+        self.stream_deps_func = stream_deps_func
         self.completion_updates_queue = queue.Queue()
-        self.tasks_in_progress = set()
-        incoming_edges, outgoing_edges = self.__createRuntimeGraph(
-            effective_tasks, self.deps_func)
-        for task_id in effective_tasks:
-            if len(incoming_edges[task_id]) == 0:
-                self.__processTask(self.tasks_map[task_id])
-        while len(self.tasks_in_progress) > 0:
-            task, status = self.completion_updates_queue.get() # Blocking step.
+        self.lock = threading.Lock()
+
+    def run(self, execution_plan, continue_on_failure=False,
+            task_fusion=None, task_speculation=None, task_deduplication=None,
+            rate_limiting=None, up_to_date_check=None, memory_budget=None,
+            deadline_scheduling=None):
+        """
+        The main scheduling algorithm.
+        @execution_plan - The taskon.ExecutionPlan of the effective tasks.
+                          Refer to taskon/execution_plan.py
+        @task_fusion - An optional taskon.TaskFusion, to execute the tiny tasks
+                       in batches. Refer to taskon/task_fusion.py
+        @task_speculation - An optional taskon.TaskSpeculation, to launch
+                            duplicate copies of stragglers. Refer to
+                            taskon/task_speculation.py
+        @task_deduplication - An optional taskon.TaskDeduplication, to reuse
+                              the results of identical pure tasks. Refer to
+                              taskon/task_deduplication.py
+        @rate_limiting - An optional taskon.RateLimiting, to pace the dispatch
+                         of tasks using rate limited resources. Refer to
+                         taskon/rate_limiting.py
+        @up_to_date_check - An optional taskon.UpToDateCheck, to skip the
+                            tasks whose output files are up to date. Refer
+                            to taskon/up_to_date_check.py
+        @memory_budget - An optional taskon.MemoryBudget, to hold the ready
+                         tasks while the memory usage is high. Refer to
+                         taskon/memory_budget.py
+        @deadline_scheduling - An optional taskon.DeadlineScheduling, to
+                               dispatch the ready tasks earliest deadline
+                               first. Refer to taskon/deadline_scheduling.py
+        """
+        self.tasks_in_progress = dict()
+        # Copies of speculated tasks which lost the race, but still running.
+        self.abandoned_tasks = dict()
+        self.task_fusion = task_fusion
+        self.task_speculation = task_speculation
+        self.task_deduplication = task_deduplication
+        self.rate_limiting = rate_limiting
+        self.up_to_date_check = up_to_date_check
+        self.memory_budget = memory_budget
+        self.deadline_scheduling = deadline_scheduling
+        # Deduplicated and up to date tasks which are complete without being
+        # processed.
+        self.reused_tasks = []
+        self.interrupt_error = None
+        # Ids for the tasks created by scheduler itself, eg: FusedTask.
+        self.next_task_id = len(self.tasks_map)
+        self.num_fused_tasks = 0
+        self.plan = execution_plan
+        # Number of dependencies of each task, which are not yet complete.
+        self.pending_deps = list(execution_plan.in_degree)
+        # Tasks pulled on demand via TaskFuture, in addition to the effective
+        # tasks, and the dependent pulled tasks of each task. See 'pull'
+        # method.
+        self.pulled_tasks = []
+        self.pulled_task_set = set()
+        self.pulled_successors = dict()
+        self.pending_pulls = dict()
+        # Map from the id of pulled tasks to the future of the pull which
+        # activated them, and the ids of tasks executed by the threads
+        # waiting on those futures. See TaskFuture.
+        self.pull_owners = dict()
+        self.borrowed_tasks = set()
+        self.thread_id = threading.get_ident()
+        self.finished = False
+        # Producers and consumers of streams, the streams created, and the
+        # (producer id, consumer id) dependencies relaxed at the start of
+        # producer.
+        self.streaming_tasks = set()
+        self.streams = []
+        self.relaxed_stream_deps = set()
+        if self.stream_deps_func is not None:
+            for task_id in execution_plan.effective_tasks:
+                producers = self.stream_deps_func(task_id)
+                if len(producers) > 0:
+                    self.streaming_tasks.add(task_id)
+                    self.streaming_tasks.update(producers)
+        if task_fusion is not None:
+            task_fusion.prepare(self.tasks_map, self.task_inputs_func,
+                                execution_plan,
+                                self.task_processor.getRouteKey)
+            # Tasks of a pipeline must run concurrently.
+            task_fusion.exclude(self.streaming_tasks)
+            # Chain successors are executed without going through the task
+            # scheduler, hence they would skip the rate limits and the memory
+            # budget.
+            if rate_limiting is not None:
+                task_fusion.exclude(set(
+                    task_id for task_id in execution_plan.effective_tasks
+                    if len(self.tasks_map[task_id].rate_limited_resources) >
+                    0))
+            if memory_budget is not None:
+                task_fusion.exclude(set(
+                    task_id for task_id in execution_plan.effective_tasks
+                    if memory_budget.estimate(self.tasks_map[task_id]) > 0))
+        if task_speculation is not None:
+            task_speculation.prepare()
+            self.last_speculation_time = time.time()
+        if task_deduplication is not None:
+            task_deduplication.prepare()
+        if up_to_date_check is not None:
+            up_to_date_check.prepare(self.deps_func)
+        if rate_limiting is not None:
+            rate_limiting.prepare(self.tasks_map[task_id]
+                                  for task_id in execution_plan.effective_tasks)
+        if memory_budget is not None:
+            memory_budget.prepare(self.tasks_map[task_id]
+                                  for task_id in self.plan.effective_tasks)
+        if deadline_scheduling is not None:
+            deadline_scheduling.prepare(self.tasks_map, execution_plan,
+                                        self.task_processor.getNumIdleWorkers)
+            # Tasks of a pipeline must run concurrently.
+            deadline_scheduling.exclude(self.streaming_tasks)
+        self.__processTasks(list(self.tasks_map[task_id]
+                                 for task_id in execution_plan.roots))
+        while (len(self.tasks_in_progress) > 0 or len(self.reused_tasks) > 0
+                or self.__numHeldTasks() > 0):
+            completed_tasks = self.reused_tasks
+            self.reused_tasks = []
+            if len(completed_tasks) == 0:
+                for task, status in self.__waitForCompletions():
+                    if task is None:
+                        status() # A function to be called in scheduler thread.
+                    else:
+                        completed_tasks.extend(
+                            self.__onCompletion(task, status))
+            for feature in [self.memory_budget, self.deadline_scheduling]:
+                if feature is not None:
+                    for task in completed_tasks:
+                        feature.onComplete(task)
+            if len(self.pending_pulls) > 0:
+                self.__resolvePulls(completed_tasks)
+            if self.interrupt_error is not None:
+                break
+            if not continue_on_failure and any(
+                    task.status != TaskStatus.SUCCESS
+                    for task in completed_tasks):
+                break
+            ready_tasks = []
+            pending_deps = self.pending_deps
+            for task in completed_tasks:
+                if task.status != TaskStatus.SUCCESS:
+                    continue
+                for d_task_id in self.__successors(task.id):
+                    if (len(self.relaxed_stream_deps) > 0 and
+                            (task.id, d_task_id) in self.relaxed_stream_deps):
+                        continue # Streamed dependency, see __processTask.
+                    pending_deps[d_task_id] -= 1
+                    if pending_deps[d_task_id] == 0:
+                        d_task = self.tasks_map[d_task_id]
+                        # Chain successors executed within a FusedTask are
+                        # already complete.
+                        if d_task.status == TaskStatus.SKIPPED:
+                            ready_tasks.append(d_task)
+            if self.__numHeldTasks() > 0:
+                # Held tasks were ready earlier, dispatch them first.
+                self.__dispatchTasks(self.__releaseHeldTasks())
+            self.__processTasks(ready_tasks)
+        if len(self.tasks_in_progress) > 0 or self.__numHeldTasks() > 0:
+            self.__cancelTasksInProgress()
+        self.task_processor.close()
+        self.__finish()
+        if self.interrupt_error is not None:
+            raise self.interrupt_error
+
+    def __cancelTasksInProgress(self):
+        """
+        Drop the tasks in progress which are not yet started by task
+        processor (or held for rate limits or memory), and abort the running
+        AbortableTasks. All of them are marked as TaskStatus.ABORTED, the
+        aborted ones only after they stop (unless they succeeded meanwhile).
+        Other running tasks can't be stopped, they are left as
+        TaskStatus.SKIPPED.
+        """
+        if self.__numHeldTasks() > 0:
+            for feature in [self.rate_limiting, self.memory_budget,
+                            self.deadline_scheduling]:
+                if feature is not None:
+                    for task in feature.drain():
+                        task.status = TaskStatus.ABORTED
+        for task in self.task_processor.cancel():
+            del self.tasks_in_progress[task.id]
+            if isinstance(task, FusedTask):
+                for member in task.members:
+                    member.status = TaskStatus.ABORTED
+            self.__originalTask(task).status = TaskStatus.ABORTED
+        aborted_tasks = dict()
+        for task in self.tasks_in_progress.values():
+            if isinstance(task, AbortableTask):
+                task.abort()
+                aborted_tasks[task.id] = task
+        # Requests (eg: pulls) received meanwhile are handled at finish.
+        deferred = []
+        while len(aborted_tasks) > 0:
+            task, status = self.completion_updates_queue.get()
+            if task is None:
+                deferred.append((task, status))
+                continue
+            if aborted_tasks.pop(task.id, None) is None:
+                continue
+            original_task = self.__originalTask(task)
+            if status == TaskStatus.SUCCESS and original_task is task:
+                task.status = status
+            else:
+                original_task.status = TaskStatus.ABORTED
+        for update in deferred:
+            self.completion_updates_queue.put(update)
+
+    def __originalTask(self, task):
+        """Return the original task of @task, if it's an attempt."""
+        if self.task_speculation is None:
+            return task
+        return self.task_speculation.originalTask(task)
+
+    def __finish(self):
+        """
+        Mark the scheduling finished. Fail the pending and late pulls, so that
+        the tasks blocked on them (if still running) can finish.
+        """
+        with self.lock:
+            self.finished = True
+        for stream in self.streams:
+            stream.detach()
+        while not self.completion_updates_queue.empty():
+            task, status = self.completion_updates_queue.get()
+            if task is None:
+                status()
+        for futures in self.pending_pulls.values():
+            for future in futures:
+                future.resolve(False)
+        self.pending_pulls = dict()
+
+    def __waitForCompletions(self):
+        """
+        Wait for the completion of tasks in progress, and return the list of
+        (task, status) completion updates. The list can be empty if task
+        speculation is enabled, or if tasks are held for rate limits or
+        memory.
+        """
+        timeout = None # Blocking.
+        if self.task_speculation is not None:
+            if (time.time() - self.last_speculation_time >
+                    self.task_speculation.check_interval):
+                self.__speculate()
+            timeout = self.task_speculation.check_interval
+        for feature in [self.rate_limiting, self.memory_budget]:
+            if feature is None:
+                continue
+            # Wake up when the next held task can be dispatched.
+            delay = feature.nextReleaseDelay()
+            if delay is not None:
+                timeout = delay if timeout is None else min(timeout, delay)
+        try:
+            completions = [self.completion_updates_queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        if self.task_fusion is not None:
+            # Drain all the available completions to make larger batches.
+            while not self.completion_updates_queue.empty():
+                completions.append(self.completion_updates_queue.get())
+        return completions
+
+    def __onCompletion(self, task, status):
+        """
+        Handle the completion update of a @task, which was processed by
+        task processor. Return the list of effective tasks completed now.
+        """
+        completed_tasks = self.__onProcessed(task, status)
+        if self.task_deduplication is not None:
+            for completed_task in list(completed_tasks):
+                completed_tasks.extend(
+                    self.task_deduplication.onComplete(completed_task))
+        if self.up_to_date_check is not None:
+            for completed_task in completed_tasks:
+                if completed_task.status == TaskStatus.SUCCESS:
+                    self.up_to_date_check.onComplete(completed_task)
+        if len(self.streaming_tasks) > 0:
+            for completed_task in completed_tasks:
+                if completed_task.id in self.streaming_tasks:
+                    self.__detachInputStreams(completed_task)
+        return completed_tasks
+
+    def __detachInputStreams(self, task):
+        """Let the producers streaming to the completed @task stop."""
+        for producer_id in self.stream_deps_func(task.id):
+            streams = self.tasks_map[producer_id].output_streams
+            if streams is not None and task.id in streams:
+                streams[task.id].detach()
+
+    def __onProcessed(self, task, status):
+        if task.id in self.abandoned_tasks:
+            # A losing attempt, executed on its own copy of the task.
+            del self.abandoned_tasks[task.id]
             task.status = status
             self.task_processor.onComplete(task)
-            self.tasks_in_progress.remove(task.id)
+            return []
+        task.status = status
+        if task.id in self.borrowed_tasks:
+            self.borrowed_tasks.remove(task.id)
+        else:
+            self.task_processor.onComplete(task)
+        del self.tasks_in_progress[task.id]
+        if isinstance(task, FusedTask):
+            for member, member_status in zip(task.members,
+                                             task.member_statuses):
+                member.status = member_status
+            return list(task.members)
+        if (self.task_speculation is not None and
+                self.task_speculation.isSpeculated(task)):
+            original_task, losers = self.task_speculation.onComplete(
+                task, self.tasks_in_progress)
+            for loser in losers:
+                self.abandoned_tasks[loser.id] = self.tasks_in_progress.pop(
+                    loser.id)
+            return [] if original_task is None else [original_task]
+        return [task]
+
+    def __speculate(self):
+        """Launch a duplicate copy of the stragglers in progress."""
+        self.last_speculation_time = time.time()
+        stragglers = self.task_speculation.findStragglers(
+            self.tasks_in_progress, self.task_processor.getNumIdleWorkers())
+        for task in stragglers:
+            task_copy = self.task_speculation.createCopy(
+                task, self.__newTaskId())
+            args, kwargs = self.task_inputs_func(task)
+            self.tasks_in_progress[task_copy.id] = task_copy
+            self.task_processor.process(
+                task_copy, self.__onCompleteCallback, *args, **kwargs)
+
+    def __newTaskId(self):
+        """Return a unique id for the tasks created by scheduler."""
+        self.next_task_id += 1
+        return self.next_task_id - 1
+
+    def interrupt(self, error):
+        """
+        Stop the scheduling of more tasks and make the 'run' method raise the
+        @error, after aborting the tasks in progress.
+        This method is thread safe, and can be called from any thread.
+        """
+        def setError():
+            self.interrupt_error = error
+        self.completion_updates_queue.put((None, setError))
+
+    def pull(self, task_id, future):
+        """
+        Request the execution of the task @task_id (along with its dependency
+        cover) and resolve the @future (a TaskFuture) when it's complete.
+        Used for LazyTaskResult placeholders. The task is executed only once,
+        even if pulled multiple times.
+        This method is thread safe, and should be called from the threads
+        executing the tasks. It must not be called from scheduler thread
+        (eg: NaiveTaskProcessor), because the caller would wait forever.
+        The tasks activated by the pull are executed by the thread waiting on
+        the @future (see TaskFuture), hence a pull doesn't need a spare
+        worker of task processor. Tasks already active are executed by task
+        processor as usual.
+        """
+        if threading.get_ident() == self.thread_id:
+            raise TaskonError(
+                "Lazy task results can't be requested from the scheduler "
+                "thread. Use a task processor which executes tasks in "
+                "separate threads.")
+        with self.lock:
+            if self.finished:
+                future.resolve(False)
+                return
+            self.completion_updates_queue.put(
+                (None, lambda: self.__activate(task_id, future)))
+
+    def __activate(self, task_id, future):
+        """
+        Handle the pull request of task @task_id, in scheduler thread.
+        Add the not yet active tasks in its dependency cover to the runtime
+        graph, and schedule the ready ones.
+        """
+        task = self.tasks_map[task_id]
+        if self.finished:
+            future.resolve(False)
+            return
+        if self.__isActive(task_id) and task.status != TaskStatus.SKIPPED:
+            future.resolve(task.status == TaskStatus.SUCCESS,
+                           task.getResult())
+            return
+        self.pending_pulls.setdefault(task_id, []).append(future)
+        if self.__isActive(task_id):
+            self.__failUnreachablePulls()
+            return
+        new_tasks = [task_id]
+        self.pulled_task_set.add(task_id)
+        index = 0
+        while index < len(new_tasks):
+            for d_task_id in self.deps_func(new_tasks[index]):
+                if not self.__isActive(d_task_id):
+                    self.pulled_task_set.add(d_task_id)
+                    new_tasks.append(d_task_id)
+            index += 1
+        self.pulled_tasks.extend(new_tasks)
+        for new_task_id in new_tasks:
+            self.pull_owners[new_task_id] = future
+        ready_tasks = []
+        for new_task_id in new_tasks:
+            deps = list(d for d in self.deps_func(new_task_id)
+                        if self.tasks_map[d].status != TaskStatus.SUCCESS)
+            self.pending_deps[new_task_id] = len(deps)
+            for d in deps:
+                self.pulled_successors.setdefault(d, []).append(new_task_id)
+            if len(deps) == 0:
+                ready_tasks.append(self.tasks_map[new_task_id])
+        self.__processTasks(ready_tasks)
+        self.__failUnreachablePulls()
+
+    def __resolvePulls(self, completed_tasks):
+        """Resolve the pending pulls of the @completed_tasks."""
+        any_failure = False
+        for task in completed_tasks:
+            for future in self.pending_pulls.pop(task.id, []):
+                future.resolve(task.status == TaskStatus.SUCCESS,
+                               task.getResult())
             if task.status != TaskStatus.SUCCESS:
-                task_name = self.tasks_map[task_id].name
-                if continue_on_failure:
-                    continue
+                any_failure = True
+        if any_failure:
+            self.__failUnreachablePulls()
+
+    def __failUnreachablePulls(self):
+        """
+        Fail the pending pulls of the tasks which can never be executed,
+        because some task in their dependency cover failed.
+        """
+        for task_id in list(self.pending_pulls.keys()):
+            stack = [task_id]
+            visited = set(stack)
+            reachable = True
+            while len(stack) > 0 and reachable:
+                for d_task_id in self.deps_func(stack.pop()):
+                    d_status = self.tasks_map[d_task_id].status
+                    if d_status in (TaskStatus.FAILURE, TaskStatus.ABORTED):
+                        reachable = False
+                    elif (d_status == TaskStatus.SKIPPED and
+                            d_task_id not in visited):
+                        visited.add(d_task_id)
+                        stack.append(d_task_id)
+            if not reachable:
+                for future in self.pending_pulls.pop(task_id):
+                    future.resolve(False)
+
+    def __isActive(self, task_id):
+        """Whether the task @task_id is effective or pulled."""
+        return (task_id in self.plan.effective_tasks or
+                task_id in self.pulled_task_set)
+
+    def __successors(self, task_id):
+        """Return the dependent active tasks of the task @task_id."""
+        successors = self.plan.successors[task_id]
+        if len(self.pulled_successors) > 0 and (
+                task_id in self.pulled_successors):
+            return successors + tuple(self.pulled_successors[task_id])
+        return successors
+
+    def __numHeldTasks(self):
+        """Return the number of held ready tasks, see __processTasks."""
+        num_held_tasks = 0
+        if self.rate_limiting is not None:
+            num_held_tasks += self.rate_limiting.num_held_tasks
+        if self.memory_budget is not None:
+            num_held_tasks += self.memory_budget.num_held_tasks
+        if self.deadline_scheduling is not None:
+            num_held_tasks += self.deadline_scheduling.num_held_tasks
+        return num_held_tasks
+
+    def __releaseHeldTasks(self):
+        """
+        Return the held tasks which can be dispatched now. Tasks released by
+        rate limiting are admitted by memory budget too, like in
+        __processTasks.
+        """
+        released = []
+        if self.memory_budget is not None:
+            released = self.memory_budget.release()
+        if (self.rate_limiting is not None and
+                self.rate_limiting.num_held_tasks > 0):
+            tasks = self.rate_limiting.release()
+            if self.memory_budget is not None:
+                tasks = self.memory_budget.admit(tasks)
+            released.extend(tasks)
+        if self.deadline_scheduling is not None:
+            # Ordered along with the new ready tasks, in __processTasks.
+            self.deadline_scheduling.hold(released)
+            return []
+        return released
+
+    def __processTasks(self, tasks):
+        """
+        Process the execution of ready @tasks. The tasks using rate limited
+        resources are held until their tokens are available, if rate_limiting
+        is enabled. The tasks which don't fit in the memory budget are held
+        until they do, if memory_budget is enabled. The tasks are dispatched
+        earliest deadline first, if deadline_scheduling is enabled. The up to
+        date tasks are complete without execution, if up_to_date_check is
+        enabled.
+        """
+        if self.up_to_date_check is not None:
+            outdated_tasks = []
+            for task in tasks:
+                if (task.id not in self.streaming_tasks and
+                        self.up_to_date_check.isUpToDate(task)):
+                    task.status = TaskStatus.SUCCESS
+                    self.reused_tasks.append(task)
                 else:
-                    break
-            for d_task_id in outgoing_edges[task.id]:
-                incoming_edges[d_task_id].remove(task.id)
-                if len(incoming_edges[d_task_id]) == 0:
-                    self.__processTask(self.tasks_map[d_task_id])
-        for task_id in self.tasks_in_progress:
-            if isinstance(self.tasks_map[task_id], AbortableTask):
-                self.tasks_map[task_id].abort()
-        self.task_processor.close()
+                    outdated_tasks.append(task)
+            tasks = outdated_tasks
+        if self.rate_limiting is not None:
+            tasks = self.rate_limiting.admit(tasks)
+        if self.memory_budget is not None:
+            tasks = self.memory_budget.admit(tasks)
+        if self.deadline_scheduling is not None:
+            tasks = self.deadline_scheduling.admit(tasks)
+        self.__dispatchTasks(tasks)
 
-    def __createRuntimeGraph(self, effective_tasks, deps_func):
+    def __dispatchTasks(self, tasks):
         """
-        @effective_tasks - Set of task ids. effective tasks are the actual
-                           tasks we need to execute, derived from the
-                           dependency cover of target_tasks.
+        Process the execution of @tasks. Fusible tasks are executed in
+        batches, if task_fusion is enabled.
         """
-        incoming_edges = dict((i, set(deps_func(i))) for i in effective_tasks)
-        outgoing_edges = dict((i, []) for i in effective_tasks)
-        for i, deps in incoming_edges.items():
-            for d in deps:
-                outgoing_edges[d].append(i)
-        return incoming_edges, outgoing_edges
+        if self.task_fusion is None:
+            for task in tasks:
+                self.__processTask(task)
+            return
+        fusible_tasks = []
+        for task in tasks:
+            if task.id in self.task_fusion.fusible_tasks:
+                fusible_tasks.append(task)
+            else:
+                self.__processTask(task)
+        if len(fusible_tasks) == 0:
+            return
+        batches = self.task_fusion.batch(
+            fusible_tasks, self.task_processor.getNumIdleWorkers())
+        for batch in batches:
+            fused_task = FusedTask(self.__newTaskId(), batch,
+                                   self.task_fusion)
+            self.num_fused_tasks += 1
+            self.tasks_in_progress[fused_task.id] = fused_task
+            self.task_processor.process(fused_task, self.__onCompleteCallback)
 
     def __processTask(self, task):
         """
@@ -100,9 +621,70 @@ class SchedulingAlgorithm:
         to get the real inputs of @task.
         """
         args, kwargs = self.task_inputs_func(task)
-        self.tasks_in_progress.add(task.id)
+        stream_consumers = []
+        if task.id in self.streaming_tasks:
+            stream_consumers = self.__streamConsumers(task)
+        if self.task_deduplication is not None and len(stream_consumers) == 0:
+            key = self.task_deduplication.getKey(task, args, kwargs)
+            if (key is not None and
+                    self.task_deduplication.deduplicate(task, key)):
+                if task.status != TaskStatus.SKIPPED:
+                    self.reused_tasks.append(task)
+                return
+        if len(stream_consumers) > 0:
+            task.output_streams = dict(
+                (consumer_id, TaskStream(task.name, max_size))
+                for consumer_id, max_size in stream_consumers)
+            self.streams.extend(task.output_streams.values())
+        original_id = task.id
+        if self.task_speculation is not None and len(stream_consumers) == 0:
+            # Idempotent tasks are executed on their own copies (attempts),
+            # see TaskSpeculation.
+            attempt = self.task_speculation.createAttempt(
+                task, self.__newTaskId())
+            if attempt is not None:
+                task = attempt
+        self.tasks_in_progress[task.id] = task
+        owner = self.pull_owners.get(original_id)
+        if (owner is not None and not owner.done.is_set() and
+                len(stream_consumers) == 0):
+            # The thread waiting for the pull executes it, see TaskFuture.
+            self.borrowed_tasks.add(task.id)
+            owner.execute(lambda: self.__executeBorrowedTask(
+                task, args, kwargs))
+            return
         self.task_processor.process(
             task, self.__onCompleteCallback, *args, **kwargs)
+        if len(stream_consumers) > 0:
+            # Consumers of the streams can start now.
+            ready_tasks = []
+            for consumer_id, _ in stream_consumers:
+                self.relaxed_stream_deps.add((task.id, consumer_id))
+                self.pending_deps[consumer_id] -= 1
+                if self.pending_deps[consumer_id] == 0:
+                    ready_tasks.append(self.tasks_map[consumer_id])
+            self.__processTasks(ready_tasks)
+
+    def __executeBorrowedTask(self, task, args, kwargs):
+        """
+        Execute the pulled @task in the thread waiting for its pull, in the
+        worker context of that thread. Skipped if scheduling is finished.
+        """
+        if not self.finished:
+            executeTask(task, self.__onCompleteCallback, args, kwargs,
+                        currentWorkerContext())
+
+    def __streamConsumers(self, task):
+        """
+        Return the list of (consumer task id, max_size) of the streams of the
+        output of @task.
+        """
+        consumers = []
+        for d_task_id in self.__successors(task.id):
+            producers = self.stream_deps_func(d_task_id)
+            if task.id in producers:
+                consumers.append((d_task_id, producers[task.id]))
+        return consumers
 
     def __onCompleteCallback(self, task, status):
         """
@@ -0,0 +1,81 @@
+from taskon.common import TaskStatus
+from taskon.abstract_task_processor import runTask
+from taskon.abstract_task_processor import createWorkerContext
+
+class SerialSchedulingAlgorithm:
+    """
+    A variant of taskon.SchedulingAlgorithm, which executes the effective
+    tasks one by one in the calling thread, in the topological order of the
+    execution plan (ExecutionPlan.order). There is no task processor, no
+    completion queue, no callback and no counter of pending dependencies,
+    since the dependencies of a task are complete before its turn comes. It
+    removes the per task overhead of scheduling, which dominates the runtime
+    of small graphs, tests and single core machines.
+
+    Failure and skip semantics are same as of SchedulingAlgorithm with a
+    NaiveTaskProcessor: The tasks depending on a failed task are skipped,
+    and without 'continue_on_failure' the execution stops at the first
+    failure, leaving the remaining tasks skipped. Nothing is aborted, since
+    no task is in progress when the execution stops.
+
+    Task fusion, speculation, deduplication, rate limiting, up to date
+    checks, memory budget, deadline scheduling, LazyTaskResult and
+    StreamTaskResult are not supported.
+    """
+    def __init__(self, task_inputs_func, tasks_map, deps_func,
+                 worker_initializer=None, worker_finalizer=None):
+        """
+        @worker_initializer and @worker_finalizer are the same as in
+        NaiveTaskProcessor, the calling thread being the only worker.
+        Other params are same as in SchedulingAlgorithm.
+        """
+        self.task_inputs_func = task_inputs_func
+        self.tasks_map = tasks_map
+        self.deps_func = deps_func
+        self.worker_initializer = worker_initializer
+        self.worker_finalizer = worker_finalizer
+        # Same as in SchedulingAlgorithm, for TaskRunner.
+        self.num_fused_tasks = 0
+        self.pulled_tasks = []
+        self.interrupt_error = None
+
+    def run(self, execution_plan, continue_on_failure=False):
+        """The main scheduling algorithm, see SchedulingAlgorithm.run."""
+        self.interrupt_error = None
+        worker_context, init_error = createWorkerContext(
+            0, self.worker_initializer)
+        tasks_map = self.tasks_map
+        task_inputs_func = self.task_inputs_func
+        any_failure = False
+        try:
+            for task_id in execution_plan.order:
+                if self.interrupt_error is not None:
+                    break
+                task = tasks_map[task_id]
+                # Dependencies can be unsuccessful only after a failure.
+                if any_failure and any(
+                        tasks_map[d].status != TaskStatus.SUCCESS
+                        for d in self.deps_func(task_id)):
+                    continue
+                if init_error is None:
+                    args, kwargs = task_inputs_func(task)
+                    task.status = runTask(task, args, kwargs, worker_context)
+                else:
+                    task.setError(init_error)
+                    task.status = TaskStatus.FAILURE
+                if task.status != TaskStatus.SUCCESS:
+                    if not continue_on_failure:
+                        break
+                    any_failure = True
+        finally:
+            if init_error is None and self.worker_finalizer is not None:
+                self.worker_finalizer(worker_context)
+        if self.interrupt_error is not None:
+            raise self.interrupt_error
+
+    def interrupt(self, error):
+        """
+        Stop the execution of more tasks and make the 'run' method raise the
+        @error, after the task being executed is complete. Thread safe.
+        """
+        self.interrupt_error = error
@@ -0,0 +1,188 @@
+import queue
+import threading
+
+from taskon.common import TaskStatus
+from taskon.abortable_task import AbortableTask
+
+class ShardedSchedulingAlgorithm:
+    """
+    A variant of taskon.SchedulingAlgorithm whose bookkeeping is partitioned
+    across @num_shards scheduler threads (shards), for the graphs of a large
+    number of tiny tasks, where a single scheduler thread handling every
+    completion and dispatch is the bottleneck.
+
+    Task @task_id is owned by the shard (task_id % num_shards). The owner
+    dispatches the task, handles its completion and keeps its count of
+    pending dependencies, which is touched by no other thread. On the
+    completion of a task, the owner decrements the counters of its own
+    successors directly, and sends the ids of other successors to their
+    owners, in one notification per shard. A shard becomes ready to dispatch
+    a task when its counter drops to 0, in its own thread.
+
+    The scheduling is complete when no task is in progress and no
+    notification is in flight, tracked by a single counter updated once per
+    batch of messages handled by a shard.
+
+    Since several shards call the task processor concurrently, the task
+    processor must be thread safe (see AbstractTaskProcessor.thread_safe).
+    Task fusion, speculation, deduplication, rate limiting, up to date
+    checks, memory budget, deadline scheduling, LazyTaskResult and
+    StreamTaskResult are not supported.
+    """
+    def __init__(self, task_processor, task_inputs_func, tasks_map, deps_func,
+                 num_shards):
+        """
+        @num_shards - Number of scheduler threads.
+        Other params are same as in SchedulingAlgorithm.
+        """
+        self.task_processor = task_processor
+        self.task_inputs_func = task_inputs_func
+        self.tasks_map = tasks_map
+        self.deps_func = deps_func
+        self.num_shards = num_shards
+        # Same as in SchedulingAlgorithm, for TaskRunner.
+        self.num_fused_tasks = 0
+        self.pulled_tasks = []
+        self.lock = threading.Lock()
+
+    def run(self, execution_plan, continue_on_failure=False):
+        """
+        The main scheduling algorithm, see SchedulingAlgorithm.run. The
+        calling thread waits for the shards to complete the scheduling.
+        """
+        self.plan = execution_plan
+        self.continue_on_failure = continue_on_failure
+        self.pending_deps = list(execution_plan.in_degree)
+        self.inboxes = list(queue.SimpleQueue()
+                            for i in range(self.num_shards))
+        # Map from task id to task in progress, one per shard.
+        self.tasks_in_progress = list(dict() for i in range(self.num_shards))
+        self.num_outstanding = 0
+        self.stopped = False
+        self.interrupt_error = None
+        self.done = threading.Event()
+        # Roots are dispatched as if their last dependency is just complete.
+        roots = [[] for i in range(self.num_shards)]
+        for task_id in execution_plan.roots:
+            self.pending_deps[task_id] = 1
+            roots[task_id % self.num_shards].append(task_id)
+        roots = list((shard, task_ids) for shard, task_ids in enumerate(roots)
+                     if len(task_ids) > 0)
+        if len(roots) == 0:
+            self.task_processor.close()
+            return
+        self.num_outstanding = len(roots)
+        threads = list(threading.Thread(target=self.__shard, args=(shard,),
+                                        daemon=True)
+                       for shard in range(self.num_shards))
+        for thread in threads:
+            thread.start()
+        for shard, task_ids in roots:
+            self.inboxes[shard].put((None, task_ids))
+        self.done.wait()
+        for shard in range(self.num_shards):
+            self.inboxes[shard].put(None)
+        for thread in threads:
+            thread.join()
+        if self.stopped:
+            self.__cancelTasksInProgress()
+        self.task_processor.close()
+        if self.interrupt_error is not None:
+            raise self.interrupt_error
+
+    def __cancelTasksInProgress(self):
+        """Same as in SchedulingAlgorithm, called after the shards stop."""
+        tasks_in_progress = dict()
+        for tasks in self.tasks_in_progress:
+            tasks_in_progress.update(tasks)
+        for task in self.task_processor.cancel():
+            del tasks_in_progress[task.id]
+            task.status = TaskStatus.ABORTED
+        for task in tasks_in_progress.values():
+            if isinstance(task, AbortableTask):
+                task.abort()
+                task.status = TaskStatus.ABORTED
+
+    def interrupt(self, error):
+        """
+        Stop the scheduling of more tasks and make the 'run' method raise the
+        @error, after aborting the tasks in progress. Thread safe.
+        """
+        with self.lock:
+            self.interrupt_error = error
+            self.stopped = True
+        self.done.set()
+
+    def __shard(self, shard):
+        """
+        Run the loop of scheduler shard @shard. Errors (eg: raised by the
+        task processor) interrupt the scheduling, like in the single threaded
+        scheduler.
+        """
+        try:
+            self.__shardLoop(shard)
+        except Exception as error:
+            self.interrupt(error)
+
+    def __shardLoop(self, shard):
+        """
+        The inbox of @shard has the completion updates (task, status) of its
+        tasks, the notifications (None, task_ids) of the completed
+        dependencies of its tasks, and a 'None' entry at the end of
+        scheduling. Updates received after the end are ignored, like in
+        SchedulingAlgorithm.
+        """
+        inbox = self.inboxes[shard]
+        tasks_in_progress = self.tasks_in_progress[shard]
+        pending_deps = self.pending_deps
+        on_complete_callback = lambda task, status: inbox.put((task, status))
+        while True:
+            messages = [inbox.get()]
+            # Drain the available messages, to handle them in one batch.
+            while not inbox.empty():
+                messages.append(inbox.get())
+            if None in messages:
+                break
+            ready_tasks = []
+            notifications = dict()
+            any_failure = False
+            for task, status in messages:
+                if task is None:
+                    for task_id in status:
+                        pending_deps[task_id] -= 1
+                        if pending_deps[task_id] == 0:
+                            ready_tasks.append(self.tasks_map[task_id])
+                    continue
+                task.status = status
+                self.task_processor.onComplete(task)
+                del tasks_in_progress[task.id]
+                if status != TaskStatus.SUCCESS:
+                    any_failure = True
+                    continue
+                for d_task_id in self.plan.successors[task.id]:
+                    d_shard = d_task_id % self.num_shards
+                    if d_shard != shard:
+                        notifications.setdefault(d_shard, []).append(
+                            d_task_id)
+                        continue
+                    pending_deps[d_task_id] -= 1
+                    if pending_deps[d_task_id] == 0:
+                        ready_tasks.append(self.tasks_map[d_task_id])
+            with self.lock:
+                if any_failure and not self.continue_on_failure:
+                    self.stopped = True
+                if self.stopped:
+                    ready_tasks, notifications = [], dict()
+                # New work is counted before it's sent, so that the counter
+                # can't drop to 0 while it's in flight.
+                self.num_outstanding += (len(ready_tasks) + len(notifications)
+                                         - len(messages))
+                if self.num_outstanding == 0 or self.stopped:
+                    self.done.set()
+            for d_shard, task_ids in notifications.items():
+                self.inboxes[d_shard].put((None, task_ids))
+            for task in ready_tasks:
+                args, kwargs = self.task_inputs_func(task)
+                tasks_in_progress[task.id] = task
+                self.task_processor.process(task, on_complete_callback,
+                                            *args, **kwargs)
@@ -0,0 +1,241 @@
+import concurrent.futures
+import os
+import queue
+import signal
+import subprocess
+import threading
+import uuid
+
+from taskon.common import Object
+from taskon.common import TaskonError
+from taskon.common import taskonAssert
+
+
+class ShellPool:
+    """
+    A pool of @num_workers long-lived shell processes, which run the bash
+    commands sent to them over a pipe. Unlike taskon.utils.runCommand
+    (os.system), the launch cost of a shell is paid once per worker instead
+    of once per command. Used by BashCommandTask, if given.
+
+    Each command is evaluated by the worker shell itself, without a subshell,
+    with stdin from /dev/null. stdout and stderr of the command are captured
+    together. 'exit' in a command ends only the command, and the working
+    directory is restored after each command. Other state changes (eg: shell
+    variables and options) are seen by the later commands of the worker. A
+    worker which terminates (eg: after 'set -e') is restarted, failing its
+    command.
+
+    @max_batch_size - Commands waiting in the pool when a worker becomes free
+                      are sent to it together, up to these many in one round
+                      trip. Useful for a large number of tiny commands.
+    @shell - The shell program of the workers.
+    """
+    def __init__(self, num_workers, max_batch_size=1, shell="/bin/bash"):
+        taskonAssert(num_workers > 0, "num_workers should be positive number")
+        taskonAssert(max_batch_size > 0,
+                     "max_batch_size should be positive number")
+        self.num_workers = num_workers
+        self.max_batch_size = max_batch_size
+        self.shell = shell
+        self.marker = "__taskon_%s__" % uuid.uuid4().hex
+        self.lock = threading.Lock()
+        self.threads = None
+        # Map from the future of a command sent to a worker, to the
+        # Object(shell) of the worker.
+        self.running = dict()
+        # Futures of the running commands being aborted.
+        self.aborted = set()
+
+    def submit(self, command):
+        """
+        Submit the bash @command to run in a worker. Return a
+        concurrent.futures.Future of (exit_code, output). Thread safe.
+        """
+        with self.lock:
+            if self.threads is None:
+                self.queue = queue.Queue()
+                self.threads = list(
+                    threading.Thread(target=self.__worker,
+                                     args=(self.queue,), daemon=True)
+                    for i in range(self.num_workers))
+                for thread in self.threads:
+                    thread.start()
+            future = concurrent.futures.Future()
+            self.queue.put((command, future))
+        return future
+
+    def run(self, command):
+        """
+        Run the bash @command in a worker and return (exit_code, output).
+        Blocks the calling thread until the command completes. Thread safe.
+        """
+        return self.submit(command).result()
+
+    def abort(self, future):
+        """
+        Abort the command of @future, returned by 'submit'. A waiting command
+        is cancelled. A running command is killed along with its worker
+        shell and their child processes, and its future fails with
+        TaskonError. The worker restarts and runs again the commands of the
+        same batch which didn't start; the command running in place of the
+        aborted one (in the same batch) fails. No-op if the command is
+        complete. Thread safe.
+        """
+        if future.cancel():
+            return
+        with self.lock:
+            worker = self.running.get(future)
+            if worker is None:
+                return
+            self.aborted.add(future)
+            shell = worker.shell
+        if shell is not None:
+            self.__kill(shell)
+
+    def close(self):
+        """
+        Terminate all the workers, after the commands already submitted. The
+        pool restarts if more commands are run.
+        """
+        with self.lock:
+            if self.threads is None:
+                return
+            threads = self.threads
+            self.threads = None
+            for thread in threads:
+                self.queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    def __startShell(self):
+        shell = subprocess.Popen([self.shell], stdin=subprocess.PIPE,
+                                 stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT,
+                                 encoding="utf-8", errors="replace",
+                                 bufsize=1, start_new_session=True)
+        # The command is evaluated in a function, where 'exit' returns.
+        shell.stdin.write("exit() { return \"${1:-$?}\"; }\n"
+                          "taskon_run() { eval \"$TASKON_COMMAND\"; }\n"
+                          "TASKON_DIR=\"$PWD\"\n")
+        return shell
+
+    def __kill(self, shell):
+        """Kill @shell and the processes of its commands."""
+        try:
+            os.killpg(shell.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass # Already terminated.
+
+    def __worker(self, requests):
+        """
+        Consume the commands from @requests queue in batches, until a 'None'
+        entry is received.
+        """
+        worker = Object(shell=None)
+        closed = False
+        while not closed:
+            batch = []
+            request = requests.get()
+            while request is not None:
+                batch.append(request)
+                if len(batch) == self.max_batch_size:
+                    break
+                try:
+                    request = requests.get_nowait()
+                except queue.Empty:
+                    break
+            closed = request is None
+            with self.lock:
+                # Commands aborted while waiting are cancelled.
+                batch = list((command, future) for command, future in batch
+                             if future.set_running_or_notify_cancel())
+                for _, future in batch:
+                    self.running[future] = worker
+            while len(batch) > 0:
+                batch = self.__runBatchSafely(worker, batch)
+        if worker.shell is not None:
+            worker.shell.communicate()
+
+    def __runBatchSafely(self, worker, batch):
+        """
+        Run the @batch of (command, future) in the shell of @worker, which
+        is (re)started if needed. On any error, the shell is killed and the
+        futures not yet resolved fail. Except if a command was aborted, then
+        the commands which didn't start are returned, to be run again.
+        """
+        started = False
+        try:
+            if worker.shell is None:
+                shell = self.__startShell()
+                with self.lock:
+                    worker.shell = shell
+                    aborted = any(f in self.aborted for _, f in batch)
+                if aborted:
+                    raise TaskonError("Aborted before start")
+            started = True
+            self.__runBatch(worker.shell, batch)
+        except Exception as exception:
+            # Outlives the except block, unlike the exception variable.
+            error = exception
+            if worker.shell is not None:
+                self.__kill(worker.shell)
+                worker.shell.communicate()
+            with self.lock:
+                worker.shell = None
+                pending = list((command, future, future in self.aborted)
+                               for command, future in batch
+                               if not future.done())
+        else:
+            pending = []
+        any_aborted = any(aborted for _, _, aborted in pending)
+        retry = []
+        for index, (command, future, aborted) in enumerate(pending):
+            if aborted:
+                future.set_exception(
+                    TaskonError("Command '%s' aborted" % command))
+            elif any_aborted and (index > 0 or not started):
+                # Didn't start, since the commands run one by one.
+                retry.append((command, future))
+            else:
+                future.set_exception(error)
+        with self.lock:
+            for _, future in batch:
+                if future.done():
+                    self.running.pop(future, None)
+                    self.aborted.discard(future)
+        return retry
+
+    def __runBatch(self, shell, batch):
+        """
+        Run the @batch of (command, future) in @shell, resolving the futures
+        with (exit_code, output) as the commands complete.
+        """
+        script = []
+        for command, _ in batch:
+            # The command is passed as data through a quoted here-document,
+            # so that syntax errors in it can't break the protocol. 'read',
+            # 'eval' and 'cd' are builtins, no process is launched besides
+            # the programs of the command itself.
+            script.append(
+                "IFS= read -r -d '' TASKON_COMMAND <<'%s'\n%s\n%s\n"
+                "taskon_run </dev/null 2>&1\n"
+                "TASKON_STATUS=$?\n"
+                "cd \"$TASKON_DIR\"\n"
+                "printf '\\n%s %%d\\n' $TASKON_STATUS\n"
+                % (self.marker, command, self.marker, self.marker))
+        shell.stdin.write("".join(script))
+        shell.stdin.flush()
+        output = []
+        for command, future in batch:
+            while True:
+                line = shell.stdout.readline()
+                if line == "":
+                    raise TaskonError("Shell worker terminated while running "
+                                      "command '%s'" % command)
+                if line.startswith(self.marker + " "):
+                    break
+                output.append(line)
+            # Remove the newline printed before the marker.
+            future.set_result((int(line.split()[1]), "".join(output)[:-1]))
+            output = []
@@ -1,9 +1,18 @@
 from taskon.abstract_task import AbstractTask
+from taskon.utils import callableIdentity
 
 class SimpleTask(AbstractTask):
-    def __init__(self, name, action, args=None, kwargs=None, result=None):
+    def __init__(self, name, action, args=None, kwargs=None, result=None,
+                 worker_context_arg=None):
         AbstractTask.__init__(self, name, args, kwargs, result)
         self.action = action
+        self.worker_context_arg = worker_context_arg
 
     def run(self, *args, **params):
         return self.action(*args, **params)
+
+    def getActionIdentity(self):
+        return callableIdentity(self.action)
+
+    def getActionKey(self):
+        return self.action
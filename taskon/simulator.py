@@ -0,0 +1,138 @@
+import collections
+import heapq
+
+from taskon.common import Object
+from taskon.common import taskonAssert
+
+
+class Simulator:
+    """
+    Discrete event simulation of the execution of a TaskRunner's dependency
+    graph, against a virtual clock. Nothing is executed, each task is assumed
+    to take its estimated duration. Useful for capacity planning, eg: to
+    compare the makespan of a graph with 8 vs 64 workers.
+
+    The simulation follows the policy of SchedulingAlgorithm with a
+    FiniteThreadTaskProcessor of @num_workers threads: a task becomes ready
+    when all its dependencies are complete, ready tasks are started in the
+    order they became ready, as soon as a worker is free. If @num_workers is
+    None, workers are unlimited (like InfiniteThreadTaskProcessor).
+    Overheads of the scheduler and task processor are not simulated.
+
+    @duration_func - A function that takes a task and returns its estimated
+                     duration in seconds. By default it's the duration from
+                     task.cost_estimate, or from the runtime_store of the
+                     TaskRunner (see taskon.RuntimeStore).
+    @default_duration - Duration of the tasks whose estimate is unknown, if
+                        @duration_func is not given.
+    """
+    def __init__(self, num_workers=None, duration_func=None,
+                 default_duration=0.0):
+        taskonAssert(num_workers is None or num_workers > 0,
+                     "num_workers should be positive number")
+        self.num_workers = num_workers
+        self.duration_func = duration_func
+        self.default_duration = default_duration
+
+    def simulate(self, task_runner):
+        """
+        Simulate the execution of effective tasks of @task_runner. Return an
+        Object with fields:
+            makespan - Simulated duration of the whole execution.
+            average_utilization - Fraction of worker time spent in executing
+                                  tasks. None if workers are unlimited.
+            profile - List of (time, busy_workers, runnable_tasks), the
+                      number of workers executing tasks and the number of
+                      tasks which could execute (running or ready), from
+                      'time' until the time of next entry. Ends with an
+                      entry of zeros at 'makespan'.
+            critical_path - Object(length, path=list-of-task-names), the
+                            chain of dependent tasks with the largest total
+                            duration, a lower bound of makespan.
+        """
+        tasks_map = task_runner.tasks_map
+        dependency_graph = task_runner.dependency_graph
+        duration_func = self.duration_func or (
+            lambda task: self.__estimatedDuration(task_runner, task))
+        # Task ids are indices in [0, len(tasks_map)), hence per task state
+        # is kept in lists, which is much faster than dicts for large graphs.
+        size = len(tasks_map)
+        duration = [0] * size
+        num_pending = [0] * size
+        dependents = [None] * size
+        ready = collections.deque()
+        for task_id in task_runner.effective_tasks:
+            duration[task_id] = duration_func(tasks_map[task_id])
+            num_pending[task_id] = len(dependency_graph[task_id])
+            dependents[task_id] = []
+            if num_pending[task_id] == 0:
+                ready.append(task_id)
+        for task_id in task_runner.effective_tasks:
+            for d in dependency_graph[task_id]:
+                dependents[d].append(task_id)
+        # Longest chain of dependent tasks ending with a task (excluding the
+        # task itself until it completes), and the dependency on that chain.
+        chain_length = [0] * size
+        chain_parent = [None] * size
+        free_workers = (len(task_runner.effective_tasks)
+                        if self.num_workers is None else self.num_workers)
+        num_workers = free_workers
+        running = [] # Heap of (finish time, task id)
+        heappush, heappop = heapq.heappush, heapq.heappop
+        profile = []
+        last_entry = (None, None)
+        now = 0
+        while True:
+            while ready and free_workers > 0:
+                task_id = ready.popleft()
+                free_workers -= 1
+                heappush(running, (now + duration[task_id], task_id))
+            busy_workers = num_workers - free_workers
+            entry = (busy_workers, busy_workers + len(ready))
+            if entry != last_entry:
+                if profile and profile[-1][0] == now:
+                    profile.pop()
+                if not profile or profile[-1][1:] != entry:
+                    profile.append((now,) + entry)
+                last_entry = entry
+            if not running:
+                break
+            now, task_id = heappop(running)
+            free_workers += 1
+            length = chain_length[task_id] + duration[task_id]
+            chain_length[task_id] = length
+            for d in dependents[task_id]:
+                if length > chain_length[d]:
+                    chain_length[d] = length
+                    chain_parent[d] = task_id
+                num_pending[d] -= 1
+                if num_pending[d] == 0:
+                    ready.append(d)
+        busy_time = sum(duration)
+        return Object(
+            makespan=now,
+            average_utilization=(
+                None if self.num_workers is None or now == 0
+                else busy_time / (now * self.num_workers)),
+            profile=profile,
+            critical_path=self.__criticalPath(
+                task_runner.effective_tasks, tasks_map, chain_length,
+                chain_parent))
+
+    def __estimatedDuration(self, task_runner, task):
+        estimate = task.cost_estimate
+        if estimate is None and task_runner.runtime_store is not None:
+            estimate = task_runner.runtime_store.getEstimate(task)
+        return self.default_duration if estimate is None else estimate.duration
+
+    def __criticalPath(self, task_ids, tasks_map, chain_length, chain_parent):
+        if len(task_ids) == 0:
+            return Object(length=0, path=[])
+        last = max(task_ids, key = lambda task_id: chain_length[task_id])
+        path = []
+        task_id = last
+        while task_id is not None:
+            path.append(tasks_map[task_id].name)
+            task_id = chain_parent[task_id]
+        path.reverse()
+        return Object(length=chain_length[last], path=path)
@@ -0,0 +1,93 @@
+import copy
+
+from taskon.abstract_task import AbstractTask
+from taskon.common import TaskonFatalError
+from taskon.common import TaskResult
+
+
+class SubGraphTask(AbstractTask):
+    """
+    A task made of a graph of inner @tasks (eg: a reusable pipeline), whose
+    result is the result of the inner task named @output.
+
+    TaskRunner splices the inner tasks into the parent graph, as the tasks
+    named "<name>/<inner task name>", hence they are scheduled by the parent
+    scheduler on the parent task processor, with full parallelism and without
+    any worker blocked on waiting for the sub-graph. SubGraphTask itself
+    becomes a trivial task depending on the @output task.
+
+    TaskResult placeholders in the inner tasks refer to the inner tasks
+    first, other names refer to the tasks of parent graph. Inner tasks can be
+    SubGraphTasks too. The given @tasks are not modified, they are copied
+    for each SubGraphTask, hence the same tasks can be used in several
+    sub-graphs. The lists, dicts and sets of a copy (eg: tags,
+    rate_limited_resources and the containers in args/kwargs) are copied as
+    well, other objects in the inputs are shared by the copies, like an
+    object passed to several tasks.
+    """
+    def __init__(self, name, tasks, output):
+        AbstractTask.__init__(self, name)
+        self.tasks = list(tasks)
+        self.output = output
+        if all(task.name != output for task in self.tasks):
+            raise TaskonFatalError(
+                "Output task '%s' of sub-graph task '%s' is not one of its "
+                "tasks." % (output, name))
+
+    def run(self, result):
+        return result
+
+    def expand(self):
+        """
+        Return the copies of inner tasks (recursively expanded) named in the
+        namespace of this task, and set the input of this task to the result
+        of @output task.
+        """
+        # Nested SubGraphTasks are copied, since expanding sets their args.
+        inner_tasks = expandSubGraphs(list(
+            copyTask(task) if isinstance(task, SubGraphTask) else task
+            for task in self.tasks))
+        prefix = self.name + "/"
+        inner_names = set(task.name for task in inner_tasks)
+        def rename(placeholder):
+            if placeholder.name not in inner_names:
+                return placeholder
+            placeholder = copy.copy(placeholder)
+            placeholder.name = prefix + placeholder.name
+            return placeholder
+        output = []
+        for task in inner_tasks:
+            task_copy = copyTask(task)
+            task_copy.name = prefix + task.name
+            task_copy.args, task_copy.kwargs = (
+                task.visitTaskResultPlaceholders(rename))
+            output.append(task_copy)
+        self.args = (TaskResult(prefix + self.output),)
+        return output
+
+
+def copyTask(task):
+    """
+    Return a shallow copy of @task, not sharing the lists, dicts and sets of
+    its attributes with @task.
+    """
+    task_copy = copy.copy(task)
+    for key, value in vars(task).items():
+        if isinstance(value, (list, dict, set)):
+            setattr(task_copy, key, copy.copy(value))
+    return task_copy
+
+
+def expandSubGraphs(tasks):
+    """
+    Return the list of @tasks, with the inner tasks of SubGraphTasks spliced
+    before them. See SubGraphTask.
+    """
+    if not any(isinstance(task, SubGraphTask) for task in tasks):
+        return tasks
+    output = []
+    for task in tasks:
+        if isinstance(task, SubGraphTask):
+            output.extend(task.expand())
+        output.append(task)
+    return output
@@ -0,0 +1,85 @@
+import hashlib
+import pickle
+
+
+class TaskDeduplication:
+    """
+    Common subexpression elimination of pure tasks within a single run. If a
+    pure task is ready for execution while an identical task is in progress
+    or already executed in the same run, it's not given to task processor.
+    Instead it completes along with the identical task, reusing its
+    status and result/error.
+
+    Two tasks are identical if they have the same action key (see
+    AbstractTask.getActionKey) and the same resolved inputs. Inputs are
+    compared by their pickled form, tasks with unpicklable inputs are never
+    deduplicated.
+
+    A task is pure if @is_pure(task) returns True. By default a task is pure
+    if `task.pure` is set True.
+    Note that the tasks executed within a FusedTask are not deduplicated.
+    """
+    def __init__(self, is_pure=None):
+        self.is_pure = is_pure or (lambda task: task.pure)
+
+    def prepare(self):
+        """Called by task scheduler before the start of scheduling."""
+        # Map from the key of a task to the task actually executed for it.
+        self.leaders = dict()
+        # Map from the id of a leader in progress to the list of tasks
+        # waiting for its completion.
+        self.followers = dict()
+        self.num_deduplicated_tasks = 0
+
+    def getKey(self, task, args, kwargs):
+        """
+        Return the key identifying the computation of @task with the real
+        inputs @args and @kwargs, or None if @task can't be deduplicated.
+        """
+        if not self.is_pure(task):
+            return None
+        action_key = task.getActionKey()
+        if action_key is None:
+            return None
+        try:
+            hash(action_key)
+            inputs = pickle.dumps((args, kwargs))
+        except Exception:
+            return None
+        return (action_key, hashlib.sha256(inputs).digest())
+
+    def deduplicate(self, task, key):
+        """
+        Called by task scheduler when @task with the given @key is ready.
+        Return True if @task is deduplicated, in which case it's not
+        executed. If the identical task is already complete, @task is
+        complete as well, otherwise it completes along with the identical
+        task (see 'onComplete').
+        Return False if @task should be executed, as the leader of @key.
+        """
+        leader = self.leaders.get(key)
+        if leader is None:
+            self.leaders[key] = leader = task
+            self.followers[task.id] = []
+            return False
+        self.num_deduplicated_tasks += 1
+        if leader.id in self.followers:
+            self.followers[leader.id].append(task)
+        else:
+            self.__copyState(leader, task)
+        return True
+
+    def onComplete(self, task):
+        """
+        Called by task scheduler on the completion of @task. Return the list
+        of tasks deduplicated against @task, which are complete now.
+        """
+        followers = self.followers.pop(task.id, [])
+        for follower in followers:
+            self.__copyState(task, follower)
+        return followers
+
+    def __copyState(self, source, target):
+        target.status = source.status
+        target.setResult(source.getResult())
+        target.setError(source.getError())
@@ -0,0 +1,155 @@
+from taskon.common import TaskStatus
+from taskon.common import taskonAssert
+from taskon.abstract_task import AbstractTask
+from taskon.simple_task import SimpleTask
+from taskon.abstract_task_processor import runTask
+
+
+class FusedTask(AbstractTask):
+    """
+    A composite task, created by the task scheduler, to execute several tiny
+    tasks in one dispatch of the task processor.
+
+    @tasks are independent tasks, all ready for execution. They are executed
+    one after another in the same thread. After the successful execution of a
+    member task T, if the chain successor of T (see TaskFusion) exists, it is
+    executed as a member task as well.
+
+    The result/error of each member task is set on the member task itself.
+    The status of member tasks are collected in @self.member_statuses, which
+    the task scheduler applies on the member tasks. Hence from the point of
+    view of TaskRunner, member tasks look exactly as they are executed
+    separately.
+    """
+    def __init__(self, task_id, tasks, task_fusion):
+        AbstractTask.__init__(self, name="fused_task_%s" % task_id)
+        self.id = task_id
+        self.members = list(tasks)
+        self.member_statuses = []
+        self.task_fusion = task_fusion
+        self.worker_context_arg = "worker_context"
+
+    def getExecutedTaskIds(self):
+        # Including the chain successors executed so far.
+        return list(task_id for task in self.members
+                    for task_id in task.getExecutedTaskIds())
+
+    def run(self, worker_context=None):
+        index = 0
+        any_failure = False
+        while index < len(self.members):
+            task = self.members[index]
+            index += 1
+            args, kwargs = self.task_fusion.task_inputs_func(task)
+            status = runTask(task, args, kwargs, worker_context)
+            self.member_statuses.append(status)
+            if status != TaskStatus.SUCCESS:
+                any_failure = True
+                continue
+            next_task = self.task_fusion.chain_next.get(task.id)
+            if next_task is not None and not any_failure:
+                self.members.append(next_task)
+
+
+class TaskFusion:
+    """
+    An optimization of task scheduling for the graphs of tiny tasks, where the
+    overhead of scheduling and thread handoff is larger than the execution of
+    tasks itself.
+
+    1. Batching: Ready tasks which are fusible, are dispatched to task
+       processor in batches of at most @max_batch_size tasks, as a FusedTask.
+       The ready tasks are spread in at least as many batches as the idle
+       workers of task processor (see AbstractTaskProcessor.
+       getNumIdleWorkers), so that no worker stays idle.
+    2. Chain fusion: If a fusible task P has only one dependent task T, and T
+       is fusible and depends only on P, then T is the chain successor of P.
+       T is executed right after P in the same FusedTask, without going
+       through task scheduler.
+    Only the tasks having the same route key in task processor (see
+    AbstractTaskProcessor.getRouteKey) are fused together.
+
+    @is_fusible - A function that takes a task and return whether it can be
+                  fused with other tasks. By default, SimpleTasks whose
+                  estimated duration (task.cost_estimate, see RuntimeStore) is
+                  at most @max_duration seconds, are fusible. SimpleTasks
+                  without an estimate are fusible only if @fuse_unknown.
+                  Note that fused tasks are executed sequentially, hence long
+                  running tasks should not be fusible.
+    """
+    def __init__(self, max_batch_size=16, max_duration=0.001,
+                 is_fusible=None, fuse_unknown=False):
+        taskonAssert(max_batch_size > 0,
+                     "max_batch_size should be positive number")
+        self.max_batch_size = max_batch_size
+        self.max_duration = max_duration
+        self.fuse_unknown = fuse_unknown
+        self.is_fusible = is_fusible or self.__isTinySimpleTask
+        self.route_key_func = lambda task: None
+
+    def __isTinySimpleTask(self, task):
+        if not isinstance(task, SimpleTask):
+            return False
+        if task.cost_estimate is None:
+            return self.fuse_unknown
+        return task.cost_estimate.duration <= self.max_duration
+
+    def prepare(self, tasks_map, task_inputs_func, execution_plan,
+                route_key_func=lambda task: None):
+        """
+        Called by task scheduler before the start of scheduling, with the
+        taskon.ExecutionPlan of effective tasks and the route key function
+        of task processor.
+        Populate @self.fusible_tasks and @self.chain_next.
+        """
+        self.task_inputs_func = task_inputs_func
+        self.route_key_func = route_key_func
+        self.fusible_tasks = set(task_id for task_id in
+                                 execution_plan.effective_tasks
+                                 if self.is_fusible(tasks_map[task_id]))
+        self.chain_next = dict()
+        for task_id in self.fusible_tasks:
+            dependents = execution_plan.successors[task_id]
+            if len(dependents) != 1:
+                continue
+            next_id = dependents[0]
+            if (next_id in self.fusible_tasks and
+                    execution_plan.in_degree[next_id] == 1 and
+                    route_key_func(tasks_map[next_id]) ==
+                    route_key_func(tasks_map[task_id])):
+                self.chain_next[task_id] = tasks_map[next_id]
+
+    def exclude(self, task_ids):
+        """
+        Called by task scheduler after 'prepare', to exclude the @task_ids
+        which must not be fused.
+        """
+        if len(task_ids) == 0:
+            return
+        self.fusible_tasks -= task_ids
+        self.chain_next = dict(
+            (task_id, next_task) for task_id, next_task in
+            self.chain_next.items() if task_id in self.fusible_tasks and
+            next_task.id in self.fusible_tasks)
+
+    def batch(self, tasks, num_idle=None):
+        """
+        Split the fusible @tasks in batches. Return list of batches.
+        Tasks of different route keys are in different batches. Batches of a
+        route key are of near equal sizes, each having at most
+        @self.max_batch_size tasks, and there are at least @num_idle batches
+        (the idle workers of task processor, if known) unless there are
+        fewer tasks.
+        """
+        routes = dict()
+        for task in tasks:
+            routes.setdefault(self.route_key_func(task), []).append(task)
+        batches = []
+        for route_tasks in routes.values():
+            num_batches = -(-len(route_tasks) // self.max_batch_size)
+            if num_idle is not None:
+                num_batches = max(num_batches,
+                                  min(num_idle, len(route_tasks)))
+            batches.extend(route_tasks[i::num_batches]
+                           for i in range(num_batches))
+        return batches
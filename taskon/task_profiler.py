@@ -0,0 +1,198 @@
+import cProfile
+import fnmatch
+import os
+import pstats
+import random
+import re
+import threading
+
+from taskon.common import Object
+
+
+class TaskProfiler:
+    """
+    Opt-in CPU and memory profiling of selected tasks, aggregated per action
+    (see AbstractTask.getActionIdentity). Tasks are selected by TaskRunner
+    before each run, see 'selectTasks'. Task processors profile the selected
+    tasks with cProfile while executing them (see
+    taskon.abstract_task_processor.runTask), other tasks have no overhead.
+
+    @name_pattern - If given, the tasks whose name matches this glob pattern
+                    (eg: "fetch_*") are selected.
+    @top_slowest - If given, the N slowest tasks are selected, as per their
+                   cost estimate (see taskon.RuntimeStore) or their duration
+                   in the previous run with this profiler. Tasks with unknown
+                   duration are not selected by it.
+                   All the tasks are selected if neither @name_pattern nor
+                   @top_slowest is given.
+    @sample_rate - Fraction of the executions of selected tasks, which are
+                   profiled.
+    @track_memory - If True, TaskRunner traces the memory allocations with
+                    tracemalloc and the peak memory of profiled tasks is
+                    aggregated too.
+
+    Profiling is per thread, hence the profile of a task covers only the
+    calls made in the thread executing it. Python 3.12+ allows only one
+    active cProfile at a time, the executions which can't be profiled for it
+    are counted in @self.num_skipped.
+    """
+    def __init__(self, name_pattern=None, top_slowest=None, sample_rate=1.0,
+                 track_memory=False):
+        self.name_pattern = name_pattern
+        self.top_slowest = top_slowest
+        self.sample_rate = sample_rate
+        self.track_memory = track_memory
+        self.lock = threading.Lock()
+        # Map from action identity to Object(num_profiled, total_time,
+        # peak_memory, stats).
+        self.actions = dict()
+        self.num_skipped = 0
+        # Durations of the tasks (by name) in the previous run.
+        self.durations = dict()
+
+    def selectTasks(self, tasks):
+        """Return the list of @tasks to be profiled."""
+        if self.name_pattern is None and self.top_slowest is None:
+            return list(tasks)
+        selected = []
+        if self.name_pattern is not None:
+            selected = list(task for task in tasks if fnmatch.fnmatchcase(
+                task.name, self.name_pattern))
+        if self.top_slowest is not None:
+            durations = []
+            for task in tasks:
+                duration = self.durations.get(task.name)
+                if task.cost_estimate is not None:
+                    duration = task.cost_estimate.duration
+                if duration is not None:
+                    durations.append((duration, task))
+            durations.sort(key = lambda x: x[0], reverse=True)
+            selected_ids = set(id(task) for task in selected)
+            for _, task in durations[:self.top_slowest]:
+                if id(task) not in selected_ids:
+                    selected.append(task)
+        return selected
+
+    def recordDurations(self, tasks):
+        """Called by TaskRunner after a run, with the succeeded @tasks."""
+        for task in tasks:
+            duration = task.getDuration()
+            if duration is not None:
+                self.durations[task.name] = duration
+
+    def start(self, task):
+        """
+        Called by task processor in the thread executing the @task, just
+        before the execution. Return the started cProfile.Profile, or None
+        if this execution is not profiled.
+        """
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            with self.lock:
+                self.num_skipped += 1
+            return None
+        return profile
+
+    def finish(self, task, profile):
+        """
+        Called by task processor in the thread executing the @task, after
+        the execution, with the @profile returned by 'start'.
+        """
+        profile.disable()
+        stats = pstats.Stats(profile)
+        action = task.getActionIdentity()
+        with self.lock:
+            aggregate = self.actions.get(action)
+            if aggregate is None:
+                aggregate = self.actions[action] = Object(
+                    num_profiled=0, total_time=0, peak_memory=None,
+                    stats=stats)
+            else:
+                aggregate.stats.add(stats)
+            aggregate.num_profiled += 1
+            aggregate.total_time += task.getDuration() or 0
+            if task.peak_memory is not None:
+                aggregate.peak_memory = max(aggregate.peak_memory or 0,
+                                            task.peak_memory)
+
+    def dumpStats(self, directory):
+        """
+        Write the aggregated profile of each action in @directory as
+        '<action>.pstats' file, readable by pstats module and tools like
+        snakeviz. Return the list of written paths.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        with self.lock:
+            for action, aggregate in self.actions.items():
+                path = os.path.join(directory, "%s.pstats" % (
+                    re.sub(r"[^\w.-]", "_", action)))
+                aggregate.stats.dump_stats(path)
+                paths.append(path)
+        return paths
+
+    def getCollapsedStacks(self):
+        """
+        Return the aggregated profiles as collapsed stacks, i.e. the lines of
+        'action;frame1;frame2;... microseconds', the input format of
+        flamegraph tools (eg: flamegraph.pl, speedscope). cProfile records
+        only caller -> callee edges, hence the time of a function is split
+        across its callers in proportion to the time of these edges.
+        """
+        lines = []
+        with self.lock:
+            for action, aggregate in sorted(self.actions.items()):
+                stacks = dict()
+                self.__collapse(aggregate.stats.stats, [action], stacks)
+                for stack, value in sorted(stacks.items()):
+                    if value > 0:
+                        lines.append("%s %d" % (stack, value))
+        return lines
+
+    def __collapse(self, stats, root, stacks):
+        callees = dict()
+        roots = []
+        for func, (_, _, _, _, callers) in stats.items():
+            if len(callers) == 0:
+                roots.append(func)
+            for caller in callers:
+                callees.setdefault(caller, []).append(func)
+        def visit(func, stack, time):
+            total_time = stats[func][3]
+            if total_time <= 0:
+                return
+            fraction = time / total_time
+            stack = stack + [self.__frameName(func)]
+            key = ";".join(stack)
+            stacks[key] = (stacks.get(key, 0) +
+                           stats[func][2] * fraction * 1e6)
+            for callee in callees.get(func, []):
+                if self.__frameName(callee) in stack:
+                    continue # Recursion.
+                visit(callee, stack, stats[callee][4][func][3] * fraction)
+        for func in roots:
+            visit(func, root, stats[func][3])
+
+    def __frameName(self, func):
+        filename, line, name = func
+        if filename == "~":
+            return name # Builtin.
+        return "%s:%d(%s)" % (os.path.basename(filename), line, name)
+
+    def getSummaryString(self):
+        """Return the aggregates per action, slowest first."""
+        lines = []
+        with self.lock:
+            actions = sorted(self.actions.items(),
+                             key = lambda x: x[1].total_time, reverse=True)
+            for action, aggregate in actions:
+                line = "%s: %d profiled, %.3fs" % (
+                    action, aggregate.num_profiled, aggregate.total_time)
+                if aggregate.peak_memory is not None:
+                    line += ", peak memory %d bytes" % aggregate.peak_memory
+                lines.append(line)
+        return "\n".join(lines) + "\n"
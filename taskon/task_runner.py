@@ -1,43 +1,193 @@
 import queue
 import threading
 import collections
+import itertools
+import concurrent.futures
+import multiprocessing
+import time
+import tracemalloc
 
 from taskon.common import TaskonFatalError
 from taskon.common import TaskonError
 from taskon.common import TaskStatus
+from taskon.common import collectTaskResultPlaceholders
+from taskon.common import LazyTaskResult
+from taskon.common import StreamTaskResult
+from taskon.common import TaskFuture
+from taskon.common import TaskStream
 from taskon.utils import cycleDetection
 from taskon.utils import depsCover
+from taskon.utils import criticalPath
 from taskon.scheduling_algorithm import SchedulingAlgorithm
+from taskon.sharded_scheduling_algorithm import ShardedSchedulingAlgorithm
+from taskon.serial_scheduling_algorithm import SerialSchedulingAlgorithm
+from taskon.naive_task_processor import NaiveTaskProcessor
+from taskon.execution_plan import ExecutionPlan
+from taskon.sub_graph_task import expandSubGraphs
+from taskon.graph_file import LoadedGraph
 
-class TaskResultPlaceholderVisitor:
+# Map from a token to the (list of tasks, map from task name -> task) being
+# preprocessed in parallel, which the forked worker processes inherit. See
+# __preprocessTaskArgsInParallel.
+preprocessed_tasks = dict()
+
+def extractDependencies(token, start, end):
     """
-    A helper visitor used in __preprocessTaskArgs. A visitor that is used
-    for visiting on TaskResult placeholders used in args/kwargs of a task.
-    This visitor:
-    1. Populate the task id on the TaskResult obect.
-    2. Collect dependency_tasks for a given task.
+    A helper used in __preprocessTaskArgsInParallel, executed in the worker
+    processes. Visit the inputs of the tasks [@start, @end) of
+    preprocessed_tasks[@token]. Return the parts of (dependency_graph,
+    lazy_dependency_graph, stream_dependency_graph) of these tasks (see
+    __preprocessTaskArgs), along with the list of ids of tasks using an
+    invalid task name.
     """
-    def __init__(self, task, task_name_to_task_map):
-        self.task = task
-        self.task_name_to_task_map = task_name_to_task_map
-        self.dependency_tasks = set()
+    tasks, task_name_to_task_map = preprocessed_tasks[token]
+    dependency_graph = dict()
+    lazy_dependency_graph = dict()
+    stream_dependency_graph = dict()
+    invalid_tasks = []
+    for task in tasks[start:end]:
+        dependency_tasks = set()
+        try:
+            for x in collectTaskResultPlaceholders((task.args, task.kwargs)):
+                dependency_id = task_name_to_task_map[x.name].id
+                if isinstance(x, LazyTaskResult):
+                    lazy_dependency_graph.setdefault(
+                        task.id, set()).add(dependency_id)
+                    continue
+                dependency_tasks.add(dependency_id)
+                if isinstance(x, StreamTaskResult):
+                    stream_dependency_graph.setdefault(
+                        task.id, dict())[dependency_id] = x.max_size
+        except KeyError:
+            invalid_tasks.append(task.id)
+        dependency_graph[task.id] = dependency_tasks
+    return (dependency_graph, lazy_dependency_graph, stream_dependency_graph,
+            invalid_tasks)
 
-    def __call__(self, task_output):
-        if task_output.name not in self.task_name_to_task_map:
-            raise TaskonFatalError(
-                "Invalid task name '%s' used in the TaskResult of "
-                "task '%s'." % (task_output.name, self.task.name))
-        task_output.id = self.task_name_to_task_map[task_output.name].id
-        self.dependency_tasks.add(task_output.id)
-        return task_output
+def findCycle(nodes, dependency_graph, lazy_dependency_graph):
+    """
+    A helper used in __preprocessDependencyGraph, executed in a worker
+    process if preprocessing is parallel. Return the cycle path (list of task
+    ids) reachable from @nodes, or None if there is no cycle. Lazy
+    dependencies are considered as well, since pulling a task in cycle would
+    wait forever.
+    """
+    edge_func = lambda task_id: dependency_graph[task_id]
+    if len(lazy_dependency_graph) > 0:
+        edge_func = lambda task_id: (dependency_graph[task_id] |
+                                     lazy_dependency_graph.get(task_id, set()))
+    cycle_detection = cycleDetection(nodes, edge_func)
+    return cycle_detection.cycle_path if cycle_detection.cycle_found else None
 
 
 class TaskRunner:
-    def __init__(self, tasks, task_processor, target_tasks=None):
+    def __init__(self, tasks, task_processor, target_tasks=None,
+                 runtime_store=None, task_fusion=None,
+                 num_preprocess_workers=None, task_speculation=None,
+                 task_deduplication=None, rate_limiting=None,
+                 task_profiler=None, up_to_date_check=None,
+                 num_scheduler_shards=None, memory_budget=None,
+                 deadline_scheduling=None, serial_execution=False):
+        """
+        @tasks - List of tasks, or a taskon.LoadedGraph loaded from a
+                 taskon.GraphFile, whose dependency graph is used as it is,
+                 without preprocessing and validation. @target_tasks must be
+                 None then, the targets are chosen at loading. Refer to
+                 taskon/graph_file.py
+        @runtime_store - An optional taskon.RuntimeStore. If given, the runtime
+                         of the tasks is recorded in it after each run, and the
+                         cost estimates from previous runs are populated in
+                         task.cost_estimate before each run.
+        @task_fusion - An optional taskon.TaskFusion. If given, tiny tasks are
+                       executed in batches and chains, to reduce the
+                       scheduling overhead. Refer to taskon/task_fusion.py
+        @num_preprocess_workers - If given, the extraction of dependencies
+                                  from the inputs of tasks is sharded across a
+                                  pool of these many processes, and the
+                                  validation of cyclic dependencies is done in
+                                  background, overlapping with the rest of
+                                  preprocessing and the execution of tasks.
+                                  Useful for very large graphs, on multi
+                                  core hosts. The worker processes are
+                                  forked, inheriting the tasks instead of
+                                  pickling their inputs. Where fork is not
+                                  available, the dependencies are extracted
+                                  in this process. Refer to 'validate'
+                                  method.
+        @task_speculation - An optional taskon.TaskSpeculation. If given,
+                            duplicate copies of the idempotent stragglers
+                            are launched. Refer to taskon/task_speculation.py
+        @task_deduplication - An optional taskon.TaskDeduplication. If given,
+                              identical pure tasks are executed only once per
+                              run. Refer to taskon/task_deduplication.py
+        @rate_limiting - An optional taskon.RateLimiting. If given, the
+                         dispatch of tasks using rate limited resources is
+                         paced by token buckets. Refer to
+                         taskon/rate_limiting.py
+        @task_profiler - An optional taskon.TaskProfiler. If given, the
+                         selected tasks are profiled by task processors.
+                         Refer to taskon/task_profiler.py
+        @up_to_date_check - An optional taskon.UpToDateCheck. If given, the
+                            tasks whose declared output files are up to date
+                            are not executed, like make. Refer to
+                            taskon/up_to_date_check.py
+        @num_scheduler_shards - If given, the scheduling is partitioned across
+                                these many scheduler threads, for the graphs
+                                of a large number of tiny tasks. The
+                                @task_processor must be thread safe, and the
+                                features above (except @runtime_store and
+                                @task_profiler) are not supported. Refer to
+                                taskon/sharded_scheduling_algorithm.py
+        @memory_budget - An optional taskon.MemoryBudget. If given, the
+                         dispatch of ready tasks is held while they don't
+                         fit in the memory budget. Refer to
+                         taskon/memory_budget.py
+        @deadline_scheduling - An optional taskon.DeadlineScheduling. If
+                               given, the ready tasks are dispatched earliest
+                               deadline first, as per `task.deadline`. Refer
+                               to taskon/deadline_scheduling.py
+        @serial_execution - If True, the effective tasks are executed one by
+                            one in the calling thread, in a precomputed
+                            topological order, without the queues and
+                            callbacks of task scheduler. The @task_processor
+                            must be a NaiveTaskProcessor (its worker
+                            initializer and finalizer are used), and the
+                            features above (except @runtime_store and
+                            @task_profiler) are not supported. Refer to
+                            taskon/serial_scheduling_algorithm.py
+        """
         self.task_processor = task_processor
-        self.__preprocessTasks(tasks, target_tasks or tasks)
+        self.runtime_store = runtime_store
+        self.task_fusion = task_fusion
+        self.task_speculation = task_speculation
+        self.task_deduplication = task_deduplication
+        self.rate_limiting = rate_limiting
+        self.task_profiler = task_profiler
+        self.up_to_date_check = up_to_date_check
+        self.num_scheduler_shards = num_scheduler_shards
+        self.memory_budget = memory_budget
+        self.deadline_scheduling = deadline_scheduling
+        self.serial_execution = serial_execution
+        if isinstance(tasks, LoadedGraph):
+            if target_tasks is not None:
+                raise TaskonFatalError(
+                    "@target_tasks can't be given with a loaded graph.")
+            self.__populateLoadedGraph(tasks)
+        else:
+            tasks = expandSubGraphs(tasks)
+            self.__preprocessTasks(tasks, target_tasks or tasks,
+                                   num_preprocess_workers)
+        if num_scheduler_shards is not None:
+            self.__validateShardedScheduling()
+        if serial_execution:
+            self.__validateSerialExecution()
+        if len(self.stream_dependency_graph) > 0:
+            self.__validateStreams()
+        # Compiled at the first run and reused by the later runs.
+        self.execution_plan = None
+        self.executed_tasks = None
 
-    def __preprocessTasks(self, tasks, target_tasks):
+    def __preprocessTasks(self, tasks, target_tasks, num_preprocess_workers):
         """
         1. Assign a unique integer id to each task. All the references to
            a tasks should also reference it by it's unique integer id instead
@@ -49,8 +199,133 @@ class TaskRunner:
         3. Validate cyclic dependencies among tasks.
         """
         self.__populateTaskIds(tasks, target_tasks)
-        self.__preprocessTaskArgs(self.tasks_map, self.task_name_to_task_map)
-        self.__preprocessDependencyGraph()
+        self.pending_validation = None
+        # Without fork, the workers can't inherit the tasks.
+        if (num_preprocess_workers is None or
+                "fork" not in multiprocessing.get_all_start_methods()):
+            self.__preprocessTaskArgs(self.tasks_map,
+                                      self.task_name_to_task_map)
+            self.__preprocessDependencyGraph()
+            return
+        token = id(self)
+        preprocessed_tasks[token] = (list(self.tasks_map.values()),
+                                     self.task_name_to_task_map)
+        executor = concurrent.futures.ProcessPoolExecutor(
+            num_preprocess_workers,
+            mp_context=multiprocessing.get_context("fork"))
+        try:
+            self.__preprocessTaskArgsInParallel(
+                self.tasks_map, self.task_name_to_task_map, executor,
+                num_preprocess_workers, token)
+            self.pending_validation = executor.submit(
+                findCycle, self.target_tasks, self.dependency_graph,
+                self.lazy_dependency_graph)
+        finally:
+            # Pending validation continues to run after shutdown.
+            executor.shutdown(wait=False)
+            del preprocessed_tasks[token]
+        self.effective_tasks = depsCover(
+            self.target_tasks, lambda task_id: self.dependency_graph[task_id])
+
+    def __validateShardedScheduling(self):
+        if self.num_scheduler_shards < 1:
+            raise TaskonFatalError(
+                "num_scheduler_shards should be positive number")
+        if not self.task_processor.thread_safe:
+            raise TaskonFatalError(
+                "Sharded scheduling requires a thread safe task processor, "
+                "%s is not." % type(self.task_processor).__name__)
+        features = [self.task_fusion, self.task_speculation,
+                    self.task_deduplication, self.rate_limiting,
+                    self.up_to_date_check, self.memory_budget,
+                    self.deadline_scheduling]
+        if any(feature is not None for feature in features):
+            raise TaskonFatalError(
+                "Sharded scheduling doesn't support task fusion, speculation, "
+                "deduplication, rate limiting, up to date checks, memory "
+                "budget and deadline scheduling.")
+        if (len(self.lazy_dependency_graph) > 0 or
+                len(self.stream_dependency_graph) > 0):
+            raise TaskonFatalError(
+                "Sharded scheduling doesn't support LazyTaskResult and "
+                "StreamTaskResult placeholders.")
+
+    def __validateSerialExecution(self):
+        if not isinstance(self.task_processor, NaiveTaskProcessor):
+            raise TaskonFatalError(
+                "Serial execution requires a NaiveTaskProcessor, not %s."
+                % type(self.task_processor).__name__)
+        features = [self.task_fusion, self.task_speculation,
+                    self.task_deduplication, self.rate_limiting,
+                    self.up_to_date_check, self.memory_budget,
+                    self.deadline_scheduling, self.num_scheduler_shards]
+        if any(feature is not None for feature in features):
+            raise TaskonFatalError(
+                "Serial execution doesn't support task fusion, speculation, "
+                "deduplication, rate limiting, up to date checks, memory "
+                "budget, deadline scheduling and scheduler shards.")
+        if (len(self.lazy_dependency_graph) > 0 or
+                len(self.stream_dependency_graph) > 0):
+            raise TaskonFatalError(
+                "Serial execution doesn't support LazyTaskResult and "
+                "StreamTaskResult placeholders.")
+
+    def __validateStreams(self):
+        """
+        Reject the streamed outputs which can't be consumed: A pipeline of
+        tasks connected by streams must run at once, hence it can't have more
+        tasks than the workers of task processor, otherwise it hangs. And the
+        result of a streaming producer is None, hence its dependents other
+        than the stream consumers would get None.
+        """
+        neighbours = dict()
+        for consumer_id, producers in self.stream_dependency_graph.items():
+            for producer_id in producers:
+                neighbours.setdefault(consumer_id, set()).add(producer_id)
+                neighbours.setdefault(producer_id, set()).add(consumer_id)
+        for task_id, deps in itertools.chain(
+                self.dependency_graph.items(),
+                self.lazy_dependency_graph.items()):
+            streams = self.stream_dependency_graph.get(task_id, {})
+            for d in deps:
+                if d in neighbours and d not in streams:
+                    raise TaskonFatalError(
+                        "Task '%s' uses the result of task '%s', whose "
+                        "output is streamed. Use StreamTaskResult instead."
+                        % (self.tasks_map[task_id].name,
+                           self.tasks_map[d].name))
+        num_workers = self.task_processor.getNumWorkers()
+        if num_workers is None:
+            return
+        visited = set()
+        for task_id in neighbours:
+            if task_id in visited:
+                continue
+            pipeline = [task_id]
+            visited.add(task_id)
+            for pipeline_task_id in pipeline:
+                for n in neighbours[pipeline_task_id] - visited:
+                    visited.add(n)
+                    pipeline.append(n)
+            if len(pipeline) > num_workers:
+                raise TaskonFatalError(
+                    "Pipeline of %d streaming tasks including '%s' can't run "
+                    "at once on %s, which executes at most %d tasks at once."
+                    % (len(pipeline), self.tasks_map[task_id].name,
+                       type(self.task_processor).__name__, num_workers))
+
+    def __populateLoadedGraph(self, graph):
+        """
+        Same as __preprocessTasks for a LoadedGraph. Task ids are the indices
+        in @graph.tasks, and the dependency graph is already validated.
+        """
+        self.__populateTaskIds(graph.tasks, graph.target_tasks)
+        self.pending_validation = None
+        self.dependency_graph = graph.dependency_graph
+        self.lazy_dependency_graph = graph.lazy_dependency_graph
+        self.stream_dependency_graph = graph.stream_dependency_graph
+        self.effective_tasks = depsCover(
+            self.target_tasks, lambda task_id: self.dependency_graph[task_id])
 
     def __populateTaskIds(self, tasks, target_tasks):
         """
@@ -76,6 +351,23 @@ class TaskRunner:
                     "present in @tasks" % task.name)
         self.target_tasks = set(task.id for task in target_tasks)
 
+    def __validateTaskInputs(self, task):
+        if not isinstance(task.args, tuple):
+            raise TaskonFatalError(
+                "Task '%s' have invalid value for args field, it should be "
+                "a tuple." % task.name)
+        if not isinstance(task.kwargs, dict):
+            raise TaskonFatalError(
+                "Task '%s' have invalid value for kwargs field, it should "
+                "be a dictionary." % task.name)
+
+    def __getDependencyTask(self, task, name):
+        if name not in self.task_name_to_task_map:
+            raise TaskonFatalError(
+                "Invalid task name '%s' used in the TaskResult of "
+                "task '%s'." % (name, task.name))
+        return self.task_name_to_task_map[name]
+
     def __preprocessTaskArgs(self, tasks, task_name_to_task_map):
         """
         Assume:
@@ -84,21 +376,67 @@ class TaskRunner:
         1. Populate the task.id in TaskResult placeholde.
         2. For each task create a set of dependency tasks by following the
            usage of TaskResult object in inputs of a task.
+        3. Similarly, populate @self.lazy_dependency_graph for the tasks
+           using LazyTaskResult placeholders.
+        4. For the tasks using StreamTaskResult placeholders, populate
+           @self.stream_dependency_graph, a map from task id to the map from
+           streamed dependency task id -> max_size of stream. Streamed
+           dependencies are in @self.dependency_graph as well.
         """
         self.dependency_graph = dict()
+        self.lazy_dependency_graph = dict()
+        self.stream_dependency_graph = dict()
         for task_id, task in tasks.items():
-            dependency_tasks = []
-            if not isinstance(task.args, tuple):
-                raise TaskonFatalError(
-                    "Task '%s' have invalid value for args field, it should be "
-                    "a tuple." % task.name)
-            if not isinstance(task.kwargs, dict):
-                raise TaskonFatalError(
-                    "Task '%s' have invalid value for kwargs field, it should "
-                    "be a dictionary." % task.name)
-            visitor = TaskResultPlaceholderVisitor(task, task_name_to_task_map)
-            task.visitTaskResultPlaceholders(visitor)
-            self.dependency_graph[task_id] = visitor.dependency_tasks
+            self.__validateTaskInputs(task)
+            dependency_tasks = set()
+            for task_output in task.getTaskResultPlaceholders():
+                task_output.id = self.__getDependencyTask(
+                    task, task_output.name).id
+                if isinstance(task_output, LazyTaskResult):
+                    self.lazy_dependency_graph.setdefault(
+                        task_id, set()).add(task_output.id)
+                    continue
+                dependency_tasks.add(task_output.id)
+                if isinstance(task_output, StreamTaskResult):
+                    self.stream_dependency_graph.setdefault(
+                        task_id, dict())[task_output.id] = task_output.max_size
+            self.dependency_graph[task_id] = dependency_tasks
+
+    def __preprocessTaskArgsInParallel(self, tasks, task_name_to_task_map,
+                                       executor, num_workers, token):
+        """
+        Same as __preprocessTaskArgs, but the placeholders are visited in
+        the worker processes of @executor, in shards of tasks. The workers
+        are forked after preprocessed_tasks[@token] is populated with
+        @tasks, hence they inherit the tasks instead of receiving them
+        pickled; only the bounds of shards are sent, and only the parts of
+        dependency graphs are sent back. Hence the TaskResult placeholders
+        are not populated with task.id. Shards failing in a worker process
+        (eg: the worker died) are processed in this process.
+        """
+        self.dependency_graph = dict()
+        self.lazy_dependency_graph = dict()
+        self.stream_dependency_graph = dict()
+        for task in tasks.values():
+            self.__validateTaskInputs(task)
+        shard_size = max(1, -(-len(tasks) // (4 * num_workers)))
+        shards = []
+        for start in range(0, len(tasks), shard_size):
+            end = start + shard_size
+            shards.append((start, end, executor.submit(
+                extractDependencies, token, start, end)))
+        for start, end, future in shards:
+            try:
+                graphs = future.result()
+            except Exception:
+                graphs = extractDependencies(token, start, end)
+            self.dependency_graph.update(graphs[0])
+            self.lazy_dependency_graph.update(graphs[1])
+            self.stream_dependency_graph.update(graphs[2])
+            for task_id in graphs[3]:
+                task = tasks[task_id]
+                for task_output in task.getTaskResultPlaceholders():
+                    self.__getDependencyTask(task, task_output.name)
 
     def __preprocessDependencyGraph(self):
         """
@@ -109,69 +447,311 @@ class TaskRunner:
         """
         nodes = self.target_tasks
         edge_func = lambda task_id: self.dependency_graph[task_id]
+        if len(self.lazy_dependency_graph) > 0:
+            cycle_path = findCycle(nodes, self.dependency_graph,
+                                   self.lazy_dependency_graph)
+            if cycle_path is not None:
+                raise self.__cyclicDependencyError(cycle_path)
+            self.effective_tasks = depsCover(nodes, edge_func)
+            return
         cycle_detection = cycleDetection(nodes, edge_func)
         if cycle_detection.cycle_found:
-            cycle_path = list(self.tasks_map[i].name
-                                 for i in cycle_detection.cycle_path)
-            error = TaskonFatalError(
-                "Cyclic dependency in tasks: " + (" -> ".join(cycle_path)))
-            error.cycle_path = cycle_path
-            raise error
-        self.effective_tasks = depsCover(nodes, edge_func)
+            raise self.__cyclicDependencyError(cycle_detection.cycle_path)
+        self.effective_tasks = cycle_detection.visited
+
+    def __cyclicDependencyError(self, cycle_path):
+        cycle_path = list(self.tasks_map[i].name for i in cycle_path)
+        error = TaskonFatalError(
+            "Cyclic dependency in tasks: " + (" -> ".join(cycle_path)))
+        error.cycle_path = cycle_path
+        return error
+
+    def validate(self):
+        """
+        Wait for the validation of cyclic dependencies, if it's running in
+        background (see @num_preprocess_workers), and raise TaskonFatalError
+        if a cycle is found. 'run' method calls it implicitly. Tasks without
+        any dependency can start executing before the validation completes,
+        however the scheduling stops as soon as a cycle is detected.
+        """
+        if self.pending_validation is None:
+            return
+        cycle_path = self.pending_validation.result()
+        if cycle_path is not None:
+            raise self.__cyclicDependencyError(cycle_path)
 
     def __getTaskInputs(self, task):
         """
         Return the real inputs of a given tasks by replacing the TaskResult
-        placeholder with actual output of the referenced task.
+        placeholder with actual output of the referenced task, the
+        LazyTaskResult placeholder with a TaskFuture and the StreamTaskResult
+        placeholder with a TaskStream.
         """
         args, kwargs = task.visitTaskResultPlaceholders(
-            lambda task_output: self.tasks_map[task_output.id].getResult())
+            lambda task_output: self.__resolvePlaceholder(task, task_output))
         return args, kwargs
 
+    def __getSerialTaskInputs(self, task):
+        """
+        Same as __getTaskInputs for serial execution, where the inputs can
+        have only TaskResult placeholders.
+        """
+        task_name_to_task_map = self.task_name_to_task_map
+        return task.visitTaskResultPlaceholders(
+            lambda task_output:
+                task_name_to_task_map[task_output.name].getResult())
+
+    def __resolvePlaceholder(self, task, task_output):
+        dependency_task = self.task_name_to_task_map[task_output.name]
+        if isinstance(task_output, StreamTaskResult):
+            streams = dependency_task.output_streams
+            if streams is None or task.id not in streams:
+                # Eg: @task is pulled lazily after its producer started.
+                stream = TaskStream(task_output.name, task_output.max_size)
+                stream.finish(error="Task '%s' can't stream the output of "
+                                    "task '%s', which was started before it."
+                                    % (task.name, task_output.name))
+                return stream
+            return streams[task.id]
+        if isinstance(task_output, LazyTaskResult):
+            scheduling_algorithm = self.scheduling_algorithm
+            return TaskFuture(
+                task_output.name,
+                lambda future: scheduling_algorithm.pull(
+                    dependency_task.id, future))
+        return dependency_task.getResult()
+
     def __resetTasks(self):
-        """Reset all the tasks"""
-        for i, task in self.tasks_map.items():
+        """
+        Reset all the tasks. After a complete run, only the tasks executed in
+        that run need to be reset.
+        """
+        if self.executed_tasks is None:
+            tasks = self.tasks_map.values()
+        else:
+            tasks = (self.tasks_map[i] for i in self.executed_tasks)
+        for task in tasks:
             task.reset()
+        self.executed_tasks = None
+
+    def __populateAffinityHints(self):
+        """
+        Populate task.affinity_hint of all the tasks from the dependency
+        graph, weighted by the estimated result size of dependencies. Called
+        once per execution plan, since the graph doesn't change; the weights
+        are as per the cost estimates of its first run.
+        """
+        weights = dict()
+        for task_id, task in self.tasks_map.items():
+            estimate = task.cost_estimate
+            weights[task_id] = (1 if estimate is None
+                                else max(1, estimate.result_size))
+        for task_id, task in self.tasks_map.items():
+            task.affinity_hint = list((d, weights[d])
+                                      for d in self.dependency_graph[task_id])
+
+    def __populateCostEstimates(self):
+        """
+        Populate task.cost_estimate of the effective tasks from
+        @self.runtime_store and compute the @self.predicted_makespan, that is
+        the estimated duration of critical path of effective tasks.
+        """
+        self.num_tasks_without_estimate = 0
+        for task_id in self.effective_tasks:
+            task = self.tasks_map[task_id]
+            task.cost_estimate = self.runtime_store.getEstimate(task)
+            if task.cost_estimate is None:
+                self.num_tasks_without_estimate += 1
+        duration_func = lambda task_id: (
+            0 if self.tasks_map[task_id].cost_estimate is None
+            else self.tasks_map[task_id].cost_estimate.duration)
+        self.predicted_makespan = criticalPath(
+            self.effective_tasks,
+            lambda task_id: self.dependency_graph[task_id],
+            duration_func).length
+
+    def __interruptOnCycle(self, scheduling_algorithm, validation):
+        """Done-callback of the background validation, see 'validate'."""
+        cycle_path = validation.result()
+        if cycle_path is not None:
+            scheduling_algorithm.interrupt(
+                self.__cyclicDependencyError(cycle_path))
 
     def run(self, continue_on_failure=False):
+        if (self.pending_validation is not None and
+                self.pending_validation.done()):
+            self.validate()
         deps_func = lambda task_id: self.dependency_graph[task_id]
-        task_inputs_func = self.__getTaskInputs
+        task_inputs_func = (self.__getSerialTaskInputs
+                            if self.serial_execution else self.__getTaskInputs)
         self.__resetTasks()
-        scheduling_algorithm = SchedulingAlgorithm(
-            self.task_processor, task_inputs_func, self.tasks_map, deps_func)
-        scheduling_algorithm.run(self.effective_tasks, continue_on_failure)
+        new_plan = self.execution_plan is None
+        if new_plan:
+            self.execution_plan = ExecutionPlan(
+                self.effective_tasks, len(self.tasks_map), deps_func)
+        start_tracing = (((self.runtime_store is not None and
+                           self.runtime_store.track_memory) or
+                          (self.task_profiler is not None and
+                           self.task_profiler.track_memory) or
+                          (self.memory_budget is not None and
+                           self.memory_budget.track_memory)) and
+                         not tracemalloc.is_tracing())
+        if self.runtime_store is not None:
+            self.__populateCostEstimates()
+        if self.task_processor.uses_affinity_hint and new_plan:
+            self.__populateAffinityHints()
+        if self.task_profiler is not None:
+            for task in self.task_profiler.selectTasks(
+                    list(self.tasks_map[i] for i in self.effective_tasks)):
+                task.profiler = self.task_profiler
+        if start_tracing:
+            tracemalloc.start()
+        stream_deps_func = None
+        if len(self.stream_dependency_graph) > 0:
+            stream_deps_func = lambda task_id: (
+                self.stream_dependency_graph.get(task_id, {}))
+        if self.serial_execution:
+            scheduling_algorithm = SerialSchedulingAlgorithm(
+                task_inputs_func, self.tasks_map, deps_func,
+                self.task_processor.worker_initializer,
+                self.task_processor.worker_finalizer)
+        elif self.num_scheduler_shards is None:
+            scheduling_algorithm = SchedulingAlgorithm(
+                self.task_processor, task_inputs_func, self.tasks_map,
+                deps_func, stream_deps_func)
+        else:
+            scheduling_algorithm = ShardedSchedulingAlgorithm(
+                self.task_processor, task_inputs_func, self.tasks_map,
+                deps_func, self.num_scheduler_shards)
+        self.scheduling_algorithm = scheduling_algorithm
+        if self.pending_validation is not None:
+            self.pending_validation.add_done_callback(
+                lambda validation: self.__interruptOnCycle(
+                    scheduling_algorithm, validation))
+        start_time = time.time()
+        try:
+            if (self.num_scheduler_shards is None and
+                    not self.serial_execution):
+                scheduling_algorithm.run(
+                    self.execution_plan, continue_on_failure, self.task_fusion,
+                    self.task_speculation, self.task_deduplication,
+                    self.rate_limiting, self.up_to_date_check,
+                    self.memory_budget, self.deadline_scheduling)
+            else:
+                scheduling_algorithm.run(self.execution_plan,
+                                         continue_on_failure)
+        finally:
+            if start_tracing:
+                tracemalloc.stop()
+        self.validate()
+        self.makespan = time.time() - start_time
+        self.num_fused_tasks = scheduling_algorithm.num_fused_tasks
+        if self.task_speculation is not None:
+            self.num_speculated_tasks = (
+                self.task_speculation.num_speculated_tasks)
+        if self.task_deduplication is not None:
+            self.num_deduplicated_tasks = (
+                self.task_deduplication.num_deduplicated_tasks)
+        if self.rate_limiting is not None:
+            self.num_rate_limited_tasks = self.rate_limiting.num_delayed_tasks
+        if self.memory_budget is not None:
+            self.num_memory_delayed_tasks = (
+                self.memory_budget.num_delayed_tasks)
+        if self.up_to_date_check is not None:
+            self.num_up_to_date_tasks = len(
+                self.up_to_date_check.up_to_date_tasks)
+            self.up_to_date_check.save()
+        if self.deadline_scheduling is not None:
+            self.deadline_scheduling.finish()
+        # Effective tasks, followed by the tasks pulled on demand for
+        # LazyTaskResult placeholders.
+        self.executed_tasks = (list(self.effective_tasks) +
+                               scheduling_algorithm.pulled_tasks)
         self.failed_tasks = []
         self.succeeded_tasks = []
         self.skipped_tasks = []
-        for task_id in self.effective_tasks:
+        self.aborted_tasks = []
+        for task_id in self.executed_tasks:
             task = self.tasks_map[task_id]
             if task.status == TaskStatus.SUCCESS:
                 self.succeeded_tasks.append(task)
             elif task.status == TaskStatus.SKIPPED:
                 self.skipped_tasks.append(task)
+            elif task.status == TaskStatus.ABORTED:
+                self.aborted_tasks.append(task)
             else:
                 self.failed_tasks.append(task)
+        if self.runtime_store is not None:
+            self.runtime_store.record(self.succeeded_tasks)
+        if self.task_profiler is not None:
+            self.task_profiler.recordDurations(self.succeeded_tasks)
 
     def getTask(self, task_name):
         if task_name not in self.task_name_to_task_map:
             raise TaskonError("Invalid task '%s'" % task_name)
         return self.task_name_to_task_map[task_name]
 
+    def rebindInputs(self, task_name, args=(), kwargs=None):
+        """
+        Replace the inputs of the leaf task @task_name (a task without
+        dependencies) with @args and @kwargs, for the next runs. Useful for
+        running the same graph repeatedly with different inputs, without
+        constructing a new TaskRunner. The new inputs must not have TaskResult
+        placeholders, since the dependency graph is compiled only once.
+        """
+        task = self.getTask(task_name)
+        kwargs = kwargs or {}
+        if (len(self.dependency_graph[task.id]) > 0 or
+                task.id in self.lazy_dependency_graph):
+            raise TaskonFatalError(
+                "Inputs of task '%s' can't be rebound, it's not a leaf task."
+                % task_name)
+        if len(collectTaskResultPlaceholders((args, kwargs))) > 0:
+            raise TaskonFatalError(
+                "Rebound inputs of task '%s' can't have TaskResult "
+                "placeholders." % task_name)
+        old_inputs = (task.args, task.kwargs)
+        task.args, task.kwargs = args, kwargs
+        try:
+            self.__validateTaskInputs(task)
+        except TaskonFatalError:
+            task.args, task.kwargs = old_inputs
+            raise
+
     def getSuccessSummaryString(self):
         lines = []
-        num_all = len(self.effective_tasks)
+        num_all = len(self.executed_tasks)
         num_s = len(self.succeeded_tasks)
         num_f = len(self.failed_tasks)
         num_skip = len(self.skipped_tasks)
-        info = [(num_s, "succeeded"), (num_f, "failed"), (num_skip, "skipped")]
+        num_abort = len(self.aborted_tasks)
+        info = [(num_s, "succeeded"), (num_f, "failed"), (num_skip, "skipped"),
+                (num_abort, "aborted")]
         for num, name in info:
             if num > 0:
                 lines.append("%s/%s tasks %s." % (num, num_all, name))
-        for i in self.effective_tasks:
+        for i in self.executed_tasks:
             task = self.tasks_map[i]
             lines.append(" %s : %s" % (task.name, task.getStatus().name))
+        if self.runtime_store is not None:
+            lines.append(self.getMakespanSummaryString())
+        if self.deadline_scheduling is not None:
+            lines.append(self.deadline_scheduling.getSummaryString())
         return "\n".join(lines) + "\n"
 
+    def getMakespanSummaryString(self):
+        """
+        Return the predicted (from the runtime of previous runs) vs actual
+        makespan of the last run. Available only if TaskRunner is constructed
+        with a runtime_store.
+        """
+        line = "Makespan: predicted %.3fs, actual %.3fs." % (
+            self.predicted_makespan, self.makespan)
+        if self.num_tasks_without_estimate > 0:
+            line += " %s/%s tasks had no runtime history." % (
+                self.num_tasks_without_estimate, len(self.effective_tasks))
+        return line
+
     def printSuccessSummary(self):
         print(self.getSuccessSummaryString())
 
@@ -0,0 +1,157 @@
+import copy
+import time
+
+from taskon.common import Object
+from taskon.common import TaskStatus
+from taskon.common import taskonAssert
+from taskon.abortable_task import AbortableTask
+
+
+class TaskSpeculation:
+    """
+    Speculative execution of stragglers. When an idempotent task runs far
+    past its expected duration and the task processor has idle workers, a
+    duplicate copy of the task is launched. The first successful copy wins,
+    its result/error is set on the original task and the other copy is
+    aborted (if it is an AbortableTask) or abandoned.
+
+    Idempotent tasks are never executed on the original task object: each
+    execution (attempt) is a separate copy, and only the state of the winner
+    is set on the original task, by task scheduler's thread. Hence a losing
+    copy can't overwrite the state of the original task, even after the end
+    of scheduling.
+
+    A task is idempotent if @is_idempotent(task) returns True. By default a
+    task is idempotent if `task.idempotent` is set True.
+    A task is a straggler if it's running for more than @slowdown_factor times
+    its expected duration and more than @min_duration seconds. Expected
+    duration is given by @expected_duration_func(task), by default it's the
+    duration from task.cost_estimate (see taskon.RuntimeStore). Tasks with
+    unknown (None) expected duration are never speculated.
+
+    Note that the failure of a copy is ignored if the other copy is still
+    running. An abandoned copy of a non-abortable task might still be running
+    after the task scheduler is done, its completion is ignored.
+    """
+    def __init__(self, slowdown_factor=3, min_duration=1.0, check_interval=0.1,
+                 is_idempotent=None, expected_duration_func=None):
+        taskonAssert(slowdown_factor >= 1,
+                     "slowdown_factor should be at least 1")
+        self.slowdown_factor = slowdown_factor
+        self.min_duration = min_duration
+        self.check_interval = check_interval
+        self.is_idempotent = is_idempotent or (lambda task: task.idempotent)
+        self.expected_duration_func = (expected_duration_func or
+                                       self.__estimatedDuration)
+
+    def __estimatedDuration(self, task):
+        if task.cost_estimate is None:
+            return None
+        return task.cost_estimate.duration
+
+    def prepare(self):
+        """Called by task scheduler before the start of scheduling."""
+        # A map from the id of attempts to the Object(original,
+        # running=set-of-running-attempt-ids, num_attempts, winner).
+        self.speculations = dict()
+        self.num_speculated_tasks = 0
+
+    def createAttempt(self, task, attempt_id):
+        """
+        Return the copy of the ready @task with the unique id @attempt_id, to
+        be processed in place of @task. Return None if @task is not
+        idempotent, i.e. can't be speculated and is processed as it is.
+        """
+        if not self.is_idempotent(task):
+            return None
+        speculation = Object(original=task, running=set(), num_attempts=0,
+                             winner=None)
+        return self.__newAttempt(speculation, attempt_id)
+
+    def __newAttempt(self, speculation, attempt_id):
+        # The original task is never executed, hence it's still fresh.
+        attempt = copy.copy(speculation.original)
+        attempt.id = attempt_id
+        attempt.attempt_of = speculation.original.id
+        speculation.running.add(attempt_id)
+        speculation.num_attempts += 1
+        self.speculations[attempt_id] = speculation
+        return attempt
+
+    def originalTask(self, task):
+        """Return the original task of the attempt @task, or @task itself."""
+        speculation = self.speculations.get(task.id)
+        if speculation is None:
+            return task
+        return speculation.original
+
+    def findStragglers(self, tasks_in_progress, num_idle_workers):
+        """
+        Return the list of stragglers among the @tasks_in_progress, to be
+        duplicated. At most @num_idle_workers (if not None) stragglers are
+        returned, the most overdue first.
+        """
+        now = time.time()
+        stragglers = []
+        for task in tasks_in_progress.values():
+            speculation = self.speculations.get(task.id)
+            if (speculation is None or speculation.num_attempts > 1 or
+                    task.start_time is None):
+                continue
+            expected_duration = self.expected_duration_func(task)
+            if expected_duration is None:
+                continue
+            elapsed = now - task.start_time
+            if (elapsed > self.min_duration and
+                    elapsed > self.slowdown_factor * expected_duration):
+                stragglers.append((elapsed / max(expected_duration, 1e-9),
+                                   task))
+        stragglers.sort(key = lambda x: x[0], reverse=True)
+        if num_idle_workers is not None:
+            stragglers = stragglers[:num_idle_workers]
+        return list(task for _, task in stragglers)
+
+    def createCopy(self, task, copy_id):
+        """
+        Create one more attempt of the straggler attempt @task, with the
+        unique id @copy_id.
+        """
+        self.num_speculated_tasks += 1
+        return self.__newAttempt(self.speculations[task.id], copy_id)
+
+    def isSpeculated(self, task):
+        """Whether @task is an attempt, created by this object."""
+        return task.id in self.speculations
+
+    def onComplete(self, task, tasks_in_progress):
+        """
+        Called by task scheduler on the completion of the attempt @task,
+        after setting its status. @tasks_in_progress is the map from task id
+        to the tasks in progress.
+        Return (original_task, losers):
+            original_task - The original task, if its execution is decided
+                            now, otherwise None.
+            losers - List of attempts still running, which lost the race.
+                     They are aborted here if they are AbortableTask.
+        """
+        speculation = self.speculations[task.id]
+        speculation.running.remove(task.id)
+        if (task.status != TaskStatus.SUCCESS and
+                len(speculation.running) > 0):
+            return None, []
+        speculation.winner = task
+        self.__copyState(task, speculation.original)
+        losers = list(tasks_in_progress[task_id]
+                      for task_id in speculation.running)
+        for loser in losers:
+            if isinstance(loser, AbortableTask):
+                loser.abort()
+        return speculation.original, losers
+
+    def __copyState(self, source, target):
+        target.status = source.status
+        target.setResult(source.getResult())
+        target.setError(source.getError())
+        target.start_time = source.start_time
+        target.end_time = source.end_time
+        target.peak_memory = source.peak_memory
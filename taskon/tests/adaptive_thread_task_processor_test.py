@@ -0,0 +1,63 @@
+import unittest
+import time
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import AdaptiveThreadTaskProcessor
+
+
+class AdaptiveThreadTaskProcessorTest(unittest.TestCase):
+    def test_grow_and_shrink(self):
+        lines = []
+        task_processor = AdaptiveThreadTaskProcessor(
+            min_threads=1, max_threads=8, adjust_interval=0.05,
+            log_func=lines.append)
+        io_task = lambda x: (time.sleep(0.02), x)[-1]
+        tasks = list(SimpleTask("io%s" % i, action=io_task, args=(i,))
+                     for i in range(200))
+        tasks.append(SimpleTask(
+            "final", action=lambda *args: (time.sleep(0.5), sum(args))[-1],
+            args=tuple(TaskResult("io%s" % i) for i in range(200))))
+        task_runner = TaskRunner(tasks=tasks, task_processor=task_processor)
+        task_runner.run()
+        self.assertEqual(199*100, task_runner.getTask("final").getResult())
+        log = task_processor.scaling_log
+        self.assertTrue(any(x.to_threads > x.from_threads for x in log))
+        self.assertTrue(any(x.to_threads < x.from_threads for x in log))
+        self.assertTrue(all(1 <= x.to_threads <= 8 for x in log))
+        self.assertEqual(len(log), len(lines))
+        self.assertIn("AdaptiveThreadTaskProcessor: 1 -> 2 threads", lines[0])
+
+    def test_cpu_bound_doesnt_grow(self):
+        def cpu_task():
+            end_time = time.thread_time() + 0.01
+            while time.thread_time() < end_time:
+                pass
+        # The process is reported using a full core, as if it had the
+        # machine for itself. Otherwise, on a loaded machine, the threads
+        # waiting for the GIL or the CPU look blocking.
+        task_processor = AdaptiveThreadTaskProcessor(
+            min_threads=2, max_threads=8, adjust_interval=0.1,
+            cpu_time_func=time.time)
+        tasks = list(SimpleTask("cpu%s" % i, action=cpu_task)
+                     for i in range(100))
+        task_runner = TaskRunner(tasks=tasks, task_processor=task_processor)
+        task_runner.run()
+        self.assertEqual(100, len(task_runner.succeeded_tasks))
+        self.assertFalse(any(x.to_threads > x.from_threads
+                             for x in task_processor.scaling_log))
+        self.assertLessEqual(task_processor.num_threads, 3)
+
+    def test_cancel_on_failure(self):
+        tasks = [SimpleTask("fail", action=lambda: 1/0)]
+        tasks += list(SimpleTask("task%s" % i, action=time.sleep, args=(0.1,))
+                      for i in range(20))
+        task_runner = TaskRunner(
+            tasks=tasks, task_processor=AdaptiveThreadTaskProcessor(
+                min_threads=1, adjust_interval=10))
+        task_runner.run()
+        self.assertEqual(TaskStatus.FAILURE,
+                         task_runner.getTask("fail").getStatus())
+        self.assertGreaterEqual(len(task_runner.aborted_tasks), 19)
@@ -1,42 +1,19 @@
 import unittest
 import time
-import random
 
-from taskon import SimpleTask
-from taskon import TaskResult
 from taskon import TaskRunner
 from taskon import FiniteThreadTaskProcessor
+from taskon import NaiveTaskProcessor
 from taskon import TaskStatus
 from taskon import BashCommandTask
+from taskon.tests.test_utils import createRandomTasks
 
-def TaskType1(*args):
-    return max(args)
-
-def TaskType2(a, b):
-    return a - b
-
-def TaskType3(a, b):
-    return min(a, b)
 
 class BenchmarkTest(unittest.TestCase):
     def test_basic(self):
         num_tasks = 100000
-        tasks = []
-        task_types = [TaskType1, TaskType2, TaskType3]
         time0 = time.time()
-        for i in range(num_tasks):
-            p = random.randint(0, 10)
-            r = p % 3
-            if i < 5:
-                args = (i, i*p, p) if r == 0 else (i, i*2)
-            else:
-                r0 = random.randint(0, i-1)
-                r1 = random.randint(0, i-1)
-                if r == 0:
-                    args = (i, TaskResult(r0), TaskResult(r1))
-                else:
-                    args = (TaskResult(r0), TaskResult(r1))
-            tasks.append(SimpleTask(name=i, action=task_types[r], args=args))
+        tasks = createRandomTasks(num_tasks)
         time1 = time.time()
         task_processor = FiniteThreadTaskProcessor(num_threads=5)
         task_runner = TaskRunner(
@@ -48,3 +25,28 @@ class BenchmarkTest(unittest.TestCase):
         print("Successful tasks = ", len(task_runner.succeeded_tasks))
         print("Time taken = ", (time2 - time1), " seconds")
 
+    def test_serial_execution(self):
+        num_tasks = 50000
+        timings = []
+        results = []
+        for serial_execution in [False, True]:
+            task_runner = TaskRunner(
+                tasks=createRandomTasks(num_tasks, seed=1),
+                task_processor=NaiveTaskProcessor(),
+                serial_execution=serial_execution)
+            # Best of a few runs, the later ones reuse the execution plan.
+            timing = None
+            for i in range(3):
+                time1 = time.time()
+                task_runner.run()
+                time2 = time.time()
+                if timing is None or time2 - time1 < timing:
+                    timing = time2 - time1
+            timings.append(timing)
+            results.append(list(task.getResult()
+                                for task in task_runner.succeeded_tasks))
+        self.assertEqual(num_tasks, len(results[1]))
+        self.assertEqual(results[0], results[1])
+        print("Scheduled run = ", timings[0], " seconds")
+        print("Serial run = ", timings[1], " seconds")
+        print("Speedup = ", timings[0] / timings[1])
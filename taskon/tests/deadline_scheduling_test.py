@@ -0,0 +1,95 @@
+import unittest
+import time
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskonFatalError
+from taskon import DeadlineScheduling
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+from taskon.common import Object
+from taskon.tests.test_utils import ActionRecorder
+
+
+class DeadlineSchedulingTest(unittest.TestCase):
+    def setUp(self):
+        self.recorder = ActionRecorder()
+
+    def createTasks(self):
+        tasks = self.recorder.createTasks("best_effort", 5)
+        tasks.append(SimpleTask("prepare", action=self.recorder.action,
+                                args=("prepare",)))
+        report = SimpleTask("report", action=self.recorder.action,
+                            args=("report", TaskResult("prepare")))
+        report.deadline = 10
+        return tasks + [report]
+
+    def test_earliest_deadline_first(self):
+        task_runner = TaskRunner(
+            tasks=self.createTasks(),
+            task_processor=FiniteThreadTaskProcessor(num_threads=1),
+            deadline_scheduling=DeadlineScheduling())
+        task_runner.run()
+        self.assertEqual(7, len(task_runner.succeeded_tasks))
+        # 'prepare' inherits the deadline of 'report', which overtakes the
+        # best effort tasks becoming ready earlier.
+        self.assertEqual(["prepare", "report"] +
+                         list("best_effort%s" % i for i in range(5)),
+                         self.recorder.calls)
+        self.recorder = ActionRecorder()
+        task_runner = TaskRunner(
+            tasks=self.createTasks(),
+            task_processor=FiniteThreadTaskProcessor(num_threads=1))
+        task_runner.run()
+        self.assertEqual("report", self.recorder.calls[-1])
+
+    def test_least_slack_first(self):
+        tasks = []
+        for name, deadline, duration in [("late", 5, 0.1), ("long", 5, 4),
+                                         ("early", 1, 0.1)]:
+            task = SimpleTask(name, action=self.recorder.action, args=(name,))
+            task.deadline = deadline
+            task.cost_estimate = Object(duration=duration)
+            tasks.append(task)
+        task_runner = TaskRunner(tasks=tasks,
+                                 task_processor=NaiveTaskProcessor(),
+                                 deadline_scheduling=DeadlineScheduling())
+        task_runner.run()
+        # Latest start times are 0.9, 1 and 4.9 seconds.
+        self.assertEqual(["early", "long", "late"], self.recorder.calls)
+
+    def test_misses(self):
+        def fail():
+            raise Exception("failed")
+        def slow():
+            time.sleep(0.1)
+        tasks = [SimpleTask("prepare", action=slow),
+                 SimpleTask("predicted", action=self.recorder.action,
+                            args=("predicted", TaskResult("prepare"))),
+                 SimpleTask("slow", action=slow),
+                 SimpleTask("fail", action=fail),
+                 SimpleTask("on_time", action=self.recorder.action,
+                            args=("on_time",))]
+        tasks[0].cost_estimate = Object(duration=2)
+        for task, deadline in zip(tasks[1:], [1, 0.01, 10, 10]):
+            task.deadline = deadline
+        deadline_scheduling = DeadlineScheduling()
+        task_runner = TaskRunner(
+            tasks=tasks, deadline_scheduling=deadline_scheduling,
+            task_processor=FiniteThreadTaskProcessor(num_threads=2))
+        task_runner.run(continue_on_failure=True)
+        # 'prepare' is estimated to take longer than the deadline of
+        # 'predicted', which still meets it.
+        self.assertEqual(["predicted"], deadline_scheduling.predicted_misses)
+        self.assertEqual(["fail", "slow"],
+                         sorted(deadline_scheduling.actual_misses))
+        self.assertIn("Deadlines: 2/4 missed, 1 predicted.",
+                      task_runner.getSuccessSummaryString())
+
+    def test_unsupported(self):
+        with self.assertRaises(TaskonFatalError):
+            TaskRunner(tasks=self.createTasks(),
+                       task_processor=FiniteThreadTaskProcessor(num_threads=2),
+                       deadline_scheduling=DeadlineScheduling(),
+                       num_scheduler_shards=2)
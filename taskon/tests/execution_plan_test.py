@@ -0,0 +1,65 @@
+import unittest
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import TaskonFatalError
+from taskon import ExecutionPlan
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+
+
+class ExecutionPlanTest(unittest.TestCase):
+    def createTasks(self):
+        return [
+            SimpleTask("a", action=lambda x: x, args=(1,)),
+            SimpleTask("b", action=lambda x: x, args=(2,)),
+            SimpleTask("sum", action=lambda x, y: x + y,
+                       args=(TaskResult("a"), TaskResult("b"))),
+            SimpleTask("double", action=lambda x: 2 * x,
+                       args=(TaskResult("sum"),)),
+            SimpleTask("unused", action=lambda x: x,
+                       args=(TaskResult("a"),))]
+
+    def test_plan(self):
+        deps = {0: set(), 1: set(), 2: set([0, 1]), 3: set([2])}
+        plan = ExecutionPlan(set(deps), 5, lambda task_id: deps[task_id])
+        self.assertEqual(set([0, 1]), set(plan.roots))
+        self.assertEqual(4, len(plan.order))
+        self.assertEqual([2, 3], list(plan.order[2:]))
+        self.assertEqual([0, 0, 2, 1, 0], plan.in_degree)
+        self.assertEqual([(2,), (2,), (3,), (), ()], plan.successors)
+
+    def test_repeated_runs(self):
+        tasks = self.createTasks()
+        for task_processor in [NaiveTaskProcessor(),
+                               FiniteThreadTaskProcessor(num_threads=2)]:
+            task_runner = TaskRunner(tasks=tasks, target_tasks=tasks[3:4],
+                                     task_processor=task_processor)
+            task_runner.run()
+            plan = task_runner.execution_plan
+            self.assertEqual(6, task_runner.getTask("double").getResult())
+            for i in range(5):
+                task_runner.rebindInputs("a", args=(i,))
+                task_runner.rebindInputs("b", kwargs=dict(x=10))
+                task_runner.run()
+                self.assertIs(plan, task_runner.execution_plan)
+                self.assertEqual(2 * (i + 10),
+                                 task_runner.getTask("double").getResult())
+                self.assertEqual(4, len(task_runner.succeeded_tasks))
+                self.assertEqual(TaskStatus.SKIPPED,
+                                 task_runner.getTask("unused").getStatus())
+            task_runner.rebindInputs("a", args=(1,))
+            task_runner.rebindInputs("b", args=(2,))
+
+    def test_invalid_rebinding(self):
+        task_runner = TaskRunner(tasks=self.createTasks(),
+                                 task_processor=NaiveTaskProcessor())
+        with self.assertRaises(TaskonFatalError):
+            task_runner.rebindInputs("sum", args=(1, 2))
+        with self.assertRaises(TaskonFatalError):
+            task_runner.rebindInputs("a", args=(TaskResult("b"),))
+        with self.assertRaises(TaskonFatalError):
+            task_runner.rebindInputs("a", args=[5])
+        self.assertEqual((1,), task_runner.getTask("a").args)
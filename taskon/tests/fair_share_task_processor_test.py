@@ -0,0 +1,117 @@
+import unittest
+import threading
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import FairShareTaskProcessor
+from taskon.tests.test_utils import ActionRecorder
+
+
+class FairShareTaskProcessorTest(unittest.TestCase):
+    def setUp(self):
+        # Tasks advance the clock of the pool by their duration, instead of
+        # sleeping.
+        self.now = 0
+        self.recorder = ActionRecorder(func=self.work)
+        self.done = threading.Semaphore(0)
+        self.statuses = []
+
+    def clock(self):
+        return self.now
+
+    def work(self, name, duration=0.01, *args):
+        self.now += duration
+        return name
+
+    def onComplete(self, task, status):
+        self.statuses.append(status)
+        self.done.release()
+
+    def test_weights(self):
+        pool = FairShareTaskProcessor(num_threads=1, default_cost=0.01,
+                                      clock=self.clock)
+        heavy = pool.tenant("heavy", weight=3)
+        light = pool.tenant("light", weight=1)
+        blocker = threading.Event()
+        heavy.process(SimpleTask("blocker", action=blocker.wait),
+                      self.onComplete)
+        for i in range(8):
+            for tenant in [heavy, light]:
+                tenant.process(SimpleTask(tenant.name,
+                                          action=self.recorder.action),
+                               self.onComplete, tenant.name)
+        blocker.set()
+        for i in range(17):
+            self.done.acquire()
+        pool.close()
+        self.assertEqual(17, self.statuses.count(TaskStatus.SUCCESS))
+        self.assertEqual(6, self.recorder.calls[:8].count("heavy"))
+        self.assertEqual(8, heavy.num_processed - 1)
+        self.assertEqual(8, light.num_processed)
+
+    def test_quota(self):
+        pool = FairShareTaskProcessor(num_threads=4)
+        tenant = pool.tenant("quota", max_running=1)
+        release = threading.Event()
+        recorder = ActionRecorder(func=lambda name: release.wait(timeout=10))
+        for i in range(6):
+            tenant.process(SimpleTask("task%s" % i, action=recorder.action),
+                           self.onComplete, "task%s" % i)
+        recorder.waitForCalls(1)
+        self.assertEqual(0, tenant.getNumIdleWorkers())
+        self.assertEqual(5, len(tenant.queue))
+        release.set()
+        for i in range(6):
+            self.done.acquire()
+        pool.close()
+        self.assertEqual(6, self.statuses.count(TaskStatus.SUCCESS))
+        self.assertEqual(1, recorder.max_running)
+
+    def test_concurrent_runs(self):
+        pool = FairShareTaskProcessor(num_threads=1, default_cost=0.05,
+                                      clock=self.clock)
+        interactive_tenant = pool.tenant("interactive", weight=4)
+        interactive_done = [False]
+        def backfill(name):
+            self.recorder.action(name, 0.05)
+            # Until the interactive run is done, a backfill task completes
+            # only once the next interactive task is queued. Otherwise the
+            # backfill could overtake it while its scheduler is slow.
+            with pool.condition:
+                pool.condition.wait_for(
+                    lambda: (interactive_done[0] or
+                             len(interactive_tenant.queue) > 0), timeout=10)
+        backfill_tasks = list(
+            SimpleTask("backfill%s" % i, action=backfill,
+                       args=("backfill",)) for i in range(40))
+        backfill_run = TaskRunner(tasks=backfill_tasks,
+                                  task_processor=pool.tenant("backfill"))
+        backfill_thread = threading.Thread(target=backfill_run.run)
+        backfill_thread.start()
+        self.recorder.waitForCalls(1)
+        interactive_tasks = [SimpleTask("step0", action=self.recorder.action,
+                                        args=("step0",))]
+        for i in range(1, 5):
+            interactive_tasks.append(SimpleTask(
+                "step%s" % i, action=self.recorder.action,
+                args=("step%s" % i, 0.01, TaskResult("step%s" % (i - 1)))))
+        interactive = TaskRunner(tasks=interactive_tasks,
+                                 task_processor=interactive_tenant)
+        interactive.run()
+        with pool.condition:
+            interactive_done[0] = True
+            pool.condition.notify_all()
+        self.assertEqual("step4", interactive.getTask("step4").getResult())
+        backfill_thread.join()
+        self.assertEqual(40, len(backfill_run.succeeded_tasks))
+        # At most one backfill task between the interactive tasks, even
+        # though 39 of them were queued before.
+        calls = self.recorder.calls
+        for i in range(1, 5):
+            self.assertLessEqual(calls.index("step%s" % i) -
+                                 calls.index("step%s" % (i - 1)), 2)
+        # Tenants are forgotten when closed.
+        self.assertEqual([], pool.tenants)
+        pool.close()
@@ -0,0 +1,158 @@
+import unittest
+import operator
+import os
+import tempfile
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import LazyTaskResult
+from taskon import StreamTaskResult
+from taskon import TaskRunner
+from taskon import TaskonError
+from taskon import TaskonFatalError
+from taskon import GraphFile
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+
+
+def produce(n):
+    for i in range(n):
+        yield i
+
+def consume(stream):
+    return sum(stream)
+
+def pick(future, use):
+    return future.get() if use else -1
+
+
+class GraphFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "graph.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def createTasks(self):
+        tasks = []
+        for i in range(10):
+            tasks.append(SimpleTask("x%s" % i, action=operator.mul,
+                                    args=(i, i)))
+            if i > 0:
+                tasks.append(SimpleTask(
+                    "sum%s" % i, action=operator.add,
+                    args=(TaskResult("x%s" % i), TaskResult(
+                        "sum%s" % (i - 1) if i > 1 else "x0"))))
+        tasks.append(SimpleTask("produce", action=produce, args=(5,)))
+        tasks.append(SimpleTask("consume", action=consume,
+                                args=(StreamTaskResult("produce", 2),)))
+        tasks.append(SimpleTask("pick", action=pick,
+                                args=(LazyTaskResult("sum9"), True)))
+        return tasks
+
+    def saveGraph(self):
+        tasks = self.createTasks()
+        target_tasks = tasks[-3:] + [tasks[0]]
+        task_runner = TaskRunner(
+            tasks=tasks, target_tasks=target_tasks,
+            task_processor=FiniteThreadTaskProcessor(num_threads=4))
+        task_runner.run()
+        self.assertEqual(22, len(task_runner.succeeded_tasks))
+        GraphFile(self.path).save(task_runner)
+
+    def test_save_and_load(self):
+        self.saveGraph()
+        graph = GraphFile(self.path).load()
+        # Lazily pulled tasks are loaded as well.
+        self.assertEqual(22, len(graph.tasks))
+        self.assertEqual(set(["x0", "produce", "consume", "pick"]),
+                         set(task.name for task in graph.target_tasks))
+        for task in graph.tasks:
+            self.assertIsNone(task.getResult())
+        task_runner = TaskRunner(
+            tasks=graph,
+            task_processor=FiniteThreadTaskProcessor(num_threads=4))
+        task_runner.run()
+        self.assertEqual(285, task_runner.getTask("pick").getResult())
+        self.assertEqual(10, task_runner.getTask("consume").getResult())
+        self.assertEqual(22, len(task_runner.succeeded_tasks))
+        graph = GraphFile(self.path).load(["sum3", "x7"])
+        self.assertEqual(["x0", "x1", "x2", "x3", "x7"],
+                         sorted(task.name for task in graph.tasks
+                                if task.name.startswith("x")))
+        self.assertEqual(8, len(graph.tasks))
+        task_runner = TaskRunner(tasks=graph,
+                                 task_processor=NaiveTaskProcessor())
+        task_runner.run()
+        self.assertEqual(14, task_runner.getTask("sum3").getResult())
+        self.assertEqual(49, task_runner.getTask("x7").getResult())
+        with self.assertRaises(TaskonFatalError):
+            TaskRunner(tasks=graph, target_tasks=graph.tasks[:1],
+                       task_processor=NaiveTaskProcessor())
+        with self.assertRaises(TaskonError):
+            GraphFile(self.path).load(["missing"])
+
+    def test_corrupt_files(self):
+        self.saveGraph()
+        with open(self.path, "rb") as f:
+            content = bytearray(f.read())
+        def load(data, target_names=None):
+            with open(self.path, "wb") as f:
+                f.write(data)
+            return GraphFile(self.path).load(target_names)
+        # Corrupt the pickled task "pick", the last one in topological order.
+        corrupt = bytearray(content)
+        corrupt[-3] ^= 0xff
+        self.assertEqual(6, len(load(corrupt, ["sum2", "produce"]).tasks))
+        with self.assertRaises(TaskonError):
+            load(corrupt)
+        version = bytearray(content)
+        version[8] += 1
+        with self.assertRaises(TaskonError):
+            load(version)
+        with self.assertRaises(TaskonError):
+            load(content[:-10])
+        with self.assertRaises(TaskonError):
+            load(b"")
+        self.assertEqual(22, len(load(content).tasks))
+
+    def test_invalid_graph(self):
+        tasks = [SimpleTask("a", action=lambda: 1),
+                 SimpleTask("b", action=operator.neg, args=(TaskResult("a"),))]
+        task_runner = TaskRunner(tasks=tasks,
+                                 task_processor=NaiveTaskProcessor())
+        with self.assertRaises(TaskonFatalError):
+            GraphFile(self.path).save(task_runner)
+        self.assertFalse(os.path.exists(self.path))
+        tasks = [SimpleTask("a", action=operator.neg, args=(TaskResult("b"),)),
+                 SimpleTask("b", action=operator.neg, args=(TaskResult("a"),)),
+                 SimpleTask("c", action=operator.neg, args=(1,))]
+        task_runner = TaskRunner(tasks=tasks, target_tasks=tasks[2:],
+                                 task_processor=NaiveTaskProcessor())
+        with self.assertRaises(TaskonFatalError):
+            GraphFile(self.path).save(task_runner)
+
+    def test_integer_names(self):
+        tasks = [SimpleTask(0, action=operator.neg, args=(3,))]
+        for i in range(1, 12):
+            tasks.append(SimpleTask(i, action=operator.neg,
+                                    args=(TaskResult(i - 1),)))
+        task_runner = TaskRunner(tasks=tasks,
+                                 task_processor=NaiveTaskProcessor())
+        GraphFile(self.path).save(task_runner)
+        # Tasks are found by the strings of their names.
+        graph = GraphFile(self.path).load([2, "10"])
+        self.assertEqual(list(range(11)),
+                         sorted(task.name for task in graph.tasks))
+        task_runner = TaskRunner(tasks=graph,
+                                 task_processor=NaiveTaskProcessor())
+        task_runner.run()
+        self.assertEqual(-3, task_runner.getTask(2).getResult())
+        self.assertEqual(3, task_runner.getTask(9).getResult())
+        tasks = [SimpleTask(1, action=operator.neg, args=(1,)),
+                 SimpleTask("1", action=operator.neg, args=(1,))]
+        task_runner = TaskRunner(tasks=tasks,
+                                 task_processor=NaiveTaskProcessor())
+        with self.assertRaises(TaskonFatalError):
+            GraphFile(self.path).save(task_runner)
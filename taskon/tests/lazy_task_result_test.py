@@ -0,0 +1,102 @@
+import unittest
+
+from taskon.common import TaskonFatalError
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import LazyTaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+from taskon import InfiniteThreadTaskProcessor
+
+
+def chooseBranch(condition, left, right):
+    return left.get() if condition else right.get()
+
+
+class LazyTaskResultTest(unittest.TestCase):
+    def getTasks(self, condition):
+        return [
+            SimpleTask("flour", action=lambda: "flour"),
+            SimpleTask("bread", action=lambda x: x + "-bread",
+                       args=(TaskResult("flour"),)),
+            SimpleTask("rice", action=lambda: "rice"),
+            SimpleTask("condition", action=lambda: condition),
+            SimpleTask("meal", action=chooseBranch,
+                       args=(TaskResult("condition"),),
+                       kwargs=dict(left=LazyTaskResult("bread"),
+                                   right=LazyTaskResult("rice")))]
+
+    def test_pull(self):
+        tasks = self.getTasks(True)
+        task_runner = TaskRunner(
+            tasks=tasks,
+            target_tasks=[tasks[-1]],
+            task_processor=FiniteThreadTaskProcessor(num_threads=2))
+        self.assertEqual(set([3, 4]), task_runner.effective_tasks)
+        task_runner.run()
+        self.assertEqual("flour-bread", task_runner.getTask("meal").getResult())
+        self.assertEqual(TaskStatus.SUCCESS,
+                         task_runner.getTask("flour").getStatus())
+        self.assertEqual(TaskStatus.SKIPPED,
+                         task_runner.getTask("rice").getStatus())
+        self.assertEqual(4, len(task_runner.succeeded_tasks))
+        self.assertTrue("4/4 tasks succeeded" in
+                        task_runner.getSuccessSummaryString())
+        tasks = self.getTasks(False)
+        task_runner = TaskRunner(
+            tasks=tasks,
+            target_tasks=[tasks[-1]],
+            task_processor=InfiniteThreadTaskProcessor())
+        task_runner.run()
+        self.assertEqual("rice", task_runner.getTask("meal").getResult())
+        self.assertEqual(TaskStatus.SKIPPED,
+                         task_runner.getTask("bread").getStatus())
+
+    def test_single_worker(self):
+        # The task waiting for a pull executes the pulled tasks itself,
+        # hence a single worker suffices, even for the nested pulls.
+        tasks = self.getTasks(True) + [
+            SimpleTask("dinner", action=lambda meal: meal.get() + "-dinner",
+                       args=(LazyTaskResult("meal"),))]
+        task_runner = TaskRunner(
+            tasks=tasks,
+            target_tasks=[tasks[-1]],
+            task_processor=FiniteThreadTaskProcessor(num_threads=1))
+        task_runner.run()
+        self.assertEqual("flour-bread-dinner",
+                         task_runner.getTask("dinner").getResult())
+        self.assertEqual(5, len(task_runner.succeeded_tasks))
+
+    def test_failure(self):
+        tasks = self.getTasks(True)
+        tasks[0] = SimpleTask("flour", action=lambda: 1/0)
+        task_runner = TaskRunner(
+            tasks=tasks,
+            target_tasks=[tasks[-1]],
+            task_processor=FiniteThreadTaskProcessor(num_threads=2))
+        task_runner.run(continue_on_failure=True)
+        self.assertEqual(TaskStatus.FAILURE,
+                         task_runner.getTask("flour").getStatus())
+        self.assertEqual(TaskStatus.FAILURE,
+                         task_runner.getTask("meal").getStatus())
+        error = "Lazy dependency task 'bread' didn't execute successfully."
+        self.assertTrue(error in task_runner.getTask("meal").getError())
+        # The task pulling from scheduler thread fails instead of waiting.
+        task_runner = TaskRunner(
+            tasks=self.getTasks(True),
+            task_processor=NaiveTaskProcessor())
+        task_runner.run(continue_on_failure=True)
+        self.assertTrue("can't be requested from the scheduler thread" in
+                        task_runner.getTask("meal").getError())
+
+    def test_cycle(self):
+        t1 = SimpleTask("t1", action=lambda x: x.get(),
+                        args=(LazyTaskResult("t2"),))
+        t2 = SimpleTask("t2", action=lambda x: x, args=(TaskResult("t1"),))
+        with self.assertRaises(TaskonFatalError) as context:
+            TaskRunner(tasks=[t1, t2], target_tasks=[t1],
+                       task_processor=NaiveTaskProcessor())
+        self.assertEqual("Cyclic dependency in tasks: t1 -> t2 -> t1",
+                         str(context.exception))
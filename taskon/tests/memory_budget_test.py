@@ -0,0 +1,104 @@
+import unittest
+import subprocess
+import sys
+import threading
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskFusion
+from taskon import MemoryBudget
+from taskon import FiniteThreadTaskProcessor
+from taskon.common import Object
+from taskon.memory_budget import processMemory
+from taskon.tests.test_utils import ActionRecorder
+
+
+class MemoryBudgetTest(unittest.TestCase):
+    def allocate(self, name, size):
+        return len(bytearray(size))
+
+    def runTasks(self, memory_budget, size=10, num_threads=8, barrier=None):
+        """
+        Run 8 tasks allocating @size bytes each. If @barrier is given, each
+        task waits until its number of tasks are running at once.
+        """
+        self.recorder = ActionRecorder(func=self.allocate, barrier=barrier)
+        task_runner = TaskRunner(
+            tasks=self.recorder.createTasks("task", 8, size),
+            memory_budget=memory_budget,
+            task_processor=FiniteThreadTaskProcessor(
+                num_threads=num_threads))
+        task_runner.run()
+        self.assertEqual(8, len(task_runner.succeeded_tasks))
+        return task_runner
+
+    def test_default_estimate(self):
+        memory_budget = MemoryBudget(budget=100, default_estimate=40,
+                                     usage_func=lambda: 10)
+        task_runner = self.runTasks(memory_budget,
+                                    barrier=threading.Barrier(2))
+        self.assertEqual(2, self.recorder.max_running)
+        self.assertEqual(6, task_runner.num_memory_delayed_tasks)
+
+    def test_high_usage(self):
+        usage = [10**9]
+        memory_budget = MemoryBudget(budget=100, poll_interval=0.01,
+                                     usage_func=lambda: usage[0])
+        # Tasks are dispatched one by one, since nothing else fits.
+        self.runTasks(memory_budget)
+        self.assertEqual(1, self.recorder.max_running)
+        usage[0] = 50
+        self.runTasks(memory_budget, barrier=threading.Barrier(2))
+        self.assertGreaterEqual(self.recorder.max_running, 2)
+
+    def test_learned_estimates(self):
+        size = 10**6
+        memory_budget = MemoryBudget(budget=2.5 * size, track_memory=True,
+                                     usage_func=lambda: 0)
+        self.runTasks(memory_budget, size, barrier=threading.Barrier(4))
+        self.assertGreaterEqual(self.recorder.max_running, 4)
+        # Peaks are learned only from the tasks executing alone.
+        self.runTasks(memory_budget, size, num_threads=1)
+        self.assertGreaterEqual(
+            memory_budget.estimate(SimpleTask("task0", action=self.allocate)),
+            size)
+        self.runTasks(memory_budget, size, barrier=threading.Barrier(2))
+        self.assertEqual(2, self.recorder.max_running)
+
+    def test_fusion(self):
+        memory_budget = MemoryBudget(budget=100, usage_func=lambda: 0)
+        # 'large' would be the chain successor of 'tiny' in the same
+        # FusedTask, if it had no memory estimate.
+        recorder = ActionRecorder(
+            func=lambda name, *args:
+                task_runner.getTask(name).id in memory_budget.reserved)
+        tiny = SimpleTask("tiny", action=recorder.action, args=("tiny",))
+        large = SimpleTask("large", action=recorder.action,
+                           args=("large", TaskResult("tiny")))
+        large.cost_estimate = Object(duration=0, peak_memory=60)
+        task_runner = TaskRunner(
+            tasks=[tiny, large], memory_budget=memory_budget,
+            task_fusion=TaskFusion(fuse_unknown=True),
+            task_processor=FiniteThreadTaskProcessor(num_threads=2))
+        task_runner.run()
+        self.assertEqual(1, task_runner.num_fused_tasks)
+        # Both tasks reserved their estimates while running.
+        self.assertEqual(True, large.getResult())
+        self.assertEqual(True, tiny.getResult())
+
+    @unittest.skipUnless(sys.platform.startswith("linux"),
+                         "processMemory reads /proc")
+    def test_process_memory(self):
+        child = subprocess.Popen(
+            [sys.executable, "-c", "x = bytearray(50 * 10**6); print(1); "
+                                   "import sys; sys.stdin.read()"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        try:
+            child.stdout.readline()
+            self.assertGreater(processMemory(include_children=False), 0)
+            self.assertGreater(processMemory() -
+                               processMemory(include_children=False),
+                               40 * 10**6)
+        finally:
+            child.communicate()
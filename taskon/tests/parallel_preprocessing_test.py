@@ -0,0 +1,81 @@
+import unittest
+import threading
+
+from taskon.common import TaskonFatalError
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+
+from taskon.tests.test_utils import createRandomTasks
+import taskon.tests.sample_tasks as sample_tasks
+
+
+class ParallelPreprocessingTest(unittest.TestCase):
+    def test_random_graph(self):
+        tasks = createRandomTasks(3000, seed=7)
+        task_runner = TaskRunner(
+            tasks=tasks,
+            target_tasks=tasks[-10:],
+            task_processor=FiniteThreadTaskProcessor(num_threads=4))
+        task_runner.run()
+        expected = list(task.getResult() for task in tasks)
+        effective_tasks = task_runner.effective_tasks
+        tasks = createRandomTasks(3000, seed=7)
+        task_runner = TaskRunner(
+            tasks=tasks,
+            target_tasks=tasks[-10:],
+            task_processor=FiniteThreadTaskProcessor(num_threads=4),
+            num_preprocess_workers=2)
+        self.assertEqual(effective_tasks, task_runner.effective_tasks)
+        task_runner.validate()
+        task_runner.run()
+        self.assertEqual(expected, list(task.getResult() for task in tasks))
+
+    def test_unpicklable_inputs(self):
+        lock = threading.Lock()
+        t1 = SimpleTask("t1", action=lambda lock: 5, args=(lock,))
+        t2 = SimpleTask("t2", action=lambda x: x + 1, args=(TaskResult("t1"),))
+        task_runner = TaskRunner(tasks=[t1, t2],
+                                 task_processor=NaiveTaskProcessor(),
+                                 num_preprocess_workers=2)
+        task_runner.run()
+        self.assertEqual(6, task_runner.getTask("t2").getResult())
+        with self.assertRaises(TaskonFatalError) as context:
+            TaskRunner(tasks=[t1, SimpleTask("t3", action=print,
+                                             args=(TaskResult("t4"),))],
+                       task_processor=NaiveTaskProcessor(),
+                       num_preprocess_workers=2)
+        error = "Invalid task name 't4' used in the TaskResult of task 't3'."
+        self.assertEqual(error, str(context.exception))
+
+    def test_cyclic_dependency(self):
+        t1 = SimpleTask(
+            name="make_money",
+            action = sample_tasks.makeMoney,
+            args=(TaskResult("make_sandwitch"),))
+        t2 = SimpleTask(
+            name="make_sandwitch",
+            action = sample_tasks.makeSandwitch,
+            args=(TaskResult("make_bread"), TaskResult("buy_onion"), 10))
+        t3 = SimpleTask(
+            name="buy_onion",
+            action = sample_tasks.buyGoodOnion,
+            args=(TaskResult("make_money"),))
+        t4 = SimpleTask(
+            name="make_bread", action=sample_tasks.makeBread, args=("flour",))
+        # Validation is done in background, hence no error in constructor.
+        task_runner = TaskRunner(tasks = [t1, t2, t3, t4],
+                                 target_tasks = [t1],
+                                 task_processor=NaiveTaskProcessor(),
+                                 num_preprocess_workers=2)
+        with self.assertRaises(TaskonFatalError) as context:
+            task_runner.run()
+        expected_error = "Cyclic dependency in tasks: make_money -> "\
+                         "make_sandwitch -> buy_onion -> make_money"
+        self.assertEqual(expected_error, str(context.exception))
+        self.assertEqual(["make_money", "make_sandwitch", "buy_onion",
+                          "make_money"], context.exception.cycle_path)
+        self.assertEqual(TaskStatus.SKIPPED, t1.getStatus())
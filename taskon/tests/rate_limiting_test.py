@@ -0,0 +1,107 @@
+import unittest
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import TaskonFatalError
+from taskon import RateLimiting
+from taskon import TaskFusion
+from taskon import FiniteThreadTaskProcessor
+from taskon.tests.test_utils import ActionRecorder
+
+
+class RateLimitingTest(unittest.TestCase):
+    def setUp(self):
+        self.api = ActionRecorder()
+
+    def createTasks(self, num_tasks, tokens=1):
+        tasks = self.api.createTasks("call", num_tasks)
+        for task in tasks:
+            task.rate_limited_resources = {"api": tokens}
+        return tasks
+
+    def test_pacing(self):
+        rate_limiting = RateLimiting({"api": (20, 2)})
+        untouched = SimpleTask("untouched", action=lambda: 5)
+        task_runner = TaskRunner(
+            tasks=self.createTasks(10) + [untouched],
+            task_processor=FiniteThreadTaskProcessor(num_threads=10),
+            rate_limiting=rate_limiting)
+        task_runner.run()
+        self.assertEqual(11, len(task_runner.succeeded_tasks))
+        self.assertEqual(8, task_runner.num_rate_limited_tasks)
+        self.assertEqual(5, task_runner.getTask("untouched").getResult())
+        call_times = self.api.call_times
+        # Burst of 2 calls, then one call every 50ms.
+        self.assertGreaterEqual(call_times[-1] - call_times[0], 0.38)
+        for i in range(2, 10):
+            self.assertGreaterEqual(
+                call_times[i] - call_times[0], (i - 1) * 0.05 - 0.01)
+
+    def test_tokens_per_task(self):
+        rate_limiting = RateLimiting({"api": (20, 3)})
+        task_runner = TaskRunner(
+            tasks=self.createTasks(4, tokens=3),
+            task_processor=FiniteThreadTaskProcessor(num_threads=4),
+            rate_limiting=rate_limiting)
+        task_runner.run()
+        self.assertEqual(4, len(task_runner.succeeded_tasks))
+        call_times = self.api.call_times
+        for i in range(1, 4):
+            self.assertGreaterEqual(
+                call_times[i] - call_times[0], i * 0.15 - 0.02)
+
+    def test_fusion(self):
+        # A chain of rate limited tasks, which would be fused otherwise.
+        tasks = [SimpleTask("call0", action=self.api.action,
+                            args=("call0",))]
+        for i in range(1, 4):
+            tasks.append(SimpleTask(
+                "call%s" % i, action=self.api.action,
+                args=("call%s" % i, TaskResult("call%s" % (i - 1)))))
+        for task in tasks:
+            task.rate_limited_resources = {"api": 1}
+        tiny_tasks = list(SimpleTask("tiny%s" % i, action=lambda: None)
+                          for i in range(4))
+        task_runner = TaskRunner(
+            tasks=tasks + tiny_tasks,
+            task_processor=FiniteThreadTaskProcessor(num_threads=1),
+            rate_limiting=RateLimiting({"api": (20, 1)}),
+            task_fusion=TaskFusion(fuse_unknown=True))
+        task_runner.run()
+        self.assertEqual(8, len(task_runner.succeeded_tasks))
+        self.assertEqual(3, task_runner.num_rate_limited_tasks)
+        self.assertEqual(1, task_runner.num_fused_tasks)
+        call_times = self.api.call_times
+        for i in range(1, 4):
+            self.assertGreaterEqual(
+                call_times[i] - call_times[i - 1], 0.04)
+
+    def test_invalid_resources(self):
+        tasks = self.createTasks(1, tokens=3)
+        task_runner = TaskRunner(
+            tasks=tasks, task_processor=FiniteThreadTaskProcessor(1),
+            rate_limiting=RateLimiting({"api": (1, 2)}))
+        with self.assertRaises(TaskonFatalError):
+            task_runner.run()
+        task_runner = TaskRunner(
+            tasks=tasks, task_processor=FiniteThreadTaskProcessor(1),
+            rate_limiting=RateLimiting({"db": (1, 5)}))
+        with self.assertRaises(TaskonFatalError):
+            task_runner.run()
+
+    def test_failure_aborts_held_tasks(self):
+        tasks = self.createTasks(5)
+        # Fails after the first call, while the others are held.
+        tasks.append(SimpleTask("failing",
+                                action=lambda: (self.api.waitForCalls(1),
+                                                1/0)))
+        task_runner = TaskRunner(
+            tasks=tasks, task_processor=FiniteThreadTaskProcessor(2),
+            rate_limiting=RateLimiting({"api": (0.5, 1)}))
+        task_runner.run()
+        self.assertEqual(TaskStatus.FAILURE,
+                         task_runner.getTask("failing").getStatus())
+        self.assertEqual(1, len(self.api.calls))
+        self.assertEqual(4, len(task_runner.aborted_tasks))
@@ -0,0 +1,124 @@
+import unittest
+import threading
+
+from taskon import SimpleTask
+from taskon import BashCommandTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import TaskFusion
+from taskon import RoutingTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+from taskon import InfiniteThreadTaskProcessor
+
+
+class CountingTaskProcessor(FiniteThreadTaskProcessor):
+    def __init__(self, num_threads):
+        FiniteThreadTaskProcessor.__init__(self, num_threads)
+        self.processed = []
+        self.executed = []
+        self.num_closed = 0
+
+    def process(self, task, on_complete_callback, *args, **kwargs):
+        self.processed.append(task.name)
+        FiniteThreadTaskProcessor.process(
+            self, task, on_complete_callback, *args, **kwargs)
+
+    def onComplete(self, task):
+        self.executed.extend(task.getExecutedTaskIds())
+        FiniteThreadTaskProcessor.onComplete(self, task)
+
+    def close(self):
+        self.num_closed += 1
+        FiniteThreadTaskProcessor.close(self)
+
+
+class CancellableTaskProcessor(FiniteThreadTaskProcessor):
+    def __init__(self, num_threads):
+        FiniteThreadTaskProcessor.__init__(self, num_threads)
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        dropped_tasks = FiniteThreadTaskProcessor.cancel(self)
+        self.cancelled.set()
+        return dropped_tasks
+
+
+class RoutingTaskProcessorTest(unittest.TestCase):
+    def test_routing(self):
+        cpu = CountingTaskProcessor(1)
+        io = CountingTaskProcessor(4)
+        bash = CountingTaskProcessor(1)
+        default = CountingTaskProcessor(2)
+        tasks = [BashCommandTask("bash", command="true"),
+                 SimpleTask("fetch", action=lambda: 10),
+                 SimpleTask("compute", action=lambda x: x*2,
+                            args=(TaskResult("fetch"),)),
+                 SimpleTask("big_compute", action=lambda x: x*3,
+                            args=(TaskResult("fetch"),)),
+                 SimpleTask("other", action=lambda: 1)]
+        tasks[1].tags.add("io")
+        task_processor = RoutingTaskProcessor(
+            routes=[(BashCommandTask, bash),
+                    ("io", io),
+                    (lambda task: "compute" in task.name, cpu),
+                    ("unused", io)],
+            default_processor=default)
+        task_runner = TaskRunner(tasks=tasks, task_processor=task_processor)
+        task_runner.run()
+        self.assertEqual(5, len(task_runner.succeeded_tasks))
+        self.assertEqual(30, task_runner.getTask("big_compute").getResult())
+        self.assertEqual(["bash"], bash.processed)
+        self.assertEqual(["fetch"], io.processed)
+        self.assertEqual(["big_compute", "compute"], sorted(cpu.processed))
+        self.assertEqual(["other"], default.processed)
+        self.assertEqual(1, io.num_closed)
+        # Idle workers are not interchangeable across routes.
+        self.assertIsNone(task_processor.getNumIdleWorkers())
+        task_processor = RoutingTaskProcessor(
+            routes=[("io", io)], default_processor=io)
+        self.assertEqual(4, task_processor.getNumIdleWorkers())
+
+    def test_fusion(self):
+        cpu = CountingTaskProcessor(2)
+        io = CountingTaskProcessor(2)
+        tasks = []
+        for i in range(6):
+            tasks.append(SimpleTask("fetch%s" % i, action=lambda: 1))
+            tasks[-1].tags.add("io")
+            # Would be the chain successor of 'fetch<i>', if on same route.
+            tasks.append(SimpleTask("compute%s" % i, action=lambda x: x + 1,
+                                    args=(TaskResult("fetch%s" % i),)))
+        task_runner = TaskRunner(
+            tasks=tasks, task_fusion=TaskFusion(fuse_unknown=True),
+            task_processor=RoutingTaskProcessor(routes=[("io", io)],
+                                                default_processor=cpu))
+        task_runner.run()
+        self.assertEqual(12, len(task_runner.succeeded_tasks))
+        self.assertGreater(task_runner.num_fused_tasks, 0)
+        names = lambda processor: sorted(task_runner.tasks_map[i].name
+                                         for i in processor.executed)
+        self.assertEqual(list("fetch%s" % i for i in range(6)), names(io))
+        self.assertEqual(list("compute%s" % i for i in range(6)), names(cpu))
+
+    def test_cancel(self):
+        started = threading.Event()
+        slow = CancellableTaskProcessor(1)
+        def fail():
+            started.wait(timeout=10)
+            1/0
+        def runSlow():
+            started.set()
+            # Running until the queued tasks are dropped.
+            slow.cancelled.wait(timeout=10)
+        tasks = [SimpleTask("fail", action=fail)]
+        tasks += list(SimpleTask("slow%s" % i, action=runSlow)
+                      for i in range(10))
+        task_runner = TaskRunner(
+            tasks=tasks, task_processor=RoutingTaskProcessor(
+                routes=[(lambda task: task.name.startswith("slow"), slow)],
+                default_processor=InfiniteThreadTaskProcessor()))
+        task_runner.run()
+        self.assertEqual(TaskStatus.FAILURE,
+                         task_runner.getTask("fail").getStatus())
+        self.assertEqual(9, len(task_runner.aborted_tasks))
@@ -0,0 +1,102 @@
+import os
+import time
+import tempfile
+import threading
+import unittest
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import RuntimeStore
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+
+from taskon.tests.test_utils import writeFile
+
+
+class RuntimeStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store_file = os.path.join(self.directory.name, "store.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def getTasks(self):
+        sleep = lambda x, *args: (time.sleep(x), x)[-1]
+        t1 = SimpleTask("task1", action=sleep, args=(0.2,))
+        t2 = SimpleTask("task2", action=sleep, args=(0.1,))
+        t3 = SimpleTask(
+            "task3", action=sleep, args=(0.1, TaskResult("task1"),
+                                         TaskResult("task2")))
+        return [t1, t2, t3]
+
+    def test_basic(self):
+        store = RuntimeStore(self.store_file)
+        tasks = self.getTasks()
+        task_runner = TaskRunner(
+            tasks=tasks,
+            task_processor=FiniteThreadTaskProcessor(num_threads=2),
+            runtime_store=store)
+        task_runner.run()
+        self.assertIsNone(task_runner.getTask("task1").cost_estimate)
+        self.assertEqual(0, task_runner.predicted_makespan)
+        self.assertTrue(
+            "3/3 tasks had no runtime history" in
+            task_runner.getSuccessSummaryString())
+        self.assertTrue(task_runner.getTask("task1").getDuration() >= 0.2)
+
+        # A new store on the same file reads the history of previous run.
+        store = RuntimeStore(self.store_file)
+        estimate = store.getEstimate(tasks[0])
+        self.assertEqual(1, estimate.num_samples)
+        self.assertTrue(estimate.duration >= 0.2)
+        self.assertIsNone(estimate.peak_memory)
+        task_runner = TaskRunner(
+            tasks=self.getTasks(),
+            task_processor=FiniteThreadTaskProcessor(num_threads=2),
+            runtime_store=store)
+        task_runner.run()
+        self.assertEqual(
+            1, task_runner.getTask("task3").cost_estimate.num_samples)
+        self.assertTrue(0.3 <= task_runner.predicted_makespan < 1)
+        self.assertTrue("Makespan: predicted" in
+                        task_runner.getSuccessSummaryString())
+        self.assertEqual(2, store.getEstimate(tasks[2]).num_samples)
+
+    def test_track_memory(self):
+        writeFile(self.store_file, '{"key": "partial li')
+        store = RuntimeStore(self.store_file,
+                             key_func=lambda task: task.getActionIdentity(),
+                             track_memory=True)
+        allocate = lambda n: len(bytearray(n))
+        tasks = [SimpleTask("task1", action=allocate, args=(10**6,)),
+                 SimpleTask("task2", action=allocate, args=(10**5,))]
+        task_runner = TaskRunner(tasks=tasks,
+                                 task_processor=NaiveTaskProcessor(),
+                                 runtime_store=store)
+        task_runner.run()
+        estimate = store.getEstimate(tasks[1])
+        # Both tasks share the same action identity.
+        self.assertEqual(2, estimate.num_samples)
+        self.assertTrue(estimate.peak_memory >= 10**6)
+        self.assertTrue(estimate.result_size > 0)
+
+    def test_overlapping_peaks(self):
+        store = RuntimeStore(self.store_file, track_memory=True)
+        started = threading.Barrier(2)
+        def allocate(n):
+            data = bytearray(n)
+            started.wait()
+            return len(data)
+        tasks = [SimpleTask("task1", action=allocate, args=(10**6,)),
+                 SimpleTask("task2", action=allocate, args=(10**5,))]
+        task_runner = TaskRunner(
+            tasks=tasks,
+            task_processor=FiniteThreadTaskProcessor(num_threads=2),
+            runtime_store=store)
+        task_runner.run()
+        self.assertEqual(2, len(task_runner.succeeded_tasks))
+        # The peaks of overlapping tasks are not recorded.
+        self.assertIsNone(store.getEstimate(tasks[0]).peak_memory)
+        self.assertIsNone(store.getEstimate(tasks[1]).peak_memory)
@@ -0,0 +1,114 @@
+import unittest
+import operator
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import LazyTaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import TaskFusion
+from taskon import TaskonFatalError
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+from taskon.tests.sharded_scheduling_test import createGrid
+
+
+class SerialExecutionTest(unittest.TestCase):
+    def createTasks(self):
+        def fail(*args):
+            raise Exception("failed")
+        return [SimpleTask("a", action=operator.pos, args=(1,)),
+                SimpleTask("fail", action=fail, args=(TaskResult("a"),)),
+                SimpleTask("after_fail", action=operator.pos,
+                           args=(TaskResult("fail"),)),
+                SimpleTask("b", action=operator.add,
+                           args=(TaskResult("a"), 1)),
+                SimpleTask("c", action=operator.add,
+                           args=(TaskResult("b"), 1))]
+
+    def getStatuses(self, task_runner):
+        return dict((task.name, task.getStatus())
+                    for task in task_runner.tasks_map.values())
+
+    def test_results(self):
+        expected = TaskRunner(tasks=createGrid(30, 20),
+                              task_processor=NaiveTaskProcessor())
+        expected.run()
+        task_runner = TaskRunner(tasks=createGrid(30, 20),
+                                 task_processor=NaiveTaskProcessor(),
+                                 serial_execution=True)
+        for i in range(2):
+            task_runner.run()
+            self.assertEqual(601, len(task_runner.succeeded_tasks))
+            for task in task_runner.succeeded_tasks:
+                self.assertEqual(expected.getTask(task.name).getResult(),
+                                 task.getResult())
+
+    def test_failure(self):
+        expected = TaskRunner(tasks=self.createTasks(),
+                              task_processor=NaiveTaskProcessor())
+        expected.run(continue_on_failure=True)
+        task_runner = TaskRunner(tasks=self.createTasks(),
+                                 task_processor=NaiveTaskProcessor(),
+                                 serial_execution=True)
+        task_runner.run(continue_on_failure=True)
+        self.assertEqual(self.getStatuses(expected),
+                         self.getStatuses(task_runner))
+        self.assertEqual(TaskStatus.SKIPPED,
+                         task_runner.getTask("after_fail").getStatus())
+        self.assertEqual(3, task_runner.getTask("c").getResult())
+        self.assertIn("failed", task_runner.getTask("fail").getError())
+        # Stops at the first failure, the rest are skipped.
+        task_runner.run()
+        self.assertEqual(TaskStatus.FAILURE,
+                         task_runner.getTask("fail").getStatus())
+        self.assertEqual(0, len(task_runner.aborted_tasks))
+        self.assertEqual(len(task_runner.skipped_tasks) + 2,
+                         len(task_runner.executed_tasks))
+
+    def test_worker_context(self):
+        contexts = []
+        def initializer(context):
+            contexts.append(context)
+            context.value = 10
+        def finalizer(context):
+            context.closed = True
+        def query(x, ctx):
+            return x + ctx.value
+        task_processor = NaiveTaskProcessor(worker_initializer=initializer,
+                                            worker_finalizer=finalizer)
+        tasks = list(SimpleTask("task%s" % i, action=query, args=(i,),
+                                worker_context_arg="ctx")
+                     for i in range(3))
+        task_runner = TaskRunner(tasks=tasks, task_processor=task_processor,
+                                 serial_execution=True)
+        task_runner.run()
+        self.assertEqual([10, 11, 12],
+                         list(task.getResult() for task in tasks))
+        self.assertEqual(1, len(contexts))
+        self.assertTrue(contexts[0].closed)
+        def failingInitializer(context):
+            raise Exception("no connection")
+        task_runner = TaskRunner(
+            tasks=self.createTasks(), serial_execution=True,
+            task_processor=NaiveTaskProcessor(
+                worker_initializer=failingInitializer))
+        task_runner.run(continue_on_failure=True)
+        self.assertEqual(["a"],
+                         list(task.name for task in task_runner.failed_tasks))
+        self.assertIn("no connection", task_runner.getTask("a").getError())
+
+    def test_unsupported(self):
+        tasks = self.createTasks()
+        with self.assertRaises(TaskonFatalError):
+            TaskRunner(tasks=tasks, serial_execution=True,
+                       task_processor=FiniteThreadTaskProcessor(num_threads=2))
+        with self.assertRaises(TaskonFatalError):
+            TaskRunner(tasks=tasks, serial_execution=True,
+                       task_processor=NaiveTaskProcessor(),
+                       task_fusion=TaskFusion())
+        with self.assertRaises(TaskonFatalError):
+            TaskRunner(tasks=tasks + [SimpleTask(
+                "lazy", action=operator.pos, args=(LazyTaskResult("a"),))],
+                       task_processor=NaiveTaskProcessor(),
+                       serial_execution=True)
@@ -0,0 +1,96 @@
+import unittest
+import operator
+import time
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import LazyTaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import TaskFusion
+from taskon import TaskonFatalError
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+from taskon import FairShareTaskProcessor
+
+
+def createGrid(width, depth):
+    """
+    Return the tasks of a @width x @depth grid, where each task depends on
+    the tasks above-left and above-right of it, and a final 'total' task.
+    """
+    tasks = list(SimpleTask("0_%s" % j, action=operator.pos, args=(j,))
+                 for j in range(width))
+    for i in range(1, depth):
+        for j in range(width):
+            tasks.append(SimpleTask(
+                "%s_%s" % (i, j), action=operator.add,
+                args=(TaskResult("%s_%s" % (i - 1, (j - 1) % width)),
+                      TaskResult("%s_%s" % (i - 1, (j + 1) % width)))))
+    tasks.append(SimpleTask(
+        "total", action=lambda *x: sum(x),
+        args=tuple(TaskResult("%s_%s" % (depth - 1, j))
+                   for j in range(width))))
+    return tasks
+
+
+class ShardedSchedulingTest(unittest.TestCase):
+    def test_results(self):
+        expected = TaskRunner(tasks=createGrid(30, 20),
+                              task_processor=NaiveTaskProcessor())
+        expected.run()
+        pool = FairShareTaskProcessor(num_threads=2)
+        for task_processor in [FiniteThreadTaskProcessor(num_threads=4),
+                               pool.tenant("sharded")]:
+            for num_shards in [1, 3]:
+                task_runner = TaskRunner(
+                    tasks=createGrid(30, 20), task_processor=task_processor,
+                    num_scheduler_shards=num_shards)
+                for i in range(2):
+                    task_runner.run()
+                    self.assertEqual(601, len(task_runner.succeeded_tasks))
+                    for task in task_runner.succeeded_tasks:
+                        self.assertEqual(
+                            expected.getTask(task.name).getResult(),
+                            task.getResult())
+        pool.close()
+
+    def test_failure(self):
+        def fail():
+            raise Exception("failed")
+        def slow(x):
+            time.sleep(0.01)
+            return x
+        tasks = [SimpleTask("fail", action=fail),
+                 SimpleTask("after_fail", action=operator.pos,
+                            args=(TaskResult("fail"),))]
+        tasks += list(SimpleTask("slow%s" % i, action=slow, args=(i,))
+                      for i in range(20))
+        task_runner = TaskRunner(
+            tasks=tasks, num_scheduler_shards=2,
+            task_processor=FiniteThreadTaskProcessor(num_threads=1))
+        task_runner.run(continue_on_failure=True)
+        self.assertEqual(20, len(task_runner.succeeded_tasks))
+        self.assertEqual(["fail"],
+                         list(task.name for task in task_runner.failed_tasks))
+        self.assertEqual(TaskStatus.SKIPPED,
+                         task_runner.getTask("after_fail").getStatus())
+        task_runner.run()
+        self.assertEqual(TaskStatus.FAILURE,
+                         task_runner.getTask("fail").getStatus())
+        self.assertGreater(len(task_runner.aborted_tasks), 0)
+        self.assertLess(len(task_runner.succeeded_tasks), 20)
+
+    def test_unsupported(self):
+        tasks = createGrid(2, 2)
+        with self.assertRaises(TaskonFatalError):
+            TaskRunner(tasks=tasks, task_processor=NaiveTaskProcessor(),
+                       num_scheduler_shards=2)
+        task_processor = FiniteThreadTaskProcessor(num_threads=2)
+        with self.assertRaises(TaskonFatalError):
+            TaskRunner(tasks=tasks, task_processor=task_processor,
+                       task_fusion=TaskFusion(), num_scheduler_shards=2)
+        with self.assertRaises(TaskonFatalError):
+            TaskRunner(tasks=tasks + [SimpleTask(
+                "lazy", action=operator.pos, args=(LazyTaskResult("0_0"),))],
+                       task_processor=task_processor, num_scheduler_shards=2)
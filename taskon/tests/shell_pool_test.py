@@ -0,0 +1,79 @@
+import unittest
+import os
+import tempfile
+import time
+
+from taskon import BashCommandTask
+from taskon import SimpleTask
+from taskon import TaskonError
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import ShellPool
+from taskon import FiniteThreadTaskProcessor
+
+
+class ShellPoolTest(unittest.TestCase):
+    def test_run(self):
+        shell_pool = ShellPool(num_workers=1)
+        self.assertEqual((0, "out\nerr\n"),
+                         shell_pool.run("echo out; echo err >&2"))
+        self.assertEqual((3, ""), shell_pool.run("exit 3"))
+        self.assertEqual((0, "a\nb"), shell_pool.run("printf 'a\\nb'"))
+        # Syntax errors and 'exit' don't affect the worker, and the
+        # working directory is restored. Variables persist.
+        self.assertEqual(2, shell_pool.run("echo 'unbalanced")[0])
+        self.assertEqual((0, ""), shell_pool.run("cd / && X=1"))
+        self.assertEqual((0, os.getcwd() + "\n"), shell_pool.run("pwd"))
+        self.assertEqual((0, "1\n"), shell_pool.run("echo $X"))
+        # A command killing its shell fails alone.
+        with self.assertRaises(TaskonError):
+            shell_pool.run("set -e; false")
+        self.assertEqual((0, "alive\n"), shell_pool.run("echo alive"))
+        shell_pool.close()
+        self.assertEqual((0, "restarted\n"),
+                         shell_pool.run("echo restarted"))
+        shell_pool.close()
+
+    def test_bash_command_tasks(self):
+        shell_pool = ShellPool(num_workers=2, max_batch_size=8)
+        with tempfile.TemporaryDirectory() as directory:
+            tasks = []
+            for i in range(50):
+                tasks.append(BashCommandTask(
+                    "copy%s" % i, shell_pool=shell_pool,
+                    command="echo %s > %s/file%s; cat %s/file%s" % (
+                        i, directory, i, directory, i)))
+            tasks.append(BashCommandTask("fail", shell_pool=shell_pool,
+                                         command="echo failing; false"))
+            task_runner = TaskRunner(
+                tasks=tasks,
+                task_processor=FiniteThreadTaskProcessor(num_threads=8))
+            task_runner.run(continue_on_failure=True)
+            self.assertEqual(50, len(task_runner.succeeded_tasks))
+            self.assertEqual("7\n", task_runner.getTask("copy7").output)
+            self.assertEqual(50, len(os.listdir(directory)))
+        fail = task_runner.getTask("fail")
+        self.assertEqual(TaskStatus.FAILURE, fail.getStatus())
+        self.assertIn("failed with error_code 1\nfailing", fail.getError())
+        shell_pool.close()
+
+    def test_abort(self):
+        shell_pool = ShellPool(num_workers=1)
+        command = BashCommandTask("command", shell_pool=shell_pool,
+                                  command="sleep 30")
+        queued = BashCommandTask("queued", shell_pool=shell_pool,
+                                 command="sleep 30")
+        def fail():
+            time.sleep(0.1)
+            raise Exception("Failed")
+        task_runner = TaskRunner(
+            tasks=[command, queued, SimpleTask("fail", action=fail)],
+            task_processor=FiniteThreadTaskProcessor(num_threads=3))
+        start_time = time.time()
+        task_runner.run()
+        self.assertLess(time.time() - start_time, 5)
+        for task in [command, queued]:
+            self.assertEqual(TaskStatus.ABORTED, task.getStatus())
+            self.assertIn("aborted", task.getError())
+        self.assertEqual((0, "alive\n"), shell_pool.run("echo alive"))
+        shell_pool.close()
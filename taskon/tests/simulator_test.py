@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import RuntimeStore
+from taskon import Simulator
+from taskon import NaiveTaskProcessor
+
+
+def createTasks():
+    """
+    a(1) -> c(3) -> e(1)
+    b(2) -> d(1) ---^
+    """
+    add = lambda *args: sum(args)
+    return [SimpleTask("a", action=add, args=(1,)),
+            SimpleTask("b", action=add, args=(2,)),
+            SimpleTask("c", action=add, args=(TaskResult("a"),)),
+            SimpleTask("d", action=add, args=(TaskResult("b"),)),
+            SimpleTask("e", action=add, args=(TaskResult("c"),
+                                              TaskResult("d")))]
+
+
+DURATIONS = dict(a=1, b=2, c=3, d=1, e=1)
+
+
+class SimulatorTest(unittest.TestCase):
+    def test_makespan(self):
+        task_runner = TaskRunner(tasks=createTasks(),
+                                 task_processor=NaiveTaskProcessor())
+        duration_func = lambda task: DURATIONS[task.name]
+        result = Simulator(1, duration_func).simulate(task_runner)
+        self.assertEqual(8, result.makespan)
+        self.assertEqual(1.0, result.average_utilization)
+        result = Simulator(2, duration_func).simulate(task_runner)
+        self.assertEqual(5, result.makespan)
+        self.assertEqual(0.8, result.average_utilization)
+        self.assertEqual([(0, 2, 2), (3, 1, 1), (5, 0, 0)], result.profile)
+        self.assertEqual(5, result.critical_path.length)
+        self.assertEqual(["a", "c", "e"], result.critical_path.path)
+        result = Simulator(None, duration_func).simulate(task_runner)
+        self.assertEqual(5, result.makespan)
+        self.assertIsNone(result.average_utilization)
+        # Nothing is executed.
+        self.assertEqual(None, task_runner.getTask("e").getResult())
+
+    def test_target_tasks(self):
+        tasks = createTasks()
+        task_runner = TaskRunner(tasks=tasks, target_tasks=[tasks[3]],
+                                 task_processor=NaiveTaskProcessor())
+        result = Simulator(4, lambda task: DURATIONS[task.name]).simulate(
+            task_runner)
+        self.assertEqual(3, result.makespan)
+        self.assertEqual(["b", "d"], result.critical_path.path)
+
+    def test_runtime_store_estimates(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "runtime.jsonl")
+            task_runner = TaskRunner(tasks=createTasks(),
+                                     task_processor=NaiveTaskProcessor(),
+                                     runtime_store=RuntimeStore(path))
+            task_runner.run()
+            task_runner = TaskRunner(tasks=createTasks(),
+                                     task_processor=NaiveTaskProcessor(),
+                                     runtime_store=RuntimeStore(path))
+            result = Simulator(2).simulate(task_runner)
+            self.assertGreater(result.makespan, 0)
+            self.assertLess(result.makespan, 1)
+            result = Simulator(2, default_duration=7).simulate(
+                TaskRunner(tasks=createTasks(),
+                           task_processor=NaiveTaskProcessor()))
+            self.assertEqual(21, result.makespan)
@@ -0,0 +1,121 @@
+import unittest
+import itertools
+import threading
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import StreamTaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import TaskFusion
+from taskon import TaskonFatalError
+from taskon import LazyTaskResult
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+from taskon import InfiniteThreadTaskProcessor
+
+
+class StreamTaskResultTest(unittest.TestCase):
+    def test_pipeline(self):
+        lock = threading.Lock()
+        events = []
+        def log(event):
+            with lock:
+                events.append(event)
+        def read(n):
+            for i in range(n):
+                log("read %s" % i)
+                yield "%s,%s" % (i, i*i)
+        def parse(lines):
+            for line in lines:
+                log("parse")
+                yield tuple(int(x) for x in line.split(","))
+        def write(rows, offset):
+            return sum(a + b for a, b in rows) + offset
+        tasks = [SimpleTask("offset", action=lambda: 1000),
+                 SimpleTask("read", action=read, args=(50,)),
+                 SimpleTask("parse", action=parse,
+                            args=(StreamTaskResult("read", max_size=2),)),
+                 SimpleTask("write", action=write,
+                            args=(StreamTaskResult("parse"),
+                                  TaskResult("offset")))]
+        for task_processor in [InfiniteThreadTaskProcessor(),
+                               FiniteThreadTaskProcessor(num_threads=3)]:
+            events.clear()
+            task_runner = TaskRunner(tasks=tasks,
+                                     task_processor=task_processor)
+            task_runner.run()
+            self.assertEqual(4, len(task_runner.succeeded_tasks))
+            expected = sum(i + i*i for i in range(50)) + 1000
+            self.assertEqual(expected,
+                             task_runner.getTask("write").getResult())
+            self.assertIsNone(task_runner.getTask("read").getResult())
+            # Parsing starts before reading completes, and reading is at most
+            # a few chunks ahead of parsing (backpressure).
+            self.assertLess(events.index("parse"), events.index("read 49"))
+            num_read, num_parsed = 0, 0
+            for event in events:
+                if event == "parse":
+                    num_parsed += 1
+                else:
+                    num_read += 1
+                self.assertLessEqual(num_read - num_parsed, 4)
+
+    def test_producer_failure(self):
+        def read():
+            yield 1
+            raise Exception("Disk error")
+        tasks = [SimpleTask("read", action=read),
+                 SimpleTask("sum", action=sum,
+                            args=(StreamTaskResult("read"),))]
+        task_runner = TaskRunner(tasks=tasks,
+                                 task_processor=InfiniteThreadTaskProcessor())
+        task_runner.run(continue_on_failure=True)
+        self.assertEqual(TaskStatus.FAILURE,
+                         task_runner.getTask("read").getStatus())
+        self.assertIn("Disk error", task_runner.getTask("read").getError())
+        self.assertEqual(TaskStatus.FAILURE,
+                         task_runner.getTask("sum").getStatus())
+        self.assertIn("Streaming task 'read' failed",
+                      task_runner.getTask("sum").getError())
+
+    def test_consumer_stops_early(self):
+        produced = []
+        def numbers():
+            for i in itertools.count():
+                produced.append(i)
+                yield i
+        take = lambda stream: list(itertools.islice(stream, 3))
+        tasks = [SimpleTask("numbers", action=numbers),
+                 SimpleTask("take", action=take,
+                            args=(StreamTaskResult("numbers", max_size=1),))]
+        task_runner = TaskRunner(tasks=tasks,
+                                 task_processor=FiniteThreadTaskProcessor(2),
+                                 task_fusion=TaskFusion(fuse_unknown=True))
+        task_runner.run()
+        self.assertEqual(2, len(task_runner.succeeded_tasks))
+        self.assertEqual([0, 1, 2], task_runner.getTask("take").getResult())
+        self.assertLess(len(produced), 10)
+        self.assertEqual(0, task_runner.num_fused_tasks)
+
+    def test_unsupported(self):
+        tasks = [SimpleTask("read", action=lambda: iter([1, 2])),
+                 SimpleTask("double", action=lambda rows: list(rows) * 2,
+                            args=(StreamTaskResult("read"),)),
+                 SimpleTask("sum", action=sum,
+                            args=(StreamTaskResult("double"),))]
+        # The pipeline of 3 tasks would hang.
+        for task_processor in [NaiveTaskProcessor(),
+                               FiniteThreadTaskProcessor(num_threads=2)]:
+            with self.assertRaises(TaskonFatalError):
+                TaskRunner(tasks=tasks, task_processor=task_processor)
+        task_runner = TaskRunner(
+            tasks=tasks, task_processor=FiniteThreadTaskProcessor(3))
+        task_runner.run()
+        self.assertEqual(6, task_runner.getTask("sum").getResult())
+        # Result of a streaming producer is None.
+        for placeholder in [TaskResult("read"), LazyTaskResult("read")]:
+            with self.assertRaises(TaskonFatalError):
+                TaskRunner(tasks=tasks + [SimpleTask(
+                               "count", action=len, args=(placeholder,))],
+                           task_processor=InfiniteThreadTaskProcessor())
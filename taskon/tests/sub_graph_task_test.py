@@ -0,0 +1,86 @@
+import unittest
+import threading
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskonFatalError
+from taskon import SubGraphTask
+from taskon import FiniteThreadTaskProcessor
+
+
+class SubGraphTaskTest(unittest.TestCase):
+    def createPipeline(self, name, source):
+        """Return a sub-graph computing (source + 1) * 2 + (source + 1)."""
+        return SubGraphTask(name, output="total", tasks=[
+            SimpleTask("inc", action=lambda x: x + 1,
+                       args=(TaskResult(source),)),
+            SimpleTask("double", action=lambda x: x * 2,
+                       args=(TaskResult("inc"),)),
+            SimpleTask("total", action=lambda x, y: x + y,
+                       args=(TaskResult("double"), TaskResult("inc")))])
+
+    def test_basic(self):
+        tasks = [SimpleTask("a", action=lambda: 1),
+                 SimpleTask("b", action=lambda: 10),
+                 self.createPipeline("p1", "a"),
+                 self.createPipeline("p2", "b"),
+                 SimpleTask("sum", action=lambda x, y: x + y,
+                            args=(TaskResult("p1"), TaskResult("p2")))]
+        # One thread is enough, no worker waits for a sub-graph.
+        task_runner = TaskRunner(
+            tasks=tasks, target_tasks=tasks[-1:],
+            task_processor=FiniteThreadTaskProcessor(num_threads=1))
+        task_runner.run()
+        self.assertEqual(6 + 33, task_runner.getTask("sum").getResult())
+        self.assertEqual(4, task_runner.getTask("p1/double").getResult())
+        self.assertEqual(11, len(task_runner.succeeded_tasks))
+        # Each sub-graph has its own copies of the mutable attributes.
+        task_runner.getTask("p1/inc").tags.add("io")
+        task_runner.getTask("p1/inc").rate_limited_resources["api"] = 1
+        for task in [task_runner.getTask("p2/inc"), tasks[2].tasks[0]]:
+            self.assertEqual(set(), task.tags)
+            self.assertEqual({}, task.rate_limited_resources)
+
+    def test_nested_and_parallel(self):
+        # Inner tasks run in parallel with each other and with the parent
+        # graph, otherwise they can't all meet at the barrier.
+        barrier = threading.Barrier(3)
+        meet = lambda x: (barrier.wait(timeout=10), x)[-1]
+        inner = SubGraphTask("inner", output="join", tasks=[
+            SimpleTask("left", action=meet, args=(TaskResult("start"),)),
+            SimpleTask("right", action=meet, args=(TaskResult("start"),)),
+            SimpleTask("join", action=lambda x, y: x + y,
+                       args=(TaskResult("left"), TaskResult("right")))])
+        outer = SubGraphTask("outer", output="inner", tasks=[
+            SimpleTask("start", action=lambda: 5), inner])
+        tasks = [outer, SimpleTask("other", action=meet, args=(1,))]
+        task_runner = TaskRunner(
+            tasks=tasks,
+            task_processor=FiniteThreadTaskProcessor(num_threads=3))
+        task_runner.run()
+        self.assertEqual(7, len(task_runner.succeeded_tasks))
+        self.assertEqual(10, task_runner.getTask("outer").getResult())
+        self.assertEqual(
+            5, task_runner.getTask("outer/inner/left").getResult())
+        # The given tasks are copied, not modified.
+        self.assertEqual("left", inner.tasks[0].name)
+
+    def test_reused_nested_sub_graph(self):
+        inner = self.createPipeline("inner", "start")
+        for source in [1, 10]:
+            outer = SubGraphTask("outer", output="inner", tasks=[
+                SimpleTask("start", action=lambda x=source: x), inner])
+            task_runner = TaskRunner(
+                tasks=[outer],
+                task_processor=FiniteThreadTaskProcessor(num_threads=2))
+            task_runner.run()
+            self.assertEqual((source + 1) * 3,
+                             task_runner.getTask("outer").getResult())
+            # The nested sub-graph is expanded in a copy.
+            self.assertEqual((), inner.args)
+
+    def test_invalid_output(self):
+        with self.assertRaises(TaskonFatalError):
+            SubGraphTask("sub", output="missing",
+                         tasks=[SimpleTask("a", action=lambda: 1)])
@@ -0,0 +1,92 @@
+import unittest
+import threading
+import time
+
+from taskon import SimpleTask
+from taskon import BashCommandTask
+from taskon import AbortableTask
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import FiniteThreadTaskProcessor
+from taskon import InfiniteThreadTaskProcessor
+
+
+class WaitUntilAbortedTask(AbortableTask):
+    def __init__(self, name):
+        AbortableTask.__init__(self, name)
+        self.aborted = threading.Event()
+
+    def run(self):
+        if not self.aborted.wait(10):
+            return "not aborted"
+        raise Exception("Aborted")
+
+    def abort(self):
+        self.aborted.set()
+
+
+def failingAction():
+    time.sleep(0.1)
+    raise Exception("Failed")
+
+
+class TaskCancellationTest(unittest.TestCase):
+    def test_queued_tasks_are_aborted(self):
+        num_calls = [0]
+        def action():
+            num_calls[0] += 1
+            time.sleep(0.5)
+        tasks = [SimpleTask("fail", action=failingAction)]
+        tasks += list(SimpleTask("task%s" % i, action=action)
+                      for i in range(10))
+        task_processor = FiniteThreadTaskProcessor(num_threads=1)
+        task_runner = TaskRunner(tasks=tasks, task_processor=task_processor)
+        start_time = time.time()
+        task_runner.run()
+        self.assertLess(time.time() - start_time, 2)
+        self.assertEqual(TaskStatus.FAILURE,
+                         task_runner.getTask("fail").getStatus())
+        self.assertEqual(10 - num_calls[0], len(task_runner.aborted_tasks))
+        self.assertLessEqual(num_calls[0], 1)
+        for task in task_runner.aborted_tasks:
+            self.assertEqual(TaskStatus.ABORTED, task.getStatus())
+        self.assertTrue("tasks aborted." in
+                        task_runner.getSuccessSummaryString())
+        self.assertTrue("fail" in task_runner.getErrorSummaryString())
+
+    def test_running_abortable_task_is_aborted(self):
+        slow = WaitUntilAbortedTask("slow")
+        fail = SimpleTask("fail", action=failingAction)
+        task_runner = TaskRunner(
+            tasks=[slow, fail],
+            task_processor=InfiniteThreadTaskProcessor())
+        start_time = time.time()
+        task_runner.run()
+        self.assertLess(time.time() - start_time, 5)
+        self.assertTrue(slow.aborted.is_set())
+        self.assertEqual(TaskStatus.ABORTED, slow.getStatus())
+        self.assertEqual(TaskStatus.FAILURE, fail.getStatus())
+
+    def test_continue_on_failure_runs_all(self):
+        tasks = [SimpleTask("fail", action=failingAction)]
+        tasks += list(SimpleTask("task%s" % i, action=lambda: 1)
+                      for i in range(5))
+        task_runner = TaskRunner(
+            tasks=tasks, task_processor=FiniteThreadTaskProcessor(1))
+        task_runner.run(continue_on_failure=True)
+        self.assertEqual(5, len(task_runner.succeeded_tasks))
+        self.assertEqual(0, len(task_runner.aborted_tasks))
+
+    def test_running_command_is_killed(self):
+        command = BashCommandTask("command", command="sleep 10")
+        fail = SimpleTask("fail", action=failingAction)
+        task_runner = TaskRunner(
+            tasks=[command, fail],
+            task_processor=InfiniteThreadTaskProcessor())
+        start_time = time.time()
+        task_runner.run()
+        self.assertLess(time.time() - start_time, 5)
+        # Reported aborted only after the command is killed.
+        self.assertEqual(TaskStatus.ABORTED, command.getStatus())
+        self.assertIsNone(command.process)
+        self.assertIn("aborted", command.getError())
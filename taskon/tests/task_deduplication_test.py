@@ -0,0 +1,84 @@
+import unittest
+import threading
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import TaskDeduplication
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+from taskon.tests.test_utils import ActionRecorder
+
+
+class TaskDeduplicationTest(unittest.TestCase):
+    def setUp(self):
+        self.fetcher = ActionRecorder(func=lambda path: "content of %s" % path)
+
+    def createTasks(self, num_branches):
+        tasks = []
+        for i in range(num_branches):
+            fetch = SimpleTask("fetch%s" % i, action=self.fetcher.action,
+                               args=("file%s" % (i % 3),))
+            fetch.pure = True
+            tasks.append(fetch)
+            tasks.append(SimpleTask("use%s" % i, action=lambda x: x.upper(),
+                                    args=(TaskResult("fetch%s" % i),)))
+        return tasks
+
+    def test_in_flight_and_finished(self):
+        # With threads, the 3 distinct fetches are held until all of them
+        # are running, so that their duplicates are found in flight.
+        for task_processor, barrier in [
+                (FiniteThreadTaskProcessor(num_threads=4),
+                 threading.Barrier(3)),
+                (NaiveTaskProcessor(), None)]:
+            self.fetcher = ActionRecorder(
+                func=lambda path: "content of %s" % path, barrier=barrier)
+            task_runner = TaskRunner(
+                tasks=self.createTasks(50), task_processor=task_processor,
+                task_deduplication=TaskDeduplication())
+            task_runner.run()
+            self.assertEqual(["file0", "file1", "file2"],
+                             sorted(self.fetcher.calls))
+            self.assertEqual(47, task_runner.num_deduplicated_tasks)
+            self.assertEqual(100, len(task_runner.succeeded_tasks))
+            for i in range(50):
+                self.assertEqual("CONTENT OF FILE%s" % (i % 3),
+                                 task_runner.getTask("use%s" % i).getResult())
+
+    def test_disabled_by_default(self):
+        task_runner = TaskRunner(
+            tasks=self.createTasks(6), task_processor=NaiveTaskProcessor())
+        task_runner.run()
+        self.assertEqual(6, len(self.fetcher.calls))
+
+    def test_impure_and_different_inputs(self):
+        tasks = self.createTasks(6)
+        tasks[0].pure = False
+        tasks.append(SimpleTask("other", action=lambda path: path,
+                                args=("file0",)))
+        tasks[-1].pure = True
+        task_runner = TaskRunner(
+            tasks=tasks, task_processor=NaiveTaskProcessor(),
+            task_deduplication=TaskDeduplication())
+        task_runner.run()
+        self.assertEqual(["file0", "file0", "file1", "file2"],
+                         sorted(self.fetcher.calls))
+        self.assertEqual(2, task_runner.num_deduplicated_tasks)
+        self.assertEqual("file0", task_runner.getTask("other").getResult())
+
+    def test_failure_is_reused(self):
+        def fail(x):
+            raise Exception("Failed %s" % x)
+        tasks = list(SimpleTask("task%s" % i, action=fail, args=(1,))
+                     for i in range(4))
+        task_runner = TaskRunner(
+            tasks=tasks, task_processor=FiniteThreadTaskProcessor(2),
+            task_deduplication=TaskDeduplication(is_pure=lambda task: True))
+        task_runner.run(continue_on_failure=True)
+        self.assertEqual(4, len(task_runner.failed_tasks))
+        self.assertEqual(3, task_runner.num_deduplicated_tasks)
+        for task in tasks:
+            self.assertEqual(TaskStatus.FAILURE, task.getStatus())
+            self.assertIn("Failed 1", task.getError())
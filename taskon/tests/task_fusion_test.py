@@ -0,0 +1,97 @@
+import unittest
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import TaskFusion
+from taskon import BashCommandTask
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+from taskon.common import Object
+
+from taskon.tests.test_utils import createRandomTasks
+
+
+class TaskFusionTest(unittest.TestCase):
+    def test_random_graph(self):
+        tasks = createRandomTasks(2000, seed=5)
+        task_runner = TaskRunner(
+            tasks=tasks,
+            task_processor=FiniteThreadTaskProcessor(num_threads=4))
+        task_runner.run()
+        expected = list(task.getResult() for task in tasks)
+        fused_tasks = createRandomTasks(2000, seed=5)
+        task_runner = TaskRunner(
+            tasks=fused_tasks,
+            task_processor=FiniteThreadTaskProcessor(num_threads=4),
+            task_fusion=TaskFusion(max_batch_size=8, fuse_unknown=True))
+        task_runner.run()
+        self.assertEqual(2000, len(task_runner.succeeded_tasks))
+        self.assertEqual(expected, list(t.getResult() for t in fused_tasks))
+        self.assertTrue(0 < task_runner.num_fused_tasks < 2000)
+
+    def test_chain(self):
+        t1 = SimpleTask("t1", action=lambda: 1)
+        t2 = SimpleTask("t2", action=lambda x: x + 1, args=(TaskResult("t1"),))
+        t3 = SimpleTask("t3", action=lambda x: x * 3, args=(TaskResult("t2"),))
+        t4 = BashCommandTask("t4", command="true", args=(TaskResult("t3"),))
+        t5 = SimpleTask("t5", action=lambda x: x, args=(TaskResult("t3"),))
+        task_runner = TaskRunner(
+            tasks=[t1, t2, t3, t4, t5],
+            task_processor=NaiveTaskProcessor(),
+            task_fusion=TaskFusion(fuse_unknown=True))
+        task_runner.run()
+        self.assertEqual(5, len(task_runner.succeeded_tasks))
+        self.assertEqual(6, task_runner.getTask("t5").getResult())
+        # t1 -> t2 -> t3 is a chain, executed in one FusedTask. t4 is not
+        # fusible, t5 is executed in another FusedTask.
+        self.assertEqual(2, task_runner.num_fused_tasks)
+        self.assertTrue(t1.getDuration() is not None)
+
+    def test_failure(self):
+        t1 = SimpleTask("t1", action=lambda: 1/0)
+        t2 = SimpleTask("t2", action=lambda x: x, args=(TaskResult("t1"),))
+        t3 = SimpleTask("t3", action=lambda: 3)
+        t4 = SimpleTask("t4", action=lambda x: x, args=(TaskResult("t3"),))
+        task_runner = TaskRunner(
+            tasks=[t1, t2, t3, t4],
+            task_processor=FiniteThreadTaskProcessor(num_threads=2),
+            task_fusion=TaskFusion(max_batch_size=4, fuse_unknown=True))
+        task_runner.run(continue_on_failure=True)
+        self.assertEqual(TaskStatus.FAILURE, t1.getStatus())
+        self.assertTrue("ZeroDivisionError" in t1.getError())
+        self.assertEqual(TaskStatus.SKIPPED, t2.getStatus())
+        self.assertEqual(TaskStatus.SUCCESS, t4.getStatus())
+        self.assertEqual(3, task_runner.getTask("t4").getResult())
+        task_runner.run()
+        self.assertEqual(TaskStatus.FAILURE, t1.getStatus())
+        self.assertEqual(TaskStatus.SKIPPED, t2.getStatus())
+
+    def test_unknown_cost(self):
+        tasks = list(SimpleTask("t%s" % i, action=lambda: 1)
+                     for i in range(4))
+        tasks[0].cost_estimate = Object(duration=0.0001)
+        tasks[1].cost_estimate = Object(duration=1)
+        task_runner = TaskRunner(tasks=tasks,
+                                 task_processor=NaiveTaskProcessor(),
+                                 task_fusion=TaskFusion())
+        task_runner.run()
+        self.assertEqual(4, len(task_runner.succeeded_tasks))
+        # Only the task estimated to be tiny is fused.
+        self.assertEqual(1, task_runner.num_fused_tasks)
+
+    def test_idle_workers(self):
+        tasks = list(SimpleTask("t%s" % i, action=lambda: 1)
+                     for i in range(8))
+        task_runner = TaskRunner(
+            tasks=tasks,
+            task_processor=FiniteThreadTaskProcessor(num_threads=4),
+            task_fusion=TaskFusion(fuse_unknown=True))
+        task_runner.run()
+        self.assertEqual(8, len(task_runner.succeeded_tasks))
+        # One batch per idle worker, instead of a single batch of 8.
+        self.assertEqual(4, task_runner.num_fused_tasks)
+        self.assertEqual([[0, 2], [1, 3]],
+                         list(list(task.id for task in batch) for batch in
+                              TaskFusion().batch(tasks[:4], num_idle=2)))
@@ -1,4 +1,5 @@
 import unittest
+import queue
 import time
 
 from taskon import SimpleTask
@@ -7,6 +8,8 @@ from taskon import TaskRunner
 from taskon import FiniteThreadTaskProcessor
 from taskon import TaskStatus
 from taskon import BashCommandTask
+from taskon.common import Object
+from taskon.task_fusion import FusedTask
 
 class FiniteThreadTaskProcessorTest(unittest.TestCase):
     def test_basic(self):
@@ -92,4 +95,75 @@ class FiniteThreadTaskProcessorTest(unittest.TestCase):
         self.assertEqual(
             TaskStatus.SKIPPED, task_runner.getTask("task8").getStatus())
 
+    def test_prefer_locality(self):
+        step = lambda x, worker: (time.sleep(0.01), x + [worker.worker_id])[-1]
+        tasks = []
+        for chain in range(4):
+            tasks.append(SimpleTask("chain%s_0" % chain, action=step,
+                                    args=([],), worker_context_arg="worker"))
+            for i in range(1, 10):
+                tasks.append(SimpleTask(
+                    "chain%s_%s" % (chain, i), action=step,
+                    args=(TaskResult("chain%s_%s" % (chain, i-1)),),
+                    worker_context_arg="worker"))
+        task_processor = FiniteThreadTaskProcessor(
+            num_threads=4, prefer_locality=True)
+        task_runner = TaskRunner(tasks=tasks, task_processor=task_processor)
+        task_runner.run()
+        workers = set()
+        for chain in range(4):
+            workers_of_chain = task_runner.getTask(
+                "chain%s_9" % chain).getResult()
+            self.assertEqual(10, len(workers_of_chain))
+            self.assertEqual(1, len(set(workers_of_chain)))
+            workers.add(workers_of_chain[0])
+        self.assertEqual(4, len(workers))
+        self.assertEqual([("chain0_0", 1)],
+                         list((task_runner.tasks_map[d].name, w) for d, w in
+                              task_runner.getTask("chain0_1").affinity_hint))
+        # Hints are computed once per execution plan.
+        affinity_hint = task_runner.getTask("chain0_1").affinity_hint
+        task_runner.run()
+        self.assertIs(affinity_hint,
+                      task_runner.getTask("chain0_1").affinity_hint)
 
+    def test_locality_of_executed_tasks(self):
+        # Affinity hints refer to the member tasks of a FusedTask and to the
+        # original task of a speculated attempt, not to the processed task.
+        def createTask(task_id, affinity_hint=None):
+            task = SimpleTask("task%s" % task_id,
+                              action=lambda worker: worker.worker_id,
+                              worker_context_arg="worker")
+            task.id = task_id
+            task.affinity_hint = affinity_hint
+            return task
+        for reverse in [False, True]:
+            task_processor = FiniteThreadTaskProcessor(
+                num_threads=4, prefer_locality=True)
+            completed = queue.Queue()
+            def process(task):
+                task_processor.process(
+                    task, lambda task, status: completed.put(task))
+                task_processor.onComplete(completed.get(timeout=10))
+            fused_task = FusedTask(
+                10, [createTask(1), createTask(2)],
+                Object(task_inputs_func=lambda task: ((), {}),
+                       chain_next={}))
+            attempt = createTask(11)
+            attempt.attempt_of = 3
+            # Both are running when dispatched, hence on different threads.
+            tasks = [fused_task, attempt]
+            for task in (reversed(tasks) if reverse else tasks):
+                task_processor.process(
+                    task, lambda task, status: completed.put(task))
+            for i in range(2):
+                task_processor.onComplete(completed.get(timeout=10))
+            member_dependent = createTask(4, [(2, 1)])
+            attempt_dependent = createTask(5, [(3, 1)])
+            process(member_dependent)
+            process(attempt_dependent)
+            task_processor.close()
+            self.assertEqual(fused_task.members[1].getResult(),
+                             member_dependent.getResult())
+            self.assertEqual(attempt.getResult(),
+                             attempt_dependent.getResult())
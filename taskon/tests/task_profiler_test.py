@@ -0,0 +1,86 @@
+import unittest
+import pstats
+import tempfile
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskProfiler
+from taskon import FiniteThreadTaskProcessor
+
+
+def busyLoop(n):
+    return sum(i * i for i in range(n))
+
+def allocate(n):
+    return len(bytearray(n))
+
+BUSY = __name__ + ".busyLoop"
+ALLOC = __name__ + ".allocate"
+
+
+class TaskProfilerTest(unittest.TestCase):
+    def createTasks(self):
+        tasks = []
+        for i in range(3):
+            tasks.append(SimpleTask("busy%s" % i, action=busyLoop,
+                                    args=(20000 * (i + 1),)))
+        tasks.append(SimpleTask("alloc", action=allocate, args=(10**6,)))
+        tasks.append(SimpleTask("total", action=lambda *x: sum(x), args=tuple(
+            TaskResult(task.name) for task in tasks)))
+        return tasks
+
+    def test_name_pattern(self):
+        task_profiler = TaskProfiler(name_pattern="busy*")
+        task_runner = TaskRunner(
+            tasks=self.createTasks(), task_profiler=task_profiler,
+            task_processor=FiniteThreadTaskProcessor(num_threads=2))
+        task_runner.run()
+        self.assertEqual([BUSY],
+                         list(task_profiler.actions.keys()))
+        aggregate = task_profiler.actions[BUSY]
+        self.assertEqual(3, aggregate.num_profiled)
+        self.assertIsNone(aggregate.peak_memory)
+        self.assertTrue(any(func[2] == "busyLoop"
+                            for func in aggregate.stats.stats))
+        self.assertIsNone(task_runner.getTask("alloc").profiler)
+        stacks = task_profiler.getCollapsedStacks()
+        self.assertTrue(len(stacks) > 0)
+        for line in stacks:
+            stack, value = line.rsplit(" ", 1)
+            self.assertTrue(stack.startswith(BUSY + ";"))
+            self.assertTrue(int(value) >= 0)
+        self.assertTrue(any("(busyLoop)" in line for line in stacks))
+        with tempfile.TemporaryDirectory() as directory:
+            paths = task_profiler.dumpStats(directory)
+            self.assertEqual(1, len(paths))
+            stats = pstats.Stats(paths[0])
+            self.assertEqual(3, sum(nc for (f, l, name), (cc, nc, tt, ct, _)
+                                    in stats.stats.items()
+                                    if name == "busyLoop"))
+
+    def test_top_slowest(self):
+        task_profiler = TaskProfiler(top_slowest=1)
+        task_runner = TaskRunner(
+            tasks=self.createTasks(), task_profiler=task_profiler,
+            task_processor=FiniteThreadTaskProcessor(num_threads=1))
+        # Durations are unknown in the first run.
+        task_runner.run()
+        self.assertEqual(0, len(task_profiler.actions))
+        task_runner.run()
+        self.assertEqual(1, len(task_profiler.actions))
+        slowest = max(task_runner.succeeded_tasks,
+                      key = lambda task: task.getDuration())
+        self.assertIs(task_profiler, slowest.profiler)
+        self.assertIn(slowest.getActionIdentity(), task_profiler.actions)
+        summary = task_profiler.getSummaryString()
+        self.assertIn("1 profiled", summary)
+
+    def test_memory(self):
+        task_profiler = TaskProfiler(name_pattern="alloc", track_memory=True)
+        task_runner = TaskRunner(
+            tasks=self.createTasks(), task_profiler=task_profiler,
+            task_processor=FiniteThreadTaskProcessor(num_threads=1))
+        task_runner.run()
+        aggregate = task_profiler.actions[ALLOC]
+        self.assertGreaterEqual(aggregate.peak_memory, 10**6)
@@ -0,0 +1,130 @@
+import unittest
+import threading
+import time
+
+from taskon import SimpleTask
+from taskon import AbortableTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import TaskSpeculation
+from taskon import FiniteThreadTaskProcessor
+from taskon import InfiniteThreadTaskProcessor
+
+
+class SlowFirstTask(AbortableTask):
+    """
+    An abortable task whose first execution is a straggler, which waits until
+    aborted.
+    """
+    def __init__(self, name):
+        AbortableTask.__init__(self, name)
+        self.num_runs = [0]
+        self.aborted = threading.Event()
+
+    def run(self):
+        self.num_runs[0] += 1
+        if self.num_runs[0] == 1:
+            if not self.aborted.wait(10):
+                return "straggler"
+            raise Exception("Aborted")
+        return "copy"
+
+    def abort(self):
+        self.aborted.set()
+
+
+class SlowFirstSimpleTask(SimpleTask):
+    """
+    A non abortable task whose first execution is a straggler, which waits
+    for @release. Records the task objects it's executed on.
+    """
+    def __init__(self, name):
+        SimpleTask.__init__(self, name, action=None)
+        self.executed_on = []
+        self.release = threading.Event()
+
+    def run(self):
+        self.executed_on.append(self)
+        if len(self.executed_on) == 1:
+            self.release.wait(10)
+            return "late"
+        return "copy"
+
+
+class TaskSpeculationTest(unittest.TestCase):
+    def test_straggler(self):
+        num_calls = [0]
+        def action(x):
+            num_calls[0] += 1
+            if num_calls[0] == 1:
+                time.sleep(2)
+            return x * 2
+        t1 = SimpleTask("t1", action=action, args=(5,))
+        t1.idempotent = True
+        t2 = SimpleTask("t2", action=lambda x: x + 1, args=(TaskResult("t1"),))
+        speculation = TaskSpeculation(
+            min_duration=0.2, check_interval=0.05,
+            expected_duration_func=lambda task: 0.01)
+        task_runner = TaskRunner(
+            tasks=[t1, t2],
+            task_processor=FiniteThreadTaskProcessor(num_threads=2),
+            task_speculation=speculation)
+        start_time = time.time()
+        task_runner.run()
+        self.assertTrue(time.time() - start_time < 1.5)
+        self.assertEqual(1, task_runner.num_speculated_tasks)
+        self.assertEqual(TaskStatus.SUCCESS, t1.getStatus())
+        self.assertEqual(11, task_runner.getTask("t2").getResult())
+
+    def test_abort_loser(self):
+        t1 = SlowFirstTask("t1")
+        t1.idempotent = True
+        t2 = SimpleTask("t2", action=lambda x: x, args=(TaskResult("t1"),))
+        # Not idempotent, hence never speculated.
+        t3 = SimpleTask("t3", action=lambda: time.sleep(0.5))
+        speculation = TaskSpeculation(
+            min_duration=0.1, check_interval=0.05,
+            expected_duration_func=lambda task: 0.01)
+        task_runner = TaskRunner(
+            tasks=[t1, t2, t3],
+            task_processor=InfiniteThreadTaskProcessor(),
+            task_speculation=speculation)
+        task_runner.run()
+        self.assertTrue(t1.aborted.is_set())
+        self.assertEqual(1, task_runner.num_speculated_tasks)
+        self.assertEqual(3, len(task_runner.succeeded_tasks))
+        self.assertEqual("copy", task_runner.getTask("t2").getResult())
+        self.assertIsNone(t1.getError())
+
+    def test_no_idle_workers(self):
+        t1 = SimpleTask("t1", action=lambda: time.sleep(0.5))
+        t1.idempotent = True
+        speculation = TaskSpeculation(
+            min_duration=0.1, check_interval=0.05,
+            expected_duration_func=lambda task: 0.01)
+        task_runner = TaskRunner(
+            tasks=[t1],
+            task_processor=FiniteThreadTaskProcessor(num_threads=1),
+            task_speculation=speculation)
+        task_runner.run()
+        self.assertEqual(0, task_runner.num_speculated_tasks)
+        self.assertEqual(TaskStatus.SUCCESS, t1.getStatus())
+
+    def test_late_loser(self):
+        t1 = SlowFirstSimpleTask("t1")
+        t1.idempotent = True
+        speculation = TaskSpeculation(
+            min_duration=0.1, check_interval=0.05,
+            expected_duration_func=lambda task: 0.01)
+        task_runner = TaskRunner(
+            tasks=[t1], task_processor=InfiniteThreadTaskProcessor(),
+            task_speculation=speculation)
+        task_runner.run()
+        t1.release.set()
+        self.assertEqual(1, task_runner.num_speculated_tasks)
+        self.assertEqual("copy", t1.getResult())
+        # Both attempts were executed on their own copies, hence the late
+        # loser can't overwrite the original task.
+        self.assertEqual(2, len(t1.executed_on))
+        self.assertNotIn(t1, t1.executed_on)
@@ -1,6 +1,11 @@
 import os
+import random
+import threading
+import time
 
 from taskon.common import TaskonError
+from taskon import SimpleTask
+from taskon import TaskResult
 
 def readFile(fn, mode='r'):
     with open(fn, mode, encoding="utf8", errors='ignore') as fd:
@@ -9,3 +14,91 @@ def readFile(fn, mode='r'):
 def writeFile(fn, data, mode='w'):
     with open(fn, mode) as fd:
         fd.write(data)
+
+def TaskType1(*args):
+    return max(args)
+
+def TaskType2(a, b):
+    return a - b
+
+def TaskType3(a, b):
+    return min(a, b)
+
+def createRandomTasks(num_tasks, seed=None):
+    """
+    Create @num_tasks SimpleTasks named by integers, each depending on up
+    to two random earlier tasks. The graph is reproducible for a @seed.
+    """
+    rng = random.Random(seed)
+    tasks = []
+    task_types = [TaskType1, TaskType2, TaskType3]
+    for i in range(num_tasks):
+        p = rng.randint(0, 10)
+        r = p % 3
+        if i < 5:
+            args = (i, i*p, p) if r == 0 else (i, i*2)
+        else:
+            r0 = rng.randint(0, i-1)
+            r1 = rng.randint(0, i-1)
+            if r == 0:
+                args = (i, TaskResult(r0), TaskResult(r1))
+            else:
+                args = (TaskResult(r0), TaskResult(r1))
+        tasks.append(SimpleTask(name=i, action=task_types[r], args=args))
+    return tasks
+
+
+class ActionRecorder:
+    """
+    Thread safe recorder of the calls of its 'action' method, used as the
+    action of test tasks. Records the names of the calls in their order, the
+    time of the calls and the max number of calls running at once.
+
+    Instead of sleeping in the action, a test can set a @barrier, which holds
+    each call until the given number of calls are running at once.
+    """
+    def __init__(self, func=None, barrier=None):
+        """
+        @func - If given, 'action(name, *args)' returns func(name, *args),
+                otherwise it returns name.
+        """
+        self.func = func
+        self.barrier = barrier
+        self.condition = threading.Condition()
+        self.calls = []
+        self.call_times = []
+        self.num_running = 0
+        self.max_running = 0
+
+    def action(self, name, *args):
+        with self.condition:
+            self.calls.append(name)
+            self.call_times.append(time.monotonic())
+            self.num_running += 1
+            self.max_running = max(self.max_running, self.num_running)
+            self.condition.notify_all()
+        try:
+            result = name if self.func is None else self.func(name, *args)
+            if self.barrier is not None:
+                self.barrier.wait(timeout=10)
+        finally:
+            with self.condition:
+                self.num_running -= 1
+        return result
+
+    def waitForCalls(self, num_calls, timeout=10):
+        """Wait until at least @num_calls calls are recorded."""
+        with self.condition:
+            if not self.condition.wait_for(
+                    lambda: len(self.calls) >= num_calls, timeout):
+                raise TaskonError("Timed out waiting for %s calls" %
+                                  num_calls)
+
+    def createTasks(self, prefix, num_tasks, *args):
+        """
+        Create @num_tasks SimpleTasks named '<prefix><i>', whose action is
+        'action' with the task name and @args.
+        """
+        return list(SimpleTask("%s%s" % (prefix, i), action=self.action,
+                               args=("%s%s" % (prefix, i),) + args)
+                    for i in range(num_tasks))
@@ -0,0 +1,109 @@
+import unittest
+import os
+import tempfile
+import time
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import UpToDateCheck
+from taskon import FiniteThreadTaskProcessor
+
+
+class UpToDateCheckTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.executed = []
+        self.src = self.path("src")
+        self.write(self.src, "hello")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def write(self, path, content):
+        with open(path, "w") as f:
+            f.write(content)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def transform(self, name, source, target, func, dependency=None):
+        self.executed.append(name)
+        self.write(target, func(self.read(source)))
+
+    def createTasks(self):
+        obj, binary = self.path("obj"), self.path("bin")
+        compile_task = SimpleTask(
+            "compile", action=self.transform,
+            args=("compile", self.src, obj, str.upper))
+        compile_task.input_files = [self.src]
+        compile_task.output_files = [obj]
+        link = SimpleTask(
+            "link", action=self.transform,
+            args=("link", obj, binary, lambda x: x + "!",
+                  TaskResult("compile")))
+        link.input_files = [obj]
+        link.output_files = [binary]
+        report = SimpleTask(
+            "report", action=lambda name, x: self.executed.append(name),
+            args=("report", TaskResult("link")))
+        report.input_files = [binary]
+        return [compile_task, link, report]
+
+    def runTasks(self, up_to_date_check):
+        self.executed = []
+        task_runner = TaskRunner(
+            tasks=self.createTasks(), up_to_date_check=up_to_date_check,
+            task_processor=FiniteThreadTaskProcessor(num_threads=2))
+        task_runner.run()
+        self.assertEqual(3, len(task_runner.succeeded_tasks))
+        return task_runner
+
+    def touch(self, path, delta):
+        mtime = time.time() + delta
+        os.utime(path, (mtime, mtime))
+
+    def test_mtime(self):
+        up_to_date_check = UpToDateCheck()
+        self.runTasks(up_to_date_check)
+        self.assertEqual(["compile", "link", "report"], self.executed)
+        self.assertEqual("HELLO!", self.read(self.path("bin")))
+        task_runner = self.runTasks(up_to_date_check)
+        # Tasks without output files always run.
+        self.assertEqual(["report"], self.executed)
+        self.assertEqual(2, task_runner.num_up_to_date_tasks)
+        # Source is newer than the output of compile.
+        self.touch(self.path("obj"), -100)
+        self.runTasks(up_to_date_check)
+        self.assertEqual(["compile", "link", "report"], self.executed)
+        os.remove(self.path("bin"))
+        self.runTasks(up_to_date_check)
+        self.assertEqual(["link", "report"], self.executed)
+
+    def test_dirty_propagation(self):
+        up_to_date_check = UpToDateCheck()
+        self.runTasks(up_to_date_check)
+        # Outputs of link look newer than its input, still it runs because
+        # compile was executed.
+        self.touch(self.path("bin"), 100)
+        os.remove(self.path("obj"))
+        self.runTasks(up_to_date_check)
+        self.assertEqual(["compile", "link", "report"], self.executed)
+
+    def test_hash(self):
+        state_path = self.path("state.json")
+        self.runTasks(UpToDateCheck(method="hash", state_path=state_path))
+        self.assertEqual(["compile", "link", "report"], self.executed)
+        # Same content with a newer mtime, in a new process.
+        self.write(self.src, "hello")
+        self.touch(self.src, 10)
+        self.runTasks(UpToDateCheck(method="hash", state_path=state_path))
+        self.assertEqual(["report"], self.executed)
+        self.write(self.src, "world")
+        self.runTasks(UpToDateCheck(method="hash", state_path=state_path))
+        self.assertEqual(["compile", "link", "report"], self.executed)
+        self.assertEqual("WORLD!", self.read(self.path("bin")))
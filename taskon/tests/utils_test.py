@@ -2,6 +2,8 @@ import unittest
 
 from taskon.common import taskonAssert
 from taskon.common import TaskonFatalError
+from taskon.utils import criticalPath
+from taskon.utils import callableIdentity
 from taskon.tests.test_utils import writeFile, readFile
 
 
@@ -16,3 +18,19 @@ class TaskonUtilsTest(unittest.TestCase):
         file = "/tmp/taskon_null_test_writeFile"
         writeFile(file, "XyZ")
         self.assertEqual(readFile(file), "XyZ")
+
+    def test_criticalPath(self):
+        edges = {1: [], 2: [1], 3: [1], 4: [2, 3], 5: []}
+        cost = {1: 1, 2: 5, 3: 2, 4: 1, 5: 6}
+        result = criticalPath(edges.keys(), lambda n: edges[n],
+                              lambda n: cost[n])
+        self.assertEqual(7, result.length)
+        self.assertEqual([1, 2, 4], result.path)
+        self.assertEqual(0, criticalPath([], None, None).length)
+
+    def test_callableIdentity(self):
+        square = lambda x: x * x
+        cube = lambda x: x * x * x
+        self.assertNotEqual(callableIdentity(square), callableIdentity(cube))
+        self.assertEqual("taskon.utils.criticalPath",
+                         callableIdentity(criticalPath))
@@ -0,0 +1,89 @@
+import unittest
+import threading
+
+from taskon import SimpleTask
+from taskon import TaskResult
+from taskon import TaskRunner
+from taskon import TaskStatus
+from taskon import TaskFusion
+from taskon import NaiveTaskProcessor
+from taskon import FiniteThreadTaskProcessor
+
+
+class WorkerContextTest(unittest.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.opened = []
+        self.closed = []
+
+    def initializer(self, context):
+        with self.lock:
+            self.opened.append(context.worker_id)
+        context.connection = ["connection", context.worker_id]
+
+    def finalizer(self, context):
+        with self.lock:
+            self.closed.append(context.worker_id)
+
+    def createTasks(self, num_tasks):
+        def query(x, ctx):
+            return (ctx.worker_id, x)
+        return list(SimpleTask("task%s" % i, action=query, args=(i,),
+                               worker_context_arg="ctx")
+                    for i in range(num_tasks))
+
+    def test_finite_thread_processor(self):
+        task_processor = FiniteThreadTaskProcessor(
+            num_threads=3, worker_initializer=self.initializer,
+            worker_finalizer=self.finalizer)
+        tasks = self.createTasks(20)
+        task_runner = TaskRunner(tasks=tasks, task_processor=task_processor)
+        task_runner.run()
+        self.assertEqual(20, len(task_runner.succeeded_tasks))
+        self.assertEqual([0, 1, 2], sorted(self.opened))
+        self.assertEqual([0, 1, 2], sorted(self.closed))
+        for i, task in enumerate(tasks):
+            worker_id, x = task.getResult()
+            self.assertEqual(i, x)
+            self.assertIn(worker_id, [0, 1, 2])
+
+    def test_naive_processor(self):
+        task_processor = NaiveTaskProcessor(
+            worker_initializer=self.initializer,
+            worker_finalizer=self.finalizer)
+        tasks = self.createTasks(5)
+        tasks.append(SimpleTask("plain", action=lambda *args: len(args),
+                                args=(TaskResult("task0"),)))
+        task_runner = TaskRunner(tasks=tasks, task_processor=task_processor)
+        task_runner.run()
+        self.assertEqual([0], self.opened)
+        self.assertEqual([0], self.closed)
+        self.assertEqual((0, 4), task_runner.getTask("task4").getResult())
+        self.assertEqual(1, task_runner.getTask("plain").getResult())
+
+    def test_fused_tasks(self):
+        task_processor = FiniteThreadTaskProcessor(
+            num_threads=2, worker_initializer=self.initializer)
+        tasks = self.createTasks(40)
+        task_runner = TaskRunner(tasks=tasks, task_processor=task_processor,
+                                 task_fusion=TaskFusion(max_batch_size=8,
+                                                        fuse_unknown=True))
+        task_runner.run()
+        self.assertGreater(task_runner.num_fused_tasks, 0)
+        for i, task in enumerate(tasks):
+            self.assertEqual(i, task.getResult()[1])
+
+    def test_initializer_failure(self):
+        def initializer(context):
+            raise Exception("Connection refused")
+        task_processor = FiniteThreadTaskProcessor(
+            num_threads=2, worker_initializer=initializer,
+            worker_finalizer=self.finalizer)
+        task_runner = TaskRunner(tasks=self.createTasks(3),
+                                 task_processor=task_processor)
+        task_runner.run(continue_on_failure=True)
+        self.assertEqual(3, len(task_runner.failed_tasks))
+        for task in task_runner.failed_tasks:
+            self.assertEqual(TaskStatus.FAILURE, task.getStatus())
+            self.assertIn("Connection refused", task.getError())
+        self.assertEqual([], self.closed)
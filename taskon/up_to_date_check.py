@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+
+from taskon.common import taskonAssert
+
+
+class UpToDateCheck:
+    """
+    Make-style incremental execution of file producing tasks. Tasks declare
+    the files they read in `task.input_files` and the files they write in
+    `task.output_files`. A ready task is not executed (and succeeds with its
+    default result) if it's up to date:
+        1. It declares output files, and all of them exist.
+        2. None of its dependencies was executed in this run, i.e. all the
+           dependencies were up to date too. Hence the dirty state of a task
+           propagates to all the tasks depending on it.
+        3. As per @method:
+           "mtime" - No input file is newer than the oldest output file. Like
+                     make, a change in the task's command is not detected.
+           "hash" - The content hashes of input files and the action identity
+                    of the task (see AbstractTask.getActionIdentity) are the
+                    same as recorded at its last successful execution. The
+                    records are kept in memory, and in @state_path (a JSON
+                    file) if given, to be used across processes.
+    Tasks without declared output files are always executed.
+    Note that the tasks executed within a FusedTask are not checked.
+    """
+    def __init__(self, method="mtime", state_path=None):
+        taskonAssert(method in ("mtime", "hash"),
+                     "method should be either 'mtime' or 'hash'")
+        self.method = method
+        self.state_path = state_path
+        # Map from task name to {"action": ..., "inputs": {path: hash}}.
+        self.records = dict()
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path) as f:
+                self.records = json.load(f)
+
+    def prepare(self, deps_func):
+        """Called by task scheduler before the start of scheduling."""
+        self.deps_func = deps_func
+        self.up_to_date_tasks = set()
+        # Cache of mtime/hash of files, invalidated when a task producing
+        # them is executed.
+        self.file_cache = dict()
+
+    def isUpToDate(self, task):
+        """
+        Called by task scheduler when @task is ready. Return True if it's up
+        to date, in which case it's not executed.
+        """
+        if len(task.output_files) == 0:
+            return False
+        up_to_date = (all(d in self.up_to_date_tasks
+                          for d in self.deps_func(task.id)) and
+                      self.__checkFiles(task))
+        if up_to_date:
+            self.up_to_date_tasks.add(task.id)
+        elif self.method == "hash":
+            # Forget the record until the task succeeds again, its outputs
+            # are not reliable if it fails.
+            self.records.pop(task.name, None)
+        return up_to_date
+
+    def __checkFiles(self, task):
+        if self.method == "mtime":
+            output_times = list(self.__mtime(f) for f in task.output_files)
+            if None in output_times:
+                return False
+            input_times = list(self.__mtime(f) for f in task.input_files)
+            if None in input_times:
+                return False
+            return max(input_times, default=0) <= min(output_times)
+        record = self.records.get(task.name)
+        return (record is not None and
+                all(os.path.exists(f) for f in task.output_files) and
+                record["action"] == task.getActionIdentity() and
+                record["inputs"] == self.__hashes(task.input_files))
+
+    def onComplete(self, task):
+        """Called by task scheduler when @task is executed successfully."""
+        for f in task.output_files:
+            self.file_cache.pop(f, None)
+        if self.method == "hash" and len(task.output_files) > 0:
+            self.records[task.name] = dict(
+                action=task.getActionIdentity(),
+                inputs=self.__hashes(task.input_files))
+
+    def save(self):
+        """Write the records in @state_path, if given. Called by TaskRunner."""
+        if self.state_path is None:
+            return
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.records, f)
+        os.replace(temp_path, self.state_path)
+
+    def __mtime(self, path):
+        if path not in self.file_cache:
+            try:
+                self.file_cache[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                self.file_cache[path] = None
+        return self.file_cache[path]
+
+    def __hashes(self, paths):
+        hashes = dict()
+        for path in paths:
+            if path not in self.file_cache:
+                try:
+                    with open(path, "rb") as f:
+                        self.file_cache[path] = hashlib.sha256(
+                            f.read()).hexdigest()
+                except OSError:
+                    self.file_cache[path] = None
+            hashes[path] = self.file_cache[path]
+        return hashes
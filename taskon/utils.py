@@ -7,7 +7,9 @@ from taskon.common import TaskonError
 def cycleDetection(nodes, edge_func):
     """
     Given a graph with @nodes, a @edge_func (node -> directly connected nodes),
-    Return the Object(cycle_found=False) if there is no cycle in graph.
+    Return the Object(cycle_found=False, visited=..) if there is no cycle in
+    graph. 'visited' is the set of all the nodes reachable from @nodes, same as
+    depsCover(@nodes, @edge_func).
     Return an Object(cycle_found=True, cycle_path=list-of-nodes-in-cycle) if
     there is some cycle in the graph.
     """
@@ -36,7 +38,7 @@ def cycleDetection(nodes, edge_func):
                                   cycle_path=cycle_path)
                 else:
                     main_stack.append(n)
-    return Object(cycle_found=False)
+    return Object(cycle_found=False, visited=visited)
 
 def depsCover(nodes, edge_func):
     q = collections.deque(nodes)
@@ -49,6 +51,67 @@ def depsCover(nodes, edge_func):
                 visited.add(i)
     return visited
 
+def topologicalOrder(nodes, edge_func):
+    """
+    Given a acyclic graph with @nodes and a @edge_func (node -> directly
+    connected nodes), Return the list of @nodes in topological order, such that
+    a node always appears after all of its connected nodes. @edge_func must not
+    return nodes outside @nodes.
+    """
+    num_pending = dict()
+    reverse_edges = dict((n, []) for n in nodes)
+    order = []
+    for n in nodes:
+        edges = edge_func(n)
+        num_pending[n] = len(edges)
+        for e in edges:
+            reverse_edges[e].append(n)
+        if len(edges) == 0:
+            order.append(n)
+    index = 0
+    while index < len(order):
+        for n in reverse_edges[order[index]]:
+            num_pending[n] -= 1
+            if num_pending[n] == 0:
+                order.append(n)
+        index += 1
+    return order
+
+def criticalPath(nodes, edge_func, cost_func):
+    """
+    Given a acyclic graph with @nodes, a @edge_func (node -> directly connected
+    nodes) and a @cost_func (node -> cost of node), Return the
+    Object(length=.., path=list-of-nodes) of the path with largest total cost.
+    The path starts with a node having no connected nodes.
+    """
+    length = dict()
+    parent = dict()
+    for n in topologicalOrder(nodes, edge_func):
+        parent[n] = max(edge_func(n), key = lambda e: length[e], default=None)
+        length[n] = cost_func(n) + (0 if parent[n] is None
+                                    else length[parent[n]])
+    if len(length) == 0:
+        return Object(length=0, path=[])
+    last = max(length, key = lambda n: length[n])
+    path = []
+    while last is not None:
+        path.append(last)
+        last = parent[last]
+    path.reverse()
+    return Object(length=length[path[-1]], path=path)
+
+def callableIdentity(func):
+    """
+    Return a string identifying the callable @func: 'module.qualname'. For
+    lambdas, which share the qualname, the line number of definition is
+    appended: 'module.qualname:line'.
+    """
+    identity = "%s.%s" % (getattr(func, "__module__", None),
+                          getattr(func, "__qualname__", type(func).__name__))
+    code = getattr(func, "__code__", None)
+    if code is not None and code.co_name == "<lambda>":
+        identity += ":%s" % code.co_firstlineno
+    return identity
 
 def runCommand(cmd):
     """Run a given bash command. Raise exception if command fails."""
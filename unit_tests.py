@@ -12,5 +12,46 @@ from taskon.tests.error_validation import ErrorValidationTest
 from taskon.tests.utils_test import TaskonUtilsTest
 
 from taskon.tests.task_processor_test import FiniteThreadTaskProcessorTest
+from taskon.tests.adaptive_thread_task_processor_test import AdaptiveThreadTaskProcessorTest
+from taskon.tests.routing_task_processor_test import RoutingTaskProcessorTest
+from taskon.tests.fair_share_task_processor_test import FairShareTaskProcessorTest
+
+from taskon.tests.runtime_store_test import RuntimeStoreTest
+
+from taskon.tests.task_fusion_test import TaskFusionTest
+
+from taskon.tests.parallel_preprocessing_test import ParallelPreprocessingTest
+
+from taskon.tests.task_speculation_test import TaskSpeculationTest
+
+from taskon.tests.lazy_task_result_test import LazyTaskResultTest
+
+from taskon.tests.task_cancellation_test import TaskCancellationTest
+
+from taskon.tests.worker_context_test import WorkerContextTest
+
+from taskon.tests.task_deduplication_test import TaskDeduplicationTest
+
+from taskon.tests.simulator_test import SimulatorTest
+
+from taskon.tests.stream_task_result_test import StreamTaskResultTest
+
+from taskon.tests.rate_limiting_test import RateLimitingTest
+from taskon.tests.memory_budget_test import MemoryBudgetTest
+from taskon.tests.deadline_scheduling_test import DeadlineSchedulingTest
+
+from taskon.tests.execution_plan_test import ExecutionPlanTest
+from taskon.tests.graph_file_test import GraphFileTest
+
+from taskon.tests.sub_graph_task_test import SubGraphTaskTest
+
+from taskon.tests.task_profiler_test import TaskProfilerTest
+
+from taskon.tests.shell_pool_test import ShellPoolTest
+
+from taskon.tests.up_to_date_check_test import UpToDateCheckTest
+
+from taskon.tests.sharded_scheduling_test import ShardedSchedulingTest
+from taskon.tests.serial_execution_test import SerialExecutionTest
 
 unittest.main()